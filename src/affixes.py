@@ -0,0 +1,294 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Reader for hunspell affix files (and the `data/affixes` template).
+# It keeps the PFX/SFX classes and the few options Lilak relies on, so the
+# generated dictionary can be expanded and checked without hunspell.
+
+import re
+import collections
+
+
+AffixRule = collections.namedtuple('AffixRule', 'flag strip append flags condition')
+
+
+class AffixClass:
+    def __init__(self, kind, flag, cross_product):
+        self.kind = kind  # 'PFX' or 'SFX'
+        self.flag = flag
+        self.cross_product = cross_product
+        self.rules = []
+
+
+def compile_condition(kind, condition):
+    # '.' matches anything, that's the case for all Lilak rules
+    if condition == '.':
+        return None
+
+    if kind == 'PFX':
+        return re.compile('^(?:{0})'.format(condition)).search
+
+    return re.compile('(?:{0})$'.format(condition)).search
+
+
+class Affixes:
+    def __init__(self):
+        self.flag_type = 'short'
+        self.prefixes = {}
+        self.suffixes = {}
+        self.aliases = []
+        self.ignore = ''
+        self.key = []
+        self.try_chars = ''
+        self.rep = []
+        self.map = []
+        self.nosuggest = None
+        self.need_affix = None
+        self.compound_flag = None
+        self.compound_begin = None
+        self.compound_end = None
+        self.compound_forbid = None
+        self.only_in_compound = None
+        self.compound_min = 3
+        self.ignore_table = {}
+
+
+    @classmethod
+    def load(cls, filename):
+        affixes = cls()
+        with open(filename, 'r', encoding='utf-8') as f:
+            affixes.parse(f)
+
+        return affixes
+
+
+    def parse(self, lines):
+        for line in lines:
+            if line.startswith('#'):
+                continue
+
+            fields = line.split()
+            if not fields:
+                continue
+
+            cmd = fields[0]
+            args = fields[1:]
+
+            if cmd in ('PFX', 'SFX'):
+                self.parse_affix(cmd, args)
+            elif cmd == 'FLAG' and args:
+                self.flag_type = args[0]
+            elif cmd == 'AF' and args:
+                # the first AF line holds the number of aliases
+                if not args[0].isdigit() or self.aliases:
+                    self.aliases.append(self.split_flags(args[0]))
+            elif cmd == 'IGNORE' and args:
+                self.ignore = args[0]
+                self.ignore_table = str.maketrans('', '', self.ignore)
+            elif cmd == 'KEY' and args:
+                self.key = args[0].split('|')
+            elif cmd == 'TRY' and args and not args[0].startswith('{'):
+                # the template has a placeholder, filled by `dump_affixes`
+                self.try_chars = args[0]
+            elif cmd == 'REP' and len(args) > 1:
+                self.rep.append((args[0].replace('_', ' '), args[1].replace('_', ' ')))
+            elif cmd == 'MAP' and args and not args[0].isdigit():
+                self.map.append(args[0])
+            elif cmd == 'NOSUGGEST' and args:
+                self.nosuggest = args[0]
+            elif cmd == 'NEEDAFFIX' and args:
+                self.need_affix = args[0]
+            elif cmd == 'COMPOUNDFLAG' and args:
+                self.compound_flag = args[0]
+            elif cmd == 'COMPOUNDBEGIN' and args:
+                self.compound_begin = args[0]
+            elif cmd == 'COMPOUNDEND' and args:
+                self.compound_end = args[0]
+            elif cmd == 'COMPOUNDFORBIDFLAG' and args:
+                self.compound_forbid = args[0]
+            elif cmd == 'ONLYINCOMPOUND' and args:
+                self.only_in_compound = args[0]
+            elif cmd == 'COMPOUNDMIN' and args:
+                self.compound_min = max(1, int(args[0]))
+
+
+    def parse_affix(self, kind, args):
+        table = self.prefixes if kind == 'PFX' else self.suffixes
+        flag = args[0]
+
+        if flag not in table:
+            # header line: flag, cross product, number of rules
+            table[flag] = AffixClass(kind, flag, args[1] == 'Y')
+            return
+
+        strip = args[1] if args[1] != '0' else ''
+        append, _, flags = args[2].partition('/')
+        if append == '0':
+            append = ''
+
+        append = self.clean(append)
+        condition = args[3] if len(args) > 3 else '.'
+
+        rule = AffixRule(flag, strip, append,
+                         frozenset(self.decode_flags(flags)),
+                         compile_condition(kind, condition))
+        table[flag].rules.append(rule)
+
+
+    def split_flags(self, flags):
+        if not flags:
+            return []
+
+        if self.flag_type == 'long':
+            return [flags[i:i+2] for i in range(0, len(flags), 2)]
+
+        if self.flag_type == 'num':
+            return flags.split(',')
+
+        return list(flags)
+
+
+    def decode_flags(self, flags):
+        # flag aliases (AF) are 1-based indexes in the alias table
+        if self.aliases and flags.isdigit():
+            return self.aliases[int(flags) - 1]
+
+        return self.split_flags(flags)
+
+
+    def parse_entry(self, line):
+        word, _, flags = line.partition('/')
+        return self.clean(word), frozenset(self.decode_flags(flags))
+
+
+    def clean(self, word):
+        if self.ignore_table:
+            return word.translate(self.ignore_table)
+
+        return word
+
+
+    def apply_suffix(self, rule, base):
+        if rule.strip and not base.endswith(rule.strip):
+            return None
+
+        if rule.condition and not rule.condition(base):
+            return None
+
+        if rule.strip:
+            base = base[:-len(rule.strip)]
+
+        return base + rule.append
+
+
+    def apply_prefix(self, rule, base):
+        if rule.strip and not base.startswith(rule.strip):
+            return None
+
+        if rule.condition and not rule.condition(base):
+            return None
+
+        return rule.append + base[len(rule.strip):]
+
+
+    def suffixed(self, word, flags):
+        # yields (form, rule) for single and twofold suffixes
+        for flag in flags:
+            affix = self.suffixes.get(flag)
+            if not affix:
+                continue
+
+            for rule in affix.rules:
+                form = self.apply_suffix(rule, word)
+                if form is None:
+                    continue
+
+                yield form, rule, affix
+
+                for outer_flag in rule.flags:
+                    outer = self.suffixes.get(outer_flag)
+                    if not outer:
+                        continue
+
+                    for outer_rule in outer.rules:
+                        outer_form = self.apply_suffix(outer_rule, form)
+                        if outer_form is not None:
+                            yield outer_form, outer_rule, outer
+
+
+    def expand(self, word, flags):
+        # Generate every surface form hunspell accepts for `word/flags`.
+        # Yields (form, flags) where flags are the ones of the stem plus
+        # the continuation flags of the applied affixes.
+        for form, form_flags, _ in self.derive(word, flags):
+            yield form, form_flags
+
+
+    def derive(self, word, flags):
+        # Like `expand`, yields (form, flags, classes) where classes are the
+        # applied affix classes: () for the stem, (prefix, suffix) at most.
+        # For twofold suffixes only the outer class is given.
+        need_affix = self.need_affix
+
+        if need_affix not in flags and self.only_in_compound not in flags:
+            yield word, flags, ()
+
+        suffixes = []
+        for form, rule, affix in self.suffixed(word, flags):
+            suffixes.append((form, rule, affix))
+            # a suffix needing an affix comes with a prefix only, like بگو
+            if need_affix not in rule.flags:
+                yield form, flags | rule.flags, (affix.flag,)
+
+        # the prefixes of the stem, and the ones allowed by the suffixes,
+        # like می‌ in می‌گفتم
+        candidates = [flag for flag in flags if flag in self.prefixes]
+        for _, rule, _ in suffixes:
+            for flag in rule.flags:
+                if flag in self.prefixes and flag not in candidates:
+                    candidates.append(flag)
+
+        for flag in candidates:
+            affix = self.prefixes[flag]
+            on_stem = flag in flags
+
+            for rule in affix.rules:
+                form = self.apply_prefix(rule, word)
+                if form is None:
+                    continue
+
+                if on_stem and need_affix not in rule.flags:
+                    yield form, flags | rule.flags, (flag,)
+
+                for suffix_form, suffix_rule, suffix in suffixes:
+                    if not on_stem and flag not in suffix_rule.flags:
+                        continue
+
+                    if not (affix.cross_product and suffix.cross_product) and \
+                       suffix.flag not in rule.flags and \
+                       affix.flag not in suffix_rule.flags:
+                        continue
+
+                    combined = self.apply_prefix(rule, suffix_form)
+                    if combined is None:
+                        continue
+
+                    yield combined, flags | rule.flags | suffix_rule.flags, (flag, suffix.flag)
@@ -0,0 +1,204 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Morphological analyzer: word -> stem, part-of-speech and affixes.
+#
+# The affixes are removed instead of added. The endings (and beginnings) of
+# the affix classes are kept in dicts, like in the learner, so a word is
+# matched with one lookup for each ending length:
+#   کتاب‌هایمان = کتاب + ‌ها + یمان
+#   برنمی‌گردم = برگرد + برنمی‌ + م
+# Each candidate stem is checked against the stems of the dictionary and
+# their flags, with the same rules as `Affixes.expand`.
+#
+# Run it from `src` folder:
+#   python3 analyzer.py کتاب‌هایمان می‌گفتم
+
+import sys
+import argparse
+import collections
+
+
+# prefix and suffix are the added strings, flags are the applied classes
+Analysis = collections.namedtuple('Analysis', 'stem pos offensive prefix suffix flags')
+
+StemEntry = collections.namedtuple('StemEntry', 'pos flags')
+
+
+class Analyzer:
+    def __init__(self, affixes):
+        self.affixes = affixes
+        self.stems = {}
+        self.endings = collections.defaultdict(list)
+        self.beginnings = collections.defaultdict(list)
+
+        # (class, rule, outer class, outer rule) for each ending
+        for affix in affixes.suffixes.values():
+            for rule in affix.rules:
+                self.endings[rule.append].append((affix, rule, None, None))
+
+                # twofold suffixes
+                for outer_flag in rule.flags:
+                    outer = affixes.suffixes.get(outer_flag)
+                    for outer_rule in (outer.rules if outer else ()):
+                        if not outer_rule.strip:
+                            ending = rule.append + outer_rule.append
+                            self.endings[ending].append((affix, rule, outer, outer_rule))
+
+        for affix in affixes.prefixes.values():
+            for rule in affix.rules:
+                self.beginnings[rule.append].append((affix, rule))
+
+        self.ending_sizes = sorted(set(len(e) for e in self.endings))
+        self.beginning_sizes = sorted(set(len(b) for b in self.beginnings if b))
+
+
+    def add(self, line, pos=''):
+        # a dictionary line, word/flags
+        word, flags = self.affixes.parse_entry(line)
+        entry = StemEntry(pos, flags)
+        entries = self.stems.setdefault(word, [])
+        if entry not in entries:
+            entries.append(entry)
+
+
+    def suffixes(self, word):
+        # yields (stem, rule, class, flags, ending) for the suffixes of the
+        # word, rule and class are the last ones applied
+        apply_suffix = self.affixes.apply_suffix
+        endings = self.endings
+        stems = self.stems
+        size = len(word)
+        for n in self.ending_sizes:
+            if n >= size:
+                break
+
+            ending = word[size - n:]
+            candidates = endings.get(ending)
+            if candidates is None:
+                continue
+
+            base = word[:size - n]
+            for affix, rule, outer, outer_rule in candidates:
+                stem = base + rule.strip
+                if stem not in stems:
+                    continue
+
+                inner = apply_suffix(rule, stem)
+                if outer is None:
+                    if inner == word:
+                        yield stem, rule, affix, (affix.flag,), ending
+                elif outer.flag in rule.flags and apply_suffix(outer_rule, inner) == word:
+                    yield stem, outer_rule, outer, (affix.flag, outer.flag), ending
+
+
+    def analyze(self, word):
+        affixes = self.affixes
+        word = affixes.clean(word)
+        need_affix = affixes.need_affix
+        results = []
+
+        def found(stem, prefix, suffix, flags, check):
+            for entry in self.stems[stem]:
+                if check(entry.flags):
+                    result = Analysis(stem, entry.pos, affixes.nosuggest in entry.flags,
+                                      prefix, suffix, flags)
+                    if result not in results:
+                        results.append(result)
+
+        # the stem itself
+        if word in self.stems:
+            found(word, '', '', (), lambda flags: need_affix not in flags and
+                  affixes.only_in_compound not in flags)
+
+        # suffixes
+        for stem, rule, affix, flags, ending in self.suffixes(word):
+            if need_affix not in rule.flags:
+                found(stem, '', ending, flags, lambda entry_flags: flags[0] in entry_flags)
+
+        # prefixes, with or without suffixes
+        for n in self.beginning_sizes:
+            if n >= len(word):
+                break
+
+            for affix, rule in self.beginnings.get(word[:n], ()):
+                rest = rule.strip + word[n:]
+                prefix = word[:n]
+                if affixes.apply_prefix(rule, rest) != word:
+                    continue
+
+                if rest in self.stems and need_affix not in rule.flags:
+                    found(rest, prefix, '', (affix.flag,),
+                          lambda entry_flags: affix.flag in entry_flags)
+
+                for stem, suffix_rule, suffix, flags, ending in self.suffixes(rest):
+                    if not (affix.cross_product and suffix.cross_product) and \
+                       suffix.flag not in rule.flags and \
+                       affix.flag not in suffix_rule.flags:
+                        continue
+
+                    if affixes.apply_prefix(rule, stem) is None:
+                        continue
+
+                    # the prefix is a flag of the stem or of the suffix
+                    from_suffix = affix.flag in suffix_rule.flags
+                    found(stem, prefix, ending, (affix.flag,) + flags,
+                          lambda entry_flags: flags[0] in entry_flags and
+                          (from_suffix or affix.flag in entry_flags))
+
+        return results
+
+
+    def analyze_many(self, words):
+        # the analyses of each word, repeated words are analyzed once
+        cache = {}
+        results = []
+        for word in words:
+            result = cache.get(word)
+            if result is None:
+                result = cache[word] = self.analyze(word)
+            results.append(result)
+
+        return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('words', nargs='*', help='words to analyze, standard input by default')
+    args = parser.parse_args()
+
+    from lilak import Lilak
+    from tokenizer import tokenize
+
+    lilak = Lilak()
+    lilak.read_lexicon('./data/lexicon')
+    lilak.pars_verbs('./data/verbs.htm')
+    lilak.pars_main_dic()
+    lilak.pars_user_dic('./data/dic_users')
+    analyzer = lilak.analyzer()
+
+    words = args.words or [word for word, _ in tokenize(sys.stdin)]
+    for word, analyses in zip(words, analyzer.analyze_many(words)):
+        for a in analyses:
+            print('\t'.join((word, a.stem, a.pos, a.prefix, a.suffix, ' '.join(a.flags),
+                             '!!' if a.offensive else '')))
+        if not analyses:
+            print(word)
@@ -0,0 +1,469 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Chromium dictionary (.bdic) writer and reader.
+#
+# Chromium reads one binary file instead of the .dic/.aff files, in the
+# BDict layout of its hunspell (third_party/hunspell/google/bdict.h). It
+# used to be made by `convert_dict`, out of a full chromium checkout:
+#
+#   header  "BDic", version 2.0, offsets of the aff and dic sections and
+#           the MD5 digest of everything after the header
+#   aff     offsets of four lists of NUL terminated strings (each list ends
+#           with an empty string): the AF groups ("AF 55", "AF pasasb..."),
+#           the affix rules, the REP pairs and the other commands. Flags of
+#           the rules and the words are numbers of AF groups
+#   dic     a trie of the UTF-8 bytes of the words
+#
+# The trie nodes:
+#   leaf    0AFxxxxx xxxxxxxx  the first AF group of the word (0 for none),
+#           [F] more groups (16 bits each, ending with 0xFFFF), [A] the rest
+#           of the word, NUL terminated: کتاب is a leaf "کتاب\0" at the
+#           root of a dictionary without other words starting with ک
+#   lookup  110000ZW first byte, table size, [Z] offset of the leaf of the
+#           word ending here, table of offsets (16 bits, [W] 32 bits) from
+#           the start of the node, 0 for no child
+#   list    111Wnnnn n items: byte and offset (8 bits, [W] 16 bits) from the
+#           end of the items. The word ending here is the item of byte 0
+#
+# Each written file is read back and compared with its content. The check
+# uses the reader of this module: it follows the same layout, but is not
+# chromium's hunspell.
+#
+# Run it from `src` folder, after the build:
+#   python3 bdic.py
+#   python3 bdic.py --check ../build/fa-IR.bdic
+
+import os
+import struct
+import hashlib
+import argparse
+import collections
+
+from optimize import alias_table
+
+
+SIGNATURE = b'BDic'
+MAJOR_VERSION = 2
+MINOR_VERSION = 0
+
+HEADER = struct.Struct('<4sHHII16s')
+AFF_HEADER = struct.Struct('<IIII')
+
+LEAF_ADDITIONAL = 0x40
+LEAF_FOLLOWING = 0x20
+LEAF_FIRST_MASK = 0x1F
+LEAF_MAX_FIRST = 0x1FFF
+LEAF_TERMINATOR = 0xFFFF
+
+NODE_TYPE_MASK = 0xE0
+LOOKUP_NODE = 0xC0
+LOOKUP_32BIT = 0x01
+LOOKUP_0TH = 0x02
+LIST_NODE = 0xE0
+LIST_16BIT = 0x10
+LIST_MAX = 0x0F
+
+# words are {word: sorted tuple of AF group numbers}
+Dictionary = collections.namedtuple('Dictionary', 'groups rules replacements commands words')
+
+
+def read_files(aff_filename, dic_filename):
+    with open(aff_filename, 'r', encoding='utf-8') as f:
+        aff_lines = f.read().split('\n')
+
+    with open(dic_filename, 'r', encoding='utf-8') as f:
+        f.readline()  # number of entries
+        dic_lines = f.read().split('\n')
+
+    return aff_lines, dic_lines
+
+
+def convert(aff_lines, dic_lines):
+    # the content of a .bdic file, out of the lines of .aff and .dic files
+    aliases = None
+    rules = []
+    replacements = []
+    commands = []
+    for line in aff_lines:
+        fields = line.split()
+        if not fields or fields[0].startswith('#'):
+            continue
+
+        kind = fields[0]
+        if kind == 'AF':
+            # the first one is the number of groups
+            if aliases is None:
+                aliases = []
+            else:
+                aliases.append(fields[1])
+        elif kind in ('PFX', 'SFX'):
+            rules.append(fields)
+        elif kind == 'REP':
+            if len(fields) == 3:
+                replacements.append((fields[1], fields[2]))
+        else:
+            commands.append(' '.join(fields))
+
+    entries = []
+    for line in dic_lines:
+        word, _, flags = line.strip().partition('/')
+        if word:
+            entries.append((word, flags))
+
+    if aliases is None:
+        # the same numbers as `optimize`
+        flag_strings = [flags for _, flags in entries if flags]
+        flag_strings.extend(rule_flags(fields) for fields in rules if rule_flags(fields))
+        table = alias_table(flag_strings)
+        groups = sorted(table, key=lambda flags: int(table[flags]))
+    else:
+        table = {str(i + 1): str(i + 1) for i in range(len(aliases))}
+        groups = aliases
+
+    words = collections.defaultdict(set)
+    for word, flags in entries:
+        words[word].add(int(table[flags]) if flags else 0)
+
+    rule_lines = []
+    for fields in rules:
+        flags = rule_flags(fields)
+        if flags:
+            fields = fields[:3] + [fields[3].partition('/')[0] + '/' + table[flags]] + fields[4:]
+        rule_lines.append(' '.join(fields))
+
+    return Dictionary(groups, rule_lines, replacements, commands,
+                      {word: tuple(sorted(ids)) for word, ids in words.items()})
+
+
+def rule_flags(fields):
+    # fields of an affix rule: kind, flag, strip, append[/flags], condition
+    if len(fields) > 4 and '/' in fields[3]:
+        return fields[3].partition('/')[2]
+    return ''
+
+
+def strings(items):
+    # NUL terminated strings, the list ends with an empty one
+    return b''.join(item.encode('utf-8') + b'\0' for item in items) + b'\0'
+
+
+def serialize_aff(dictionary, start):
+    # `start` is the offset of the section in the file
+    parts = [
+        strings(['AF {0}'.format(len(dictionary.groups))] +
+                ['AF ' + group for group in dictionary.groups]),
+        strings(dictionary.rules),
+        strings(item for pair in dictionary.replacements for item in pair),
+        strings(dictionary.commands),
+    ]
+
+    offsets = []
+    offset = start + AFF_HEADER.size
+    for part in parts:
+        offsets.append(offset)
+        offset += len(part)
+
+    return AFF_HEADER.pack(*offsets) + b''.join(parts)
+
+
+def leaf_node(ids, rest):
+    first = ids[0]
+    if first > LEAF_MAX_FIRST:
+        raise ValueError('too many AF groups: {0}'.format(first))
+
+    flags = (LEAF_FOLLOWING if len(ids) > 1 else 0) | (LEAF_ADDITIONAL if rest else 0)
+    out = bytearray((flags | first >> 8, first & 0xFF))
+    if len(ids) > 1:
+        for i in ids[1:]:
+            out += struct.pack('<H', i)
+        out += struct.pack('<H', LEAF_TERMINATOR)
+
+    if rest:
+        out += rest + b'\0'
+
+    return bytes(out)
+
+
+def list_node(children):
+    # None if the children do not fit in a list
+    if len(children) > LIST_MAX:
+        return None
+
+    offsets = []
+    size = 0
+    for _, data in children:
+        offsets.append(size)
+        size += len(data)
+
+    if offsets[-1] <= 0xFF:
+        fmt, flags = 'B', 0
+    elif offsets[-1] <= 0xFFFF:
+        fmt, flags = '<H', LIST_16BIT
+    else:
+        return None
+
+    out = bytearray((LIST_NODE | flags | len(children),))
+    for (byte, _), offset in zip(children, offsets):
+        out.append(byte)
+        out += struct.pack(fmt, offset)
+
+    return bytes(out) + b''.join(data for _, data in children)
+
+
+def lookup_node(children):
+    zeroth = None
+    if children[0][0] == 0:
+        zeroth = children[0][1]
+        children = children[1:]
+
+    first = children[0][0]
+    table_size = children[-1][0] - first + 1
+    size = sum(len(data) for _, data in children) + len(zeroth or b'')
+    for width, fmt, flags in ((2, '<H', 0), (4, '<I', LOOKUP_32BIT)):
+        head = 3 + (width if zeroth else 0) + table_size * width
+        if head + size < 1 << (8 * width):
+            break
+
+    table = [0] * table_size
+    offset = head
+    if zeroth:
+        flags |= LOOKUP_0TH
+        zeroth_offset = offset
+        offset += len(zeroth)
+
+    for byte, data in children:
+        table[byte - first] = offset
+        offset += len(data)
+
+    out = bytearray((LOOKUP_NODE | flags, first, table_size))
+    if zeroth:
+        out += struct.pack(fmt, zeroth_offset)
+    for offset in table:
+        out += struct.pack(fmt, offset)
+
+    return bytes(out) + (zeroth or b'') + b''.join(data for _, data in children)
+
+
+def trie_node(keys, ids, lo, hi, depth):
+    # node of the sorted keys[lo:hi], their first `depth` bytes are read
+    if hi - lo == 1:
+        return leaf_node(ids[lo], keys[lo][depth:])
+
+    # (byte, node), byte 0 is the end of a word
+    children = []
+    i = lo
+    if len(keys[i]) == depth:
+        children.append((0, leaf_node(ids[i], b'')))
+        i += 1
+
+    while i < hi:
+        byte = keys[i][depth]
+        j = i + 1
+        while j < hi and keys[j][depth] == byte:
+            j += 1
+
+        children.append((byte, trie_node(keys, ids, i, j, depth + 1)))
+        i = j
+
+    return list_node(children) or lookup_node(children)
+
+
+def serialize(dictionary):
+    words = sorted(dictionary.words)
+    keys = [word.encode('utf-8') for word in words]
+    ids = [dictionary.words[word] for word in words]
+    dic = trie_node(keys, ids, 0, len(keys), 0) if keys else b''
+
+    aff = serialize_aff(dictionary, HEADER.size)
+    body = aff + dic
+    header = HEADER.pack(SIGNATURE, MAJOR_VERSION, MINOR_VERSION, HEADER.size,
+                         HEADER.size + len(aff), hashlib.md5(body).digest())
+    return header + body
+
+
+class BDic:
+    def __init__(self, data):
+        signature, major, _, aff_offset, dic_offset, digest = HEADER.unpack_from(data)
+        if signature != SIGNATURE or major != MAJOR_VERSION:
+            raise ValueError('not a bdic file')
+
+        if hashlib.md5(data[HEADER.size:]).digest() != digest:
+            raise ValueError('wrong bdic digest')
+
+        self.data = data
+        self.dic_offset = dic_offset
+
+        group_offset, rule_offset, rep_offset, other_offset = AFF_HEADER.unpack_from(data, aff_offset)
+        self.groups = [group[3:] for group in self.strings(group_offset)[1:]]
+        self.rules = self.strings(rule_offset)
+        items = self.strings(rep_offset)
+        self.replacements = list(zip(items[::2], items[1::2]))
+        self.commands = self.strings(other_offset)
+
+
+    @classmethod
+    def open(cls, filename):
+        with open(filename, 'rb') as f:
+            return cls(f.read())
+
+
+    def strings(self, offset):
+        items = []
+        while True:
+            end = self.data.index(b'\0', offset)
+            if end == offset:
+                return items
+
+            items.append(self.data[offset:end].decode('utf-8'))
+            offset = end + 1
+
+
+    def leaf(self, pos):
+        # (AF group numbers, rest of the word)
+        data = self.data
+        kind = data[pos]
+        ids = [(kind & LEAF_FIRST_MASK) << 8 | data[pos + 1]]
+        pos += 2
+        if kind & LEAF_FOLLOWING:
+            while True:
+                i, = struct.unpack_from('<H', data, pos)
+                pos += 2
+                if i == LEAF_TERMINATOR:
+                    break
+                ids.append(i)
+
+        rest = b''
+        if kind & LEAF_ADDITIONAL:
+            rest = data[pos:data.index(b'\0', pos)]
+
+        return tuple(ids), rest
+
+
+    def children(self, pos):
+        # (byte, position) of the children of a list or lookup node
+        data = self.data
+        kind = data[pos]
+        if kind & NODE_TYPE_MASK == LIST_NODE:
+            fmt = '<H' if kind & LIST_16BIT else 'B'
+            width = struct.calcsize(fmt)
+            count = kind & LIST_MAX
+            end = pos + 1 + count * (1 + width)
+            for item in range(pos + 1, end, 1 + width):
+                yield data[item], end + struct.unpack_from(fmt, data, item + 1)[0]
+            return
+
+        fmt, width = ('<I', 4) if kind & LOOKUP_32BIT else ('<H', 2)
+        first, table_size = data[pos + 1], data[pos + 2]
+        table = pos + 3
+        if kind & LOOKUP_0TH:
+            yield 0, pos + struct.unpack_from(fmt, data, table)[0]
+            table += width
+
+        for i in range(table_size):
+            offset, = struct.unpack_from(fmt, data, table + i * width)
+            if offset:
+                yield first + i, pos + offset
+
+
+    def get(self, word):
+        # AF group numbers of the word, or None
+        if self.dic_offset == len(self.data):
+            return None
+
+        key = word.encode('utf-8')
+        pos = self.dic_offset
+        depth = 0
+        while self.data[pos] & 0x80:
+            byte = key[depth] if depth < len(key) else 0
+            pos = dict(self.children(pos)).get(byte)
+            if pos is None:
+                return None
+            if byte:
+                depth += 1
+
+        ids, rest = self.leaf(pos)
+        return ids if key[depth:] == rest else None
+
+
+    def items(self):
+        # (word, AF group numbers), sorted
+        if self.dic_offset == len(self.data):
+            return
+
+        stack = [(self.dic_offset, b'')]
+        while stack:
+            pos, prefix = stack.pop()
+            if not self.data[pos] & 0x80:
+                ids, rest = self.leaf(pos)
+                yield (prefix + rest).decode('utf-8'), ids
+                continue
+
+            for byte, child in reversed(list(self.children(pos))):
+                stack.append((child, prefix + bytes((byte,)) if byte else prefix))
+
+
+def check(data, dictionary):
+    # round trip: the file has exactly the content it was written from
+    bdic = BDic(data)
+    for name in ('groups', 'rules', 'replacements', 'commands'):
+        if getattr(bdic, name) != list(getattr(dictionary, name)):
+            raise ValueError('bdic round trip failed: {0}'.format(name))
+
+    if dict(bdic.items()) != dictionary.words:
+        raise ValueError('bdic round trip failed: words')
+
+
+def write_bdic(filename, dic_filename, aff_filename):
+    # returns False if the file is already up to date
+    dictionary = convert(*read_files(aff_filename, dic_filename))
+    data = serialize(dictionary)
+
+    if os.path.isfile(filename):
+        with open(filename, 'rb') as f:
+            if f.read() == data:
+                return False
+
+    check(data, dictionary)
+
+    tmp = filename + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+
+    os.replace(tmp, filename)
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d', '--dic', default='../build/fa-IR.dic', help='hunspell dictionary')
+    parser.add_argument('-a', '--aff', default='../build/fa-IR.aff', help='hunspell affix file')
+    parser.add_argument('-o', '--output', default='../build/fa-IR.bdic', help='output bdic file')
+    parser.add_argument('--check', help='read a bdic file and compare it with the dictionary')
+    args = parser.parse_args()
+
+    if args.check:
+        with open(args.check, 'rb') as f:
+            check(f.read(), convert(*read_files(args.aff, args.dic)))
+        print('{0}: ok'.format(args.check))
+    else:
+        written = write_bdic(args.output, args.dic, args.aff)
+        print('{0}: {1}'.format(args.output, 'written' if written else 'up to date'))
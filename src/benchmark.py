@@ -0,0 +1,295 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Benchmark of the build stages, the dictionary size and the check throughput.
+#
+# Run it from `src` folder:
+#   python3 benchmark.py                       # real lexicon
+#   python3 benchmark.py -s 4                  # synthetic lexicon, 4 times bigger
+#   python3 benchmark.py -o bench.json         # save the report
+#   python3 benchmark.py -b bench.json         # compare with a saved report
+#
+# Timings are the best of `--repeat` runs. Peak RSS is the peak of the
+# process so far, so it never decreases from one stage to the next.
+#
+# The editing latency of the language server (see `lsp.py`) is measured on
+# a document of EDIT_LINES lines made of the texts: the time from a change
+# to its published diagnostics, for keystrokes and for new lines. With
+# `--max-latency` the median must be below it.
+
+import os
+import sys
+import glob
+import json
+import time
+import random
+import logging
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+
+import lilak
+from lilak import Lilak
+from checker import Checker
+from tokenizer import tokenize
+from zwnj import ZwnjFixer
+import lsp
+
+
+TEXTS = '../test/text*'
+EDIT_LINES = 30000
+EDITS = 50
+SYLLABLES = ('ان', 'ار', 'ین', 'ون', 'ست', 'گر', 'مند', 'وار', 'ک', 'ش')
+
+
+def peak_rss():
+    # kilobytes on linux, bytes on mac
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss //= 1024
+    return rss
+
+
+def synthetic_lexicon(source, target, scale, seed=0):
+    # The rows of the lexicon plus made up words with the same attributes,
+    # so all the rules are exercised in the same proportions.
+    rng = random.Random(seed)
+
+    with open(source, 'r', encoding='utf-8') as f:
+        rows = [line.rstrip('\n').split(',', 1) for line in f
+                if not line.startswith('##') and ',' in line]
+
+    seen = set(word for word, _ in rows)
+    count = int(len(rows) * scale)
+
+    with open(target, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            word, attrs = rows[i % len(rows)]
+            while i >= len(rows) and word in seen:
+                word = rng.choice(SYLLABLES) + word
+
+            seen.add(word)
+            f.write('{0},{1}\n'.format(word, attrs))
+
+    return count
+
+
+def timed(stages, name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    stages[name] = {'seconds': time.perf_counter() - start, 'peak_rss_kb': peak_rss()}
+    return result
+
+
+def build(lexicon, user_dic, outdir, jobs):
+    stages = {}
+    aff = os.path.join(outdir, 'fa-IR.aff')
+    dic = os.path.join(outdir, 'fa-IR.dic')
+
+    # every run starts cold
+    lilak.is_kam_dandane.cache_clear()
+
+    lk = Lilak()
+    timed(stages, 'read_lexicon', lk.read_lexicon, lexicon)
+    timed(stages, 'pars_verbs', lk.pars_verbs)
+    timed(stages, 'pars_main_dic', lk.pars_main_dic, jobs)
+    timed(stages, 'pars_user_dic', lk.pars_user_dic, user_dic)
+    timed(stages, 'dump_affixes', lk.dump_affixes, aff)
+    timed(stages, 'dump_dictionary', lk.dump_dictionary, dic)
+
+    checker = timed(stages, 'load_checker', Checker.load, dic, aff)
+    return stages, checker, len(lk.words)
+
+
+def check(checker, texts, suggest):
+    tokens = []
+    for filename in texts:
+        with open(filename, 'r', encoding='utf-8') as f:
+            tokens.extend(word for word, _ in tokenize(f, comments=True))
+
+    start = time.perf_counter()
+    misses = [word for word in tokens if not checker.spell(word)]
+    seconds = time.perf_counter() - start
+
+    result = {
+        'tokens': len(tokens),
+        'misspelled': len(misses),
+        'seconds': seconds,
+        'tokens_per_second': len(tokens) / seconds if seconds else 0,
+    }
+
+    if suggest:
+        start = time.perf_counter()
+        for word in misses:
+            checker.suggest(word)
+        seconds = time.perf_counter() - start
+        result['suggest_seconds'] = seconds
+        result['suggestions_per_second'] = len(misses) / seconds if seconds else 0
+
+    return result
+
+
+class NullWriter:
+    def write(self, data):
+        pass
+
+
+def editing(checker, texts, size=EDIT_LINES, edits=EDITS):
+    # median and max milliseconds from a change to its published
+    # diagnostics, for a keystroke and for a new line
+    lines = []
+    for filename in texts:
+        with open(filename, 'r', encoding='utf-8') as f:
+            lines.extend(f.read().split('\n'))
+    text = '\n'.join((lines * (size // max(1, len(lines)) + 1))[:size])
+
+    server = lsp.Server(checker)
+    server.writer = NullWriter()
+    server.fixer = ZwnjFixer(checker)
+
+    def change(line, character, text, version):
+        start = time.perf_counter()
+        position = {'line': line, 'character': character}
+        server.did_change({'textDocument': {'uri': 'bench', 'version': version},
+                           'contentChanges': [{'range': {'start': position, 'end': position}, 'text': text}]})
+        server.publish()
+        return (time.perf_counter() - start) * 1000
+
+    async def run():
+        server.did_open({'textDocument': {'uri': 'bench', 'version': 0, 'text': text}})
+        server.publish()
+        keystrokes = sorted(change(size // 2, 0, 'ب', i) for i in range(edits))
+        newlines = sorted(change(10, 0, '\n', edits + i) for i in range(edits))
+        return keystrokes, newlines
+
+    keystrokes, newlines = asyncio.run(run())
+    document = server.documents['bench']
+    return {
+        'lines': len(document.lines),
+        'diagnostics': sum(len(results) for results in document.results),
+        'keystroke_ms': keystrokes[len(keystrokes) // 2],
+        'keystroke_max_ms': keystrokes[-1],
+        'newline_ms': newlines[len(newlines) // 2],
+        'newline_max_ms': newlines[-1],
+    }
+
+
+def best(runs):
+    # the fastest run of each stage
+    stages = {}
+    for run in runs:
+        for name, stage in run.items():
+            if name not in stages or stage['seconds'] < stages[name]['seconds']:
+                stages[name] = stage
+    return stages
+
+
+def compare(report, baseline, tolerance):
+    # names of the stages slower than the baseline by more than `tolerance`
+    slower = []
+    current = dict(report['stages'], check=report['check'])
+    previous = dict(baseline.get('stages', {}), check=baseline.get('check', {}))
+
+    for name, stage in current.items():
+        old = previous.get(name, {}).get('seconds')
+        if not old:
+            continue
+
+        ratio = stage['seconds'] / old
+        print('{0:<16} {1:8.3f}s {2:8.3f}s {3:+6.1f}%'.format(
+            name, old, stage['seconds'], (ratio - 1) * 100))
+        if ratio > 1 + tolerance:
+            slower.append(name)
+
+    return slower
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-l', '--lexicon', default='./data/lexicon', help='lexicon file')
+    parser.add_argument('-u', '--user-dic', default='./data/dic_users', help='user dictionary file')
+    parser.add_argument('-s', '--scale', type=float, help='use a synthetic lexicon, SCALE times the lexicon')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='number of runs')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of parallel build processes')
+    parser.add_argument('-t', '--texts', default=TEXTS, help='texts to check (glob)')
+    parser.add_argument('--no-suggest', action='store_true', help='do not benchmark suggestions')
+    parser.add_argument('-o', '--output', help='write the report to this file')
+    parser.add_argument('-b', '--baseline', help='compare with a previous report')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown against the baseline')
+    parser.add_argument('--no-editing', action='store_true', help='do not benchmark the language server')
+    parser.add_argument('--max-latency', type=float, help='fail if the median editing latency is more (ms)')
+    args = parser.parse_args()
+
+    logging.getLogger('lilak').setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as outdir:
+        lexicon = args.lexicon
+        rows = None
+        if args.scale:
+            lexicon = os.path.join(outdir, 'lexicon')
+            rows = synthetic_lexicon(args.lexicon, lexicon, args.scale)
+
+        runs = []
+        for _ in range(args.repeat):
+            stages, checker, words = build(lexicon, args.user_dic, outdir, args.jobs)
+            runs.append(stages)
+
+        report = {
+            'version': lilak.VERSIAN,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'scale': args.scale or 1,
+            'rows': rows,
+            'stages': best(runs),
+            'dictionary': {
+                'words': words,
+                'forms': len(checker.forms),
+                'dic_bytes': os.path.getsize(os.path.join(outdir, 'fa-IR.dic')),
+                'aff_bytes': os.path.getsize(os.path.join(outdir, 'fa-IR.aff')),
+            },
+            'check': check(checker, sorted(glob.glob(args.texts)), not args.no_suggest),
+        }
+        if not args.no_editing:
+            report['editing'] = editing(checker, sorted(glob.glob(args.texts)))
+        report['peak_rss_kb'] = peak_rss()
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            slower = compare(report, json.load(f), args.tolerance)
+
+        if slower:
+            print('slower than the baseline: {0}'.format(', '.join(slower)))
+            sys.exit(1)
+
+    if args.max_latency and 'editing' in report:
+        latency = max(report['editing']['keystroke_ms'], report['editing']['newline_ms'])
+        if latency > args.max_latency:
+            print('editing latency {0:.2f}ms is more than {1}ms'.format(latency, args.max_latency))
+            sys.exit(1)
@@ -0,0 +1,113 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Build cache for incremental builds.
+#
+# For each lexicon row it keeps a hash of the row and the `word/flags` line
+# generated for it, so only changed or added rows are labelled again. It
+# also keeps the digests of the input and output files to skip builds with
+# unchanged inputs.
+
+import os
+import json
+import hashlib
+
+
+def file_digest(filename):
+    if not filename or not os.path.isfile(filename):
+        return None
+
+    h = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+def row_key(word, attrs):
+    row = word + ',' + ','.join(attrs)
+    return hashlib.blake2b(row.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class BuildCache:
+    def __init__(self, filename, fingerprint):
+        self.filename = filename
+        self.fingerprint = fingerprint
+        self.rows = {}
+        self.inputs = {}
+        self.outputs = {}
+        self.hits = 0
+        self.misses = 0
+
+
+    def load(self):
+        if not os.path.isfile(self.filename):
+            return
+
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except ValueError:
+            return
+
+        # the rows are valid only with the same rules and version
+        if data.get('fingerprint') != self.fingerprint:
+            return
+
+        self.rows = data.get('rows', {})
+        self.inputs = data.get('inputs', {})
+        self.outputs = data.get('outputs', {})
+
+
+    def save(self, rows, inputs, outputs):
+        self.rows = rows
+        self.inputs = inputs
+        self.outputs = outputs
+
+        tmp = self.filename + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fingerprint': self.fingerprint,
+                'inputs': inputs,
+                'outputs': outputs,
+                'rows': rows,
+            }, f, ensure_ascii=False, separators=(',', ':'))
+
+        os.replace(tmp, self.filename)
+
+
+    def up_to_date(self, inputs):
+        # same inputs and the outputs are not touched since the last build
+        if not self.outputs or self.inputs != inputs:
+            return False
+
+        return all(file_digest(name) == digest for name, digest in self.outputs.items())
+
+
+    def line(self, key):
+        line = self.rows.get(key)
+        if line is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return line
@@ -0,0 +1,279 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Pure python spell checker for Lilak dictionaries.
+# All the surface forms are expanded once, so `spell` is a hash lookup.
+# The word cleaning follows hunspell: ignored characters are removed,
+# trailing dots are dropped, numbers are accepted and words are broken
+# on dashes.
+
+import re
+
+from affixes import Affixes
+from wordlist import WordList, NOSUGGEST, COMPOUND_BEGIN, COMPOUND_END
+from suggest import SuggestIndex
+
+
+NUMBER = re.compile(r'^[0-9]+(?:[.,\-][0-9]+)*$')
+MAX_SUGGESTIONS = 15
+MAX_BREAKS = 10
+
+
+class Checker:
+    def __init__(self, entries, affixes):
+        self.affixes = affixes
+        self.forms = set()
+        self.nosuggest = set()
+        self.compound_begin = set()
+        self.compound_end = set()
+        self.neighbours = None
+        self.index = None
+
+        for entry in entries:
+            word, flags = affixes.parse_entry(entry)
+            if word:
+                self.add(word, flags)
+
+
+    @classmethod
+    def load(cls, dic_filename, aff_filename):
+        affixes = Affixes.load(aff_filename)
+
+        with open(dic_filename, 'r', encoding='utf-8') as f:
+            f.readline()  # number of entries
+            return cls((line.rstrip('\n') for line in f), affixes)
+
+
+    @classmethod
+    def open(cls, wordlist_filename, aff_filename, index_filename=None):
+        # use a prebuilt word list (see `Lilak.dump_wordlist`) instead of
+        # expanding the dictionary in memory, and optionally a suggestion
+        # index (see `Lilak.dump_suggest_index`)
+        checker = cls((), Affixes.load(aff_filename))
+        wordlist = WordList(wordlist_filename)
+        checker.forms = wordlist
+        checker.nosuggest = wordlist.subset(NOSUGGEST)
+        checker.compound_begin = wordlist.subset(COMPOUND_BEGIN)
+        checker.compound_end = wordlist.subset(COMPOUND_END)
+        if index_filename:
+            checker.index = SuggestIndex(index_filename, wordlist, checker.affixes)
+        return checker
+
+
+    def add(self, word, flags):
+        affixes = self.affixes
+        nosuggest = affixes.nosuggest in flags
+        begin = (affixes.compound_begin, affixes.compound_flag)
+        end = (affixes.compound_end, affixes.compound_flag)
+
+        for form, form_flags in affixes.expand(word, flags):
+            self.forms.add(form)
+
+            if nosuggest:
+                self.nosuggest.add(form)
+
+            if affixes.compound_forbid in form_flags:
+                continue
+
+            if any(f in form_flags for f in begin if f):
+                self.compound_begin.add(form)
+
+            if any(f in form_flags for f in end if f):
+                self.compound_end.add(form)
+
+
+    def iter_forms(self):
+        for form in self.forms:
+            flags = 0
+            if form in self.nosuggest:
+                flags |= NOSUGGEST
+            if form in self.compound_begin:
+                flags |= COMPOUND_BEGIN
+            if form in self.compound_end:
+                flags |= COMPOUND_END
+
+            yield form, flags
+
+
+    def spell(self, word):
+        word = self.affixes.clean(word).strip()
+        if self.spell_word(word):
+            return True
+
+        # default hunspell BREAK rules: '-', '^-', '-$'; like hunspell, words
+        # with more than MAX_BREAKS dashes are not broken
+        if '-' not in word or word.count('-') > MAX_BREAKS:
+            return False
+
+        word = word.strip('-')
+        if not word or self.spell_word(word):
+            return True
+
+        # ends[k] is the end of the k-th part, good[k] is True when the word
+        # up to it is made of correct parts; each part is checked once
+        ends = [i for i, c in enumerate(word) if c == '-'] + [len(word)]
+        good = []
+        for k, end in enumerate(ends):
+            good.append(any(
+                (j < 0 or good[j]) and self.spell_word(word[ends[j] + 1 if j >= 0 else 0:end])
+                for j in range(-1, k)))
+
+        return good[-1]
+
+
+    def spell_word(self, word):
+        # spell without breaking the word
+        stripped = word.rstrip('.')
+        if not stripped:
+            return True
+
+        if NUMBER.match(stripped):
+            return True
+
+        if self.check(stripped):
+            return True
+
+        return stripped != word and self.check(stripped + '.')
+
+
+    def check(self, word):
+        if word in self.forms:
+            return True
+
+        lower = word.lower()
+        if lower != word:
+            if lower in self.forms or lower.capitalize() in self.forms:
+                return True
+
+        return self.check_compound(word)
+
+
+    def check_compound(self, word):
+        if not self.compound_begin or not self.compound_end:
+            return False
+
+        size = self.affixes.compound_min
+        for i in range(size, len(word) - size + 1):
+            if word[:i] in self.compound_begin and word[i:] in self.compound_end:
+                return True
+
+        return False
+
+
+    def suggest(self, word, limit=MAX_SUGGESTIONS):
+        # Like hunspell: correct words one edit away from the word, trying
+        # REP, MAP and KEY replacements first and then the TRY characters.
+        word = self.affixes.clean(word).strip()
+
+        suggestions = []
+        seen = {word}
+        for candidate in self.edits(word):
+            if candidate in seen:
+                continue
+
+            seen.add(candidate)
+            if self.suggestable(candidate):
+                suggestions.append(candidate)
+                if len(suggestions) >= limit:
+                    return suggestions
+
+        if self.index is not None:
+            for candidate in self.index.suggest(word, limit=limit):
+                if candidate not in seen:
+                    suggestions.append(candidate)
+
+        return suggestions[:limit]
+
+
+    def suggestable(self, word):
+        # REP can split a word in two
+        if ' ' in word:
+            return all(self.suggestable(part) for part in word.split(' ') if part)
+
+        return word in self.forms and word not in self.nosuggest
+
+
+    def key_neighbours(self):
+        # built in a local and assigned when complete, so threads never see
+        # a partial table
+        if self.neighbours is None:
+            neighbours = {}
+            for row in self.affixes.key:
+                for i, c in enumerate(row):
+                    near = neighbours.setdefault(c, [])
+                    if i > 0:
+                        near.append(row[i - 1])
+                    if i < len(row) - 1:
+                        near.append(row[i + 1])
+
+            self.neighbours = neighbours
+
+        return self.neighbours
+
+
+    def rep_edits(self, word):
+        for wrong, right in self.affixes.rep:
+            i = word.find(wrong)
+            while i >= 0:
+                yield word[:i] + right + word[i + len(wrong):]
+                i = word.find(wrong, i + 1)
+
+
+    def edits(self, word):
+        # With a suggestion index only the REP replacements are tried here,
+        # the index finds the rest (already checked words).
+        if self.index is not None:
+            yield from self.rep_edits(word)
+            return
+
+        affixes = self.affixes
+        try_chars = affixes.try_chars or ''.join(affixes.key).replace('|', '')
+
+        yield from self.rep_edits(word)
+
+        for related in affixes.map:
+            for i, c in enumerate(word):
+                if c in related:
+                    for r in related:
+                        yield word[:i] + r + word[i + 1:]
+
+        neighbours = self.key_neighbours()
+        for i, c in enumerate(word):
+            for n in neighbours.get(c, ()):
+                yield word[:i] + n + word[i + 1:]
+
+        # extra character
+        for i in range(len(word)):
+            yield word[:i] + word[i + 1:]
+
+        # forgotten character
+        for i in range(len(word) + 1):
+            for c in try_chars:
+                yield word[:i] + c + word[i:]
+
+        # swapped characters
+        for i in range(len(word) - 1):
+            yield word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+        # bad character
+        for i in range(len(word)):
+            for c in try_chars:
+                yield word[:i] + c + word[i + 1:]
@@ -0,0 +1,208 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Semantic diff of two builds: the surface forms added and removed.
+#
+# Each build is expanded through its own affix file. The forms are written
+# to temporary files in sorted runs of RUN_SIZE lines and the runs are merged
+# with heapq.merge; then the sorted forms of the two builds are compared in
+# step. Neither expansion is kept in memory. The builds are expanded at the
+# same time, in two processes.
+#
+# A changed form is reported with the part-of-speech of its stem (from the
+# lexicon) and the affix classes that made it, and the changes are counted
+# per (part-of-speech, classes):
+#   +  noun_singular  pa.sg  بی‌کتاب‌ها  کتاب
+#
+# Run it from `src` folder:
+#   python3 diff.py old/fa-IR.dic old/fa-IR.aff ../build/fa-IR.dic ../build/fa-IR.aff
+
+import os
+import sys
+import heapq
+import shutil
+import argparse
+import tempfile
+import itertools
+import collections
+import multiprocessing
+
+from affixes import Affixes
+from cache import file_digest
+from verbs import VERB_CLASSES
+
+
+RUN_SIZE = 1 << 20  # lines of a sorted run
+UNKNOWN = '-'
+
+# a line of a sorted run: form, pos, classes, stem
+Form = collections.namedtuple('Form', 'form pos classes stem')
+
+
+def read_pos(filename):
+    # {word: part-of-speech} of the lexicon, 'noun_singular|adjective' for
+    # the words with more than one
+    from lilak import Lilak
+
+    pos = collections.defaultdict(set)
+    for word, entry in Lilak().stream_lexicon(filename):
+        pos[word].add(entry.pos)
+
+    return {word: '|'.join(sorted(tags)) for word, tags in pos.items()}
+
+
+def stem_pos(word, flags, pos):
+    tag = pos.get(word)
+    if tag:
+        return tag
+
+    return 'verb' if not flags.isdisjoint(VERB_CLASSES) else UNKNOWN
+
+
+def iter_forms(dic_filename, aff_filename, pos):
+    # yields the lines of the forms of a build, not sorted
+    affixes = Affixes.load(aff_filename)
+    with open(dic_filename, 'r', encoding='utf-8') as f:
+        f.readline()  # number of entries
+        for line in f:
+            word, flags = affixes.parse_entry(line.rstrip('\n'))
+            if not word:
+                continue
+
+            tag = '\t' + stem_pos(word, flags, pos) + '\t'
+            tail = '\t' + word + '\n'
+            for form, _, classes in affixes.derive(word, flags):
+                yield form + tag + ('.'.join(classes) or UNKNOWN) + tail
+
+
+def write_runs(lines, folder, run_size=RUN_SIZE):
+    # sorted runs of the lines, returns their filenames
+    runs = []
+    while True:
+        run = list(itertools.islice(lines, run_size))
+        if not run:
+            return runs
+
+        run.sort()
+        filename = os.path.join(folder, 'run{0}'.format(len(runs)))
+        with open(filename, 'w', encoding='utf-8', newline='') as f:
+            f.writelines(run)
+        runs.append(filename)
+
+
+def expand_build(args):
+    dic_filename, aff_filename, pos, folder, run_size = args
+    os.makedirs(folder, exist_ok=True)
+    return write_runs(iter_forms(dic_filename, aff_filename, pos), folder, run_size)
+
+
+def sorted_forms(runs):
+    # yields (form, line) of the merged runs, once per form; the first line
+    # of a form (the smallest part-of-speech and classes) stands for it
+    files = [open(filename, 'r', encoding='utf-8') for filename in runs]
+    try:
+        last = None
+        for line in heapq.merge(*files):
+            form = line[:line.index('\t')]
+            if form != last:
+                last = form
+                yield form, line
+    finally:
+        for f in files:
+            f.close()
+
+
+def compare(old, new):
+    # yields ('-', Form) and ('+', Form) of two sorted streams of
+    # `sorted_forms`
+    sentinel = (None, None)
+    a = next(old, sentinel)
+    b = next(new, sentinel)
+    while a is not sentinel or b is not sentinel:
+        if b is sentinel or (a is not sentinel and a[0] < b[0]):
+            yield '-', Form(*a[1].rstrip('\n').split('\t'))
+            a = next(old, sentinel)
+        elif a is sentinel or b[0] < a[0]:
+            yield '+', Form(*b[1].rstrip('\n').split('\t'))
+            b = next(new, sentinel)
+        else:
+            a = next(old, sentinel)
+            b = next(new, sentinel)
+
+
+def diff_builds(old, new, pos, stream=None, run_size=RUN_SIZE, jobs=2):
+    # old and new are (dic, aff) filenames; returns the counts of the changes
+    # {(sign, pos, classes): n} and writes each change to `stream`
+    if [file_digest(name) for name in old] == [file_digest(name) for name in new]:
+        return collections.Counter()
+
+    folder = tempfile.mkdtemp(prefix='lilak-diff-')
+    try:
+        tasks = [(dic, aff, pos, os.path.join(folder, name), run_size)
+                 for name, (dic, aff) in (('old', old), ('new', new))]
+        if jobs > 1:
+            with multiprocessing.Pool(2) as pool:
+                old_runs, new_runs = pool.map(expand_build, tasks)
+        else:
+            old_runs, new_runs = map(expand_build, tasks)
+
+        counts = collections.Counter()
+        for sign, form in compare(sorted_forms(old_runs), sorted_forms(new_runs)):
+            counts[(sign, form.pos, form.classes)] += 1
+            if stream:
+                stream.write('{0}\t{1}\t{2}\t{3}\t{4}\n'.format(sign, form.pos, form.classes, form.form, form.stem))
+
+        return counts
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('old_dic', help='dictionary of the old build')
+    parser.add_argument('old_aff', help='affix file of the old build')
+    parser.add_argument('new_dic', nargs='?', default='../build/fa-IR.dic', help='dictionary of the new build')
+    parser.add_argument('new_aff', nargs='?', default='../build/fa-IR.aff', help='affix file of the new build')
+    parser.add_argument('-l', '--lexicon', default='./data/lexicon', help='lexicon, for the part-of-speech of the stems')
+    parser.add_argument('-o', '--output', help='write every changed form to this file')
+    parser.add_argument('-j', '--jobs', type=int, default=2, help='1 to expand the builds one after the other')
+    parser.add_argument('--fail', action='store_true', help='exit with status 1 if any form changed')
+    args = parser.parse_args()
+
+    pos = read_pos(args.lexicon) if args.lexicon and os.path.isfile(args.lexicon) else {}
+
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else None
+    try:
+        counts = diff_builds((args.old_dic, args.old_aff), (args.new_dic, args.new_aff), pos,
+                             output, jobs=args.jobs)
+    finally:
+        if output:
+            output.close()
+
+    for (sign, tag, classes), n in sorted(counts.items(), key=lambda item: (item[0][0], -item[1], item[0])):
+        print('{0}\t{1}\t{2}\t{3}'.format(sign, n, tag, classes))
+
+    added = sum(n for (sign, _, _), n in counts.items() if sign == '+')
+    removed = sum(counts.values()) - added
+    print('added: {0}, removed: {1}'.format(added, removed))
+
+    if args.fail and counts:
+        sys.exit(1)
@@ -0,0 +1,111 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Streaming export of the lexicon entries (see `Lilak.iter_entries`).
+#
+# Each entry is written as soon as it is read, as a JSON line:
+#   {"word": "کتاب", "pos": "noun_singular", "flags": "pasasbsg...", ...}
+# or a tab separated line, in the order of the lexicon. Nothing is sorted
+# or kept in memory. With `shard`, the entries go to one file per first
+# letter, like tihu.ک.jsonl for tihu.jsonl.
+
+import os
+import json
+
+
+FORMATS = ('jsonl', 'tsv')
+COLUMNS = ('word', 'pos', 'flags', 'offensive', 'ends_with_vowel', 'ends_with_aah_uh', 'extra')
+
+
+def columns(record):
+    attrs = record.attrs
+    return (record.word, record.pos, record.flags, bool(attrs.offensive),
+            bool(attrs.ends_with_vowel), bool(attrs.ends_with_aah_uh), attrs.extra)
+
+
+def jsonl_line(record):
+    return json.dumps(dict(zip(COLUMNS, columns(record))), ensure_ascii=False) + '\n'
+
+
+def tsv_line(record):
+    values = columns(record)
+    return '\t'.join(str(int(v)) if isinstance(v, bool) else v for v in values) + '\n'
+
+
+class ShardedWriter:
+    # one file per first letter, opened on the first entry of the letter
+
+    def __init__(self, filename, header=None):
+        self.root, self.ext = os.path.splitext(filename)
+        self.header = header
+        self.files = {}
+
+
+    def write(self, word, line):
+        f = self.files.get(word[0])
+        if f is None:
+            f = open('{0}.{1}{2}'.format(self.root, word[0], self.ext), 'w', encoding='utf-8', newline='')
+            if self.header:
+                f.write(self.header)
+            self.files[word[0]] = f
+
+        f.write(line)
+
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+
+class Writer:
+    def __init__(self, filename, header=None):
+        self.file = open(filename, 'w', encoding='utf-8', newline='')
+        if header:
+            self.file.write(header)
+
+
+    def write(self, word, line):
+        self.file.write(line)
+
+
+    def close(self):
+        self.file.close()
+
+
+def export(records, filename, format='jsonl', shard=False):
+    # writes the records while they come, returns their number
+    if format not in FORMATS:
+        raise ValueError('unknown format: {0}'.format(format))
+
+    line = jsonl_line if format == 'jsonl' else tsv_line
+    header = '\t'.join(COLUMNS) + '\n' if format == 'tsv' else None
+    writer = ShardedWriter(filename, header) if shard else Writer(filename, header)
+
+    count = 0
+    try:
+        for record in records:
+            writer.write(record.word, line(record))
+            count += 1
+    finally:
+        writer.close()
+
+    return count
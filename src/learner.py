@@ -0,0 +1,214 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Flag inference for the words of the user dictionary.
+#
+# The words of `dic_users` (and of an optional corpus) are matched against
+# the affix classes: an observed word is a form of a user word if it is the
+# user word plus the ending (or beginning) of an affix class, like
+#   کتابخانه + ها -> کتابخانه‌ها
+# The endings are kept in a dict, so each observed word is matched with a few
+# lookups, one for each ending length. Then for each stem a small set of
+# flags covering its observed forms is picked (greedy set cover) and the
+# covered user words are removed from the dictionary.
+#
+# A flag needs `min_support` observed forms, or one if the last part of a
+# compound stem has the flag in the lexicon, like گو in پاسخ‌گو. And most of
+# the forms of a flag (MIN_COVERAGE) must be observed, so a flag doesn't add
+# words nobody wrote, like برمی‌خواستست; the added forms are returned by
+# `gained` for review.
+
+import collections
+
+from letters import ZWNJ
+
+
+MIN_SUPPORT = 2  # number of observed forms needed to assign a flag
+MIN_STEM = 2
+MIN_COVERAGE = 0.8  # share of the forms of a flag that must be observed
+
+
+class Learner:
+    def __init__(self, affixes, known=None, min_support=MIN_SUPPORT, skip=(), min_coverage=MIN_COVERAGE):
+        # known: flags of the lexicon words, {word: set(flags)}
+        # skip: classes that are never learned, like the verb classes
+        self.affixes = affixes
+        self.known = known or {}
+        self.min_support = min_support
+        self.min_coverage = min_coverage
+        self.words = set()
+        self.corpus = set()
+        self.endings = collections.defaultdict(list)
+        self.beginnings = collections.defaultdict(list)
+        self.order = list(affixes.prefixes) + list(affixes.suffixes)
+        skip = set(skip)
+
+        # the affixed part of each form of each class, with its strip
+        for flag, affix in affixes.suffixes.items():
+            if flag in skip:
+                continue
+            for rule in affix.rules:
+                self.endings[rule.append].append((flag, rule.strip))
+
+                # twofold suffixes
+                for outer_flag in rule.flags:
+                    outer = affixes.suffixes.get(outer_flag)
+                    for outer_rule in (outer.rules if outer else ()):
+                        if not outer_rule.strip:
+                            ending = rule.append + outer_rule.append
+                            self.endings[ending].append((flag, rule.strip))
+
+        for flag, affix in affixes.prefixes.items():
+            if flag in skip:
+                continue
+            for rule in affix.rules:
+                self.beginnings[rule.append].append((flag, rule.strip))
+
+        self.ending_sizes = sorted(set(len(e) for e in self.endings if e))
+        self.beginning_sizes = sorted(set(len(b) for b in self.beginnings if b))
+
+
+    def add_words(self, words):
+        self.words.update(words)
+
+
+    def add_corpus(self, words):
+        self.corpus.update(words)
+
+
+    def forms(self, stem, flag):
+        # the forms of the stem with one flag
+        affixes = self.affixes
+        if flag in affixes.prefixes:
+            forms = set()
+            for rule in affixes.prefixes[flag].rules:
+                form = affixes.apply_prefix(rule, stem)
+                if form is not None:
+                    forms.add(form)
+            return forms
+
+        return set(form for form, _, _ in affixes.suffixed(stem, [flag]))
+
+
+    def candidates(self, word):
+        # yields (stem, flag) for the stems the word can be a form of
+        size = len(word)
+        for n in self.ending_sizes:
+            if n >= size:
+                break
+            for flag, strip in self.endings.get(word[-n:], ()):
+                yield word[:-n] + strip, flag
+
+        for n in self.beginning_sizes:
+            if n >= size:
+                break
+            for flag, strip in self.beginnings.get(word[:n], ()):
+                yield strip + word[n:], flag
+
+
+    def evidence(self):
+        # {stem: {flag: observed forms}} for user stems, and the user words
+        # generated by the flags of a lexicon word
+        evidence = collections.defaultdict(lambda: collections.defaultdict(set))
+        redundant = set()
+        nosuggest = self.affixes.nosuggest
+
+        for word in self.words | self.corpus:
+            for stem, flag in self.candidates(word):
+                if len(stem) < MIN_STEM:
+                    continue
+
+                if stem in self.words:
+                    evidence[stem][flag].add(word)
+                elif word in self.words:
+                    flags = self.known.get(stem)
+                    # offensive words are not suggested, their forms are
+                    if flags and flag in flags and nosuggest not in flags:
+                        redundant.add((word, stem, flag))
+
+        redundant = set(word for word, stem, flag in redundant
+                        if word in self.forms(stem, flag))
+
+        return evidence, redundant
+
+
+    def cover(self, stem, observed):
+        # greedy set cover of the observed forms; flags generating fewer
+        # unobserved forms are preferred
+        head = self.known.get(stem.rsplit(ZWNJ, 1)[-1]) if ZWNJ in stem else None
+
+        generated = {}
+        for flag, forms in observed.items():
+            support = 1 if head and flag in head else self.min_support
+            if len(forms) < support:
+                continue
+            all_forms = self.forms(stem, flag)
+            forms = all_forms & forms
+            if len(forms) >= support and len(forms) >= self.min_coverage * len(all_forms):
+                generated[flag] = forms
+
+        uncovered = set().union(*generated.values()) if generated else set()
+        flags = []
+        while uncovered and generated:
+            flag = max(generated, key=lambda f: (len(generated[f] & uncovered), -len(self.forms(stem, f)), f))
+            gain = generated.pop(flag) & uncovered
+            if not gain:
+                break
+
+            flags.append(flag)
+            uncovered -= gain
+
+        return sorted(flags, key=self.order.index)
+
+
+    def learn(self):
+        # returns the flags of the stems, {stem: [flags]}, and the user words
+        # covered by them (or by the lexicon)
+        evidence, redundant = self.evidence()
+
+        stems = {}
+        for stem, observed in evidence.items():
+            flags = self.cover(stem, observed)
+            if flags:
+                stems[stem] = flags
+
+        covered = set()
+        for stem, flags in stems.items():
+            for flag in flags:
+                covered.update(self.forms(stem, flag) & self.words)
+
+        # a stem is never removed, even when it's a form of another stem
+        covered |= redundant
+        covered -= set(stems)
+
+        return stems, covered
+
+
+    def gained(self, stems):
+        # the forms of the learned flags that were not observed, {stem: forms}
+        observed = self.words | self.corpus
+        gained = {}
+        for stem, flags in stems.items():
+            forms = set().union(*(self.forms(stem, flag) for flag in flags)) - observed
+            if forms:
+                gained[stem] = sorted(forms)
+
+        return gained
@@ -0,0 +1,55 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+
+# -*- coding: utf-8 -*-
+
+# Persian letters used by lilak
+
+ZWNJ          = '\u200C'
+PERSIAN_HA    = '\u0647\u0627'
+PERSIAN_AAN   = '\u0627\u0646'
+PERSIAN_HE    = '\u0647'
+PERSIAN_YE    = '\u06CC'
+PERSIAN_WAW   = '\u0648'
+PERSIAN_ALEF  = '\u0627'
+PERSIAN_DAL   = '\u062F'
+PERSIAN_ZAL   = '\u0630'
+PERSIAN_RE    = '\u0631'
+PERSIAN_ZE    = '\u0632'
+PERSIAN_ZHE   = '\u0698'
+PERSIAN_SIN   = '\u0633'
+PERSIAN_SHIN  = '\u0634'
+PERSIAN_SAD   = '\u0635'
+PERSIAN_ZAD   = '\u0636'
+PERSIAN_TA    = '\u0637'
+PERSIAN_ZA    = '\u0638'
+PERSIAN_BE    = '\u0628'
+PERSIAN_PE    = '\u067E'
+PERSIAN_TE    = '\u062A'
+PERSIAN_SE    = '\u062B'
+PERSIAN_NON   = '\u0646'
+PERSIAN_HAMZE = '\u0621'
+PERSIAN_LAM   = '\u0644'
+PERSIAN_KAF   = '\u06A9'
+PERSIAN_GAF   = '\u06AF'
+ARABIC_TE     = '\u0629'
+
+PERSIAN_DETACHED = (PERSIAN_WAW, PERSIAN_ALEF, PERSIAN_DAL, PERSIAN_ZAL, \
+                    PERSIAN_RE, PERSIAN_ZE, PERSIAN_ZHE, PERSIAN_HAMZE)
@@ -30,45 +30,136 @@
 import os
 import sys
 import collections
-import operator
 import shutil
 import datetime
 import argparse
+import functools
+import array
+import json
+import hashlib
+import heapq
+import logging
+import cProfile
+import multiprocessing
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from letters import *
+from affixes import Affixes
+from rules import Rules
+from checker import Checker
+from wordlist import WordList, write_wordlist
+from suggest import write_index, MAX_DISTANCE
+from cache import BuildCache, file_digest, row_key
+from tokenizer import NORMALIZED_CHARS, normalize_word, tokenize
+from optimize import optimize
+from learner import Learner
+from verbs import Paradigms, read_verbs, VERB_CLASSES
+from metrics import Metrics, stage, log
+from analyzer import Analyzer
+from export import export, FORMATS
+from package import build_extensions
 
 VERSIAN = '3.3'
-DEBUG = 1  # set to 1 to generate a debug output file
-
-ZWNJ          = '\u200C'
-PERSIAN_HA    = '\u0647\u0627'
-PERSIAN_AAN   = '\u0627\u0646'
-PERSIAN_HE    = '\u0647'
-PERSIAN_YE    = '\u06CC'
-PERSIAN_WAW   = '\u0648'
-PERSIAN_ALEF  = '\u0627'
-PERSIAN_DAL   = '\u062F'
-PERSIAN_ZAL   = '\u0630'
-PERSIAN_RE    = '\u0631'
-PERSIAN_ZE    = '\u0632'
-PERSIAN_ZHE   = '\u0698'
-PERSIAN_SIN   = '\u0633'
-PERSIAN_SHIN  = '\u0634'
-PERSIAN_SAD   = '\u0635'
-PERSIAN_ZAD   = '\u0636'
-PERSIAN_TA    = '\u0637'
-PERSIAN_ZA    = '\u0638'
-PERSIAN_BE    = '\u0628'
-PERSIAN_PE    = '\u067E'
-PERSIAN_TE    = '\u062A'
-PERSIAN_SE    = '\u062B'
-PERSIAN_NON   = '\u0646'
-PERSIAN_HAMZE = '\u0621'
-PERSIAN_LAM   = '\u0644'
-PERSIAN_KAF   = '\u06A9'
-PERSIAN_GAF   = '\u06AF'
-ARABIC_TE     = '\u0629'
-
-PERSIAN_DETACHED = (PERSIAN_WAW, PERSIAN_ALEF, PERSIAN_DAL, PERSIAN_ZAL, \
-                    PERSIAN_RE, PERSIAN_ZE, PERSIAN_ZHE, PERSIAN_HAMZE)
+
+# a lexicon row, strings are interned
+Entry = collections.namedtuple('Entry', 'pos offensive ends_with_vowel ends_with_aah_uh extra')
+
+# an entry of `iter_entries`, flags include the offensive flag
+Record = collections.namedtuple('Record', 'word pos flags attrs')
+
+
+# http://www.persianacademy.ir/fa/pishvand.aspx
+# هرگاه کلمه پردندانه (بیش­ از سه دندانه) شود و یا به «ط» و «ظ» ختم شود.
+# نویسه‌های «ورزژدذط ظ ک گ ا لءة» و فاصلهٔ مجازی که دندانه‌ها را جدا می‌کنند نباید قبل از آنها در محاسبه بیاید.
+# مثلاً «اسباب‌بازیها» نباید دندانهٔ «اسباب‌باز» محاسبه شود
+# در نتیجه کلمهٔ «اسباب‌بازیها» را هم باید قبول کند.
+DANDANE_SEPARATORS = (PERSIAN_ALEF, PERSIAN_DAL, PERSIAN_TA, PERSIAN_ZA, PERSIAN_LAM, ZWNJ,
+                      PERSIAN_WAW, PERSIAN_ZAL, PERSIAN_RE, PERSIAN_ZE, PERSIAN_ZHE,
+                      PERSIAN_HAMZE, PERSIAN_KAF, PERSIAN_GAF, ARABIC_TE)
+
+# letters with teeth are marked, then the marks are counted:
+# '\x01' one tooth, '\x03' three teeth, '\x02' one tooth if it is not the last letter
+DANDANE_TABLE = str.maketrans({
+    PERSIAN_BE:   '\x01',
+    PERSIAN_PE:   '\x01',
+    PERSIAN_TE:   '\x01',
+    PERSIAN_SE:   '\x01',
+    PERSIAN_SAD:  '\x01',
+    PERSIAN_ZAD:  '\x01',
+    PERSIAN_SIN:  '\x03',
+    PERSIAN_SHIN: '\x03',
+    PERSIAN_YE:   '\x02',
+    PERSIAN_NON:  '\x02',
+})
+
+
+def count_dandane(word):
+    # only the part after the separators counts. The separators are checked
+    # in order, each one keeps the text between its first and second occurrence
+    for separator in DANDANE_SEPARATORS:
+        if separator in word:
+            word = word.split(separator, 2)[1]
+
+    # no ZWNJ is left here, so ye and non have a tooth unless they are last
+    marks = word.translate(DANDANE_TABLE)
+    return marks.count('\x01') + 3 * marks.count('\x03') + marks.count('\x02', 0, len(marks) - 1)
+
+
+# the same stems come again and again (duplicated rows, user words, checks)
+@functools.lru_cache(maxsize=1 << 17)
+def is_kam_dandane(word):
+    return count_dandane(word) < 5
+
+
+def kam_dandane_many(words):
+    # kam_dandane of a column of words, as a numpy array if numpy is installed
+    if numpy is not None:
+        return numpy.fromiter(map(is_kam_dandane, words), dtype=bool)
+
+    return array.array('b', map(is_kam_dandane, words))
+
+
+def letter_frequency(words):
+    # letters of the words, without flags
+    letters = collections.Counter()
+    for word in words:
+        letters.update(word.partition('/')[0])
+
+    return letters
+
+
+def branch(rule):
+    # name of a rule branch, like noun_singular:he:vowel
+    name = rule.pos + ':' + rule.letter
+    if rule.ends_with_vowel is not None:
+        name += ':vowel' if rule.ends_with_vowel else ':consonant'
+    if rule.ends_with_aah_uh is not None:
+        name += ':aah_uh' if rule.ends_with_aah_uh else ':not_aah_uh'
+
+    return name
+
+
+# parallel build: each worker process has its own Lilak object
+worker = None
+
+
+def init_worker(mode, rules, detailed):
+    global worker
+    worker = Lilak(mode, rules, detailed)
+
+
+def pars_shard(shard):
+    worker.metrics = Metrics(worker.metrics.detailed)
+    words = set()
+    for word, entries in shard:
+        for attrs in entries:
+            words.add(worker.dic_entry(word, attrs))
+
+    return words, letter_frequency(words), worker.metrics.counters
 
 
 def remove_file(filename):
@@ -77,112 +168,225 @@ def remove_file(filename):
 
 
 def debug(message):
-    try:
-        if DEBUG:
-            print(message)
-    except:
-        pass
+    log.info(message)
 
 
 
 
 class Lilak:
-    def __init__(self, mode = 0):
+    def __init__(self, mode = 0, rules = None, detailed = False):
         self.mode = mode
+        self.rules = rules or Rules()
         self.dictionary = {}
         self.words = set()
+        self.letters = None  # letter frequency of words, if it is already known
+        # rules are counted by rule, named by branch in the report
+        self.metrics = Metrics(detailed)
+        self.metrics.names['rule'] = branch
 
 
     def is_kam_dandane(self, word):
         if self.mode == 'tihu':
             return True
 
-        dandane = 0
-        # http://www.persianacademy.ir/fa/pishvand.aspx
-        # هرگاه کلمه پردندانه (بیش­ از سه دندانه) شود و یا به «ط» و «ظ» ختم شود.
-        # نویسه‌های «ورزژدذط ظ ک گ ا لءة» و فاصلهٔ مجازی که دندانه‌ها را جدا می‌کنند نباید قبل از آنها در محاسبه بیاید.
-        # مثلاً «اسباب‌بازیها» نباید دندانهٔ «اسباب‌باز» محاسبه شود
-        # در نتیجه کلمهٔ «اسباب‌بازیها» را هم باید قبول کند.
-        for SeperatCharacter in [PERSIAN_ALEF, PERSIAN_DAL, PERSIAN_TA, PERSIAN_ZA, PERSIAN_LAM, ZWNJ,
-                                 PERSIAN_WAW, PERSIAN_DAL, PERSIAN_ZAL, PERSIAN_RE, PERSIAN_ZE, PERSIAN_ZHE,
-                                 PERSIAN_HAMZE, PERSIAN_KAF, PERSIAN_GAF, ARABIC_TE]:
-            if  SeperatCharacter in word:
-                word=word.split(SeperatCharacter)[1]
+        return is_kam_dandane(word)
+
+
+    def wrong_entry(self, line):
+        # counts a row that is not word,pos,offensive,vowel,aah_uh[,extra]
+        word = line.partition(',')[0].strip()
+        if not word:
+            reason = 'empty'
+        elif ' ' in word:
+            reason = 'space'
+        else:
+            reason = 'attributes'
+
+        self.metrics.count('wrong_entry', reason)
+        log.debug('Wrong entry: %s.', line)
+
+
+    def parse_entry(self, attrs):
+        # Entry of the attributes of a row, like noun_singular,,1, or None.
+        # The lexicon only has a few dozen different attributes, so the
+        # entries are shared by the rows, see `read_lexicon`
+        tags = attrs.split(',')
+        if len(tags) < 4:
+            return None
+
+        intern = sys.intern
+        return Entry(intern(tags[0]), intern(tags[1]), intern(tags[2]), intern(tags[3]),
+                     intern(tags[4]) if len(tags) > 4 else '')
+
+
+    def stream_lexicon(self, filename):
+        # yields (word, entry) for each row of the lexicon, one line at a
+        # time; `-` reads the standard input
+        if filename != '-' and not os.path.isfile(filename):
+            log.warning('file does not exist: %s', filename)
+            return
+
+        parsed = {}  # attributes -> Entry
+        f = sys.stdin if filename == '-' else open(filename, 'r', encoding='utf-8')
+        with f:
+            for line in f:
+                if line.startswith('##'):
+                    continue
 
-        for i, c in enumerate(word):
+                # attributes: (pos, offensive, ends_with_vowel, ends_with_aah_uh)
+                line = line.rstrip('\n')
+                word, _, attrs = line.partition(',')
+                word = word.strip()
+                entry = parsed.get(attrs)
+                if entry is None:
+                    entry = parsed[attrs] = self.parse_entry(attrs)
+
+                if entry is None or not word or ' ' in word:
+                    self.wrong_entry(line)
+                    continue
 
-            if c == PERSIAN_BE  or \
-               c == PERSIAN_PE  or \
-               c == PERSIAN_TE  or \
-               c == PERSIAN_SE  or \
-               c == PERSIAN_SAD or \
-               c == PERSIAN_ZAD:
-                dandane = dandane + 1
+                if word.startswith('u'):
+                    word = chr(int(word[1:]))
 
-            if c == PERSIAN_SIN  or \
-               c == PERSIAN_SHIN:
-                dandane = dandane + 3
+                yield word, entry
 
-            if c == PERSIAN_YE  or \
-               c == PERSIAN_NON:
-                if(i+1 < len(word)):
-                    n = word[i+1]
+                # other spellings, like اُسامه, are normalized too
+                if NORMALIZED_CHARS.search(word):
+                    yield normalize_word(word), entry
 
-                    if n != ZWNJ:
-                        dandane = dandane + 1
 
-        return (dandane < 5)
+    def add_variant(self, word, entry):
+        # a row of another spelling, like اُسامه or فیوزِ, is kept as it is
+        # written and normalized (اسامه، فیوز); the rows of the normalized
+        # word that are already there are logged, not merged
+        normalized = normalize_word(word)
+        entries = self.dictionary.setdefault(normalized, {})
+        if entry in entries:
+            self.metrics.count('normalized', 'collision')
+            log.debug('%s,%s is also written %s.', normalized, ','.join(entry[:4]), word)
+        else:
+            entries[entry] = None
+            self.metrics.count('normalized', 'words')
 
 
+    @stage
     def read_lexicon(self, filename):
+        # the rows are parsed right here, not by stream_lexicon: a generator
+        # and a tuple for each of the ~94k rows cost more than the reading.
+        # Each line is split once, at its first comma, and the rows with the
+        # same attributes share their Entry
         debug('read lexicon')
 
         if not os.path.isfile(filename):
-            debug('file does not exist: %s' % filename)
+            log.warning('file does not exist: %s', filename)
             return
 
+        count = self.metrics.count
+        dictionary = self.dictionary
+        detailed = self.metrics.detailed
+        parsed = {}  # attributes -> Entry
         with open(filename, 'r', encoding='utf-8') as f:
-            for line in f.readlines():
+            for line in f:
                 if line.startswith('##'):
                     continue
 
-                tags = line[:-1].split(',')  # remove line breaks, split it
-
-                # attributes: (pos, offensive, ends_with_vowel, ends_with_aah_uh)
-                word = tags[0].strip()
-                attrs = tags[1:]
+                line = line.rstrip('\n')
+                word, _, attrs = line.partition(',')
+                word = word.strip()
+                entry = parsed.get(attrs)
+                if entry is None:
+                    entry = parsed[attrs] = self.parse_entry(attrs)
 
-                if not word:
-                    debug('Wrong entry: {0}.'.format(line[:-1]))
-                    continue
-
-                if ' ' in word:
-                    debug('Wrong entry: {0}.'.format(line[:-1]))
+                if entry is None or not word or ' ' in word:
+                    self.wrong_entry(line)
                     continue
 
                 if word.startswith('u'):
                     word = chr(int(word[1:]))
 
-                if word not in self.dictionary:
-                    self.dictionary[word] = []
-
-                if attrs not in self.dictionary[word]:
-                    self.dictionary[word].append(attrs)
+                # entries of a word are kept as keys of a dict (an ordered set)
+                entries = dictionary.get(word)
+                if entries is None:
+                    dictionary[word] = {entry: None}
+                elif entry not in entries:
+                    entries[entry] = None
                 else:
-                    debug('{0} is duplicated.'.format(line[:-1]))
+                    count('duplicated', entry.pos)
+                    log.debug('%s,%s is duplicated.', word, ','.join(entry[:4]))
+                    continue
 
+                if detailed:
+                    count('pos', entry.pos)
 
-    def pars_user_dic(self, filename):
-        debug('pars user dic')
+                if NORMALIZED_CHARS.search(word):
+                    self.add_variant(word, entry)
+
+
+    @stage
+    def pars_verbs(self, filename='./data/verbs.htm', affix_filename='./data/affixes'):
+        debug('pars verbs')
 
         if not os.path.isfile(filename):
-            debug('file does not exist: %s' % filename)
+            log.warning('file does not exist: %s', filename)
+            return
+
+        # verb rows of the lexicon, {word: offensive}
+        rows = {}
+        for word, entries in self.dictionary.items():
+            for attrs in entries:
+                if attrs.pos.startswith('verb') and not attrs.extra:
+                    rows[word] = rows.get(word, False) or bool(attrs.offensive)
+
+        paradigms = Paradigms(Affixes.load(affix_filename), rows)
+        lines, covered = paradigms.build(read_verbs(filename))
+        self.metrics.count('verbs', 'stems', len(lines))
+        self.metrics.count('verbs', 'covered_rows', len(covered))
+
+        # the covered rows are replaced by the stems
+        for word in covered:
+            entries = self.dictionary[word]
+            for attrs in list(entries):
+                if attrs.pos.startswith('verb') and not attrs.extra:
+                    del entries[attrs]
+            if not entries:
+                del self.dictionary[word]
+
+        for line in lines:
+            if self.letters is not None and line not in self.words:
+                self.letters.update(line.partition('/')[0])
+
+            self.words.add(line)
+
+
+    def iter_entries(self, filename):
+        # yields a Record for each row of the lexicon while it is read, in
+        # one pass (`-` reads the standard input). Duplicated rows are
+        # skipped wherever they are in the file: only a 64 bit hash of each
+        # row is kept, not the row
+        seen = set()
+        count = self.metrics.count
+        detailed = self.metrics.detailed
+        for word, attrs in self.stream_lexicon(filename):
+            key = hash((word, attrs))
+            if key in seen:
+                count('duplicated', attrs.pos)
+                log.debug('%s,%s is duplicated.', word, ','.join(attrs[:4]))
+                continue
+
+            seen.add(key)
+            if detailed:
+                count('pos', attrs.pos)
+            yield Record(word, attrs.pos, self.entry_flags(word, attrs), attrs)
+
+
+    def stream_user_dic(self, filename):
+        if not os.path.isfile(filename):
+            log.warning('file does not exist: %s', filename)
             return
 
-        # import user dictionary
         with open(filename, 'r', encoding='utf-8') as f:
-            for line in f.readlines():
-                word = line[:-1].strip()
+            for line in f:
+                word = normalize_word(line.strip())
 
                 if word.startswith('#'):
                     continue
@@ -190,26 +394,76 @@ class Lilak:
                 if not word:
                     continue
 
-                if word not in self.dictionary:
-                    #debug(word)
-                    self.words.add(word)
+                yield word
+
+
+    @stage
+    def pars_user_dic(self, filename):
+        debug('pars user dic')
+
+        # import user dictionary
+        for word in self.stream_user_dic(filename):
+            if word not in self.dictionary:
+                self.metrics.count('user_dic', 'words')
+                if self.letters is not None and word not in self.words:
+                    self.letters.update(word)
+
+                self.words.add(word)
+
+
+    @stage
+    def learn_user_dic(self, filename, corpus_filename=None, affix_filename='./data/affixes'):
+        debug('learn user dic')
+
+        affixes = Affixes.load(affix_filename)
+
+        # flags of the lexicon words
+        known = collections.defaultdict(set)
+        for line in self.words:
+            word, _, flags = line.partition('/')
+            known[word].update(affixes.split_flags(flags))
+
+        learner = Learner(affixes, known, skip=VERB_CLASSES)
+        learner.add_words(word for word in self.stream_user_dic(filename)
+                          if word not in self.dictionary)
+
+        if corpus_filename:
+            with open(corpus_filename, 'r', encoding='utf-8') as f:
+                learner.add_corpus(word for word, _ in tokenize(f))
+
+        stems, covered = learner.learn()
+        self.metrics.count('user_dic', 'learned_stems', len(stems))
+        self.metrics.count('user_dic', 'covered_words', len(covered))
+
+        # the words the learned flags add, to review
+        for stem, forms in sorted(learner.gained(stems).items()):
+            self.metrics.count('user_dic', 'gained_forms', len(forms))
+            log.info('%s/%s adds: %s', stem, ''.join(stems[stem]), ' '.join(forms))
+
+        for word in learner.words:
+            if word in covered:
+                continue
+
+            if word in stems:
+                word = word + '/' + ''.join(stems[word])
+
+            if self.letters is not None and word not in self.words:
+                self.letters.update(word.partition('/')[0])
 
+            self.words.add(word)
 
+
+    @stage
     def dump_affixes(self, filename):
         debug('dump affixes')
 
         # letter frequency
-        letters = collections.defaultdict(int)
-        for word in self.words:
-            for letter in word:
-                if letter == '/':
-                    break
-
-                letters[letter] += 1
+        letters = self.letters
+        if letters is None:
+            letters = letter_frequency(self.words)
 
-        # sorted tuples
-        letters_s = sorted(letters.items(), key=operator.itemgetter(1))
-        letters_s.reverse()
+        # sorted tuples, most frequent first
+        letters_s = sorted(letters.items(), key=lambda item: (-item[1], item[0]))
 
         affix = ''
         with open('./data/affixes', 'r', encoding='utf-8') as f:
@@ -224,9 +478,11 @@ class Lilak:
             f.write(affix.format(VERSIAN, datetime.datetime.now().strftime("%Y-%m-%d"), frequency))
 
         if not os.path.isfile(filename):
-            debug('file does not exist: %s' % filename)
+            log.warning('file does not exist: %s', filename)
             return
 
+
+    @stage
     def dump_dictionary(self, filename):
         debug('dump dictionary')
 
@@ -240,490 +496,221 @@ class Lilak:
                 f.write(word + '\n')
 
 
-    def pars_main_dic(self):
-        debug('pars main dic')
+    @stage
+    def dump_extensions(self, dic_filename, aff_filename, outdir):
+        debug('dump extensions')
 
-        for key, value in self.dictionary.items():
-            for attrs in value:
-                word = key
-                pos = attrs[0]
-                offensive = attrs[1]
-                ends_with_vowel = attrs[2]
-                ends_with_aah_uh = attrs[3]
-                label = ''
-                kam_dandane = self.is_kam_dandane(word)
-
-        ### Verb ########################################################################################
-                if pos.startswith('verb') :
-                    label += ''
-
-
-        ### Noun ########################################################################################
-                elif pos == 'noun_singular':
-
-                    label += 'pa'   # بی‌انگیزه، بی‌حوصله، بی‌خانه
-
-                    if word.endswith(PERSIAN_HE):
-                        if ends_with_aah_uh:
-                            label += 'sa'   # نگاهم، نگاهت، نگاهش، نگاهمان، نگاهتان، نگاهشان
-                                            # کوهم، کوهت، کوهش، کوهمان، کوهتان، کوهشان
-                            label += 'sr'   # نگاهم، نگاهی، نگاهیم، نگاهید، نگاهند
-                                            # کوهم، کوهی، کوهیم، کوهید، کوهند
-                            label += 'sg'   # نگاه‌ها، کوه‌ها
-                                            # نگاه‌های، کوه‌های
-                                            # نگاه‌هایی، کوه‌هایی
-                            label += 'sh'   # نگاه‌هایم، نگاه‌هایت، نگاه‌هایش، نگاه‌هایمان، نگاه‌هایتان، نگاه‌هایشان
-                                            # کوه‌هایم، کوه‌هایت، کوه‌هایش، کوه‌هایمان، کوه‌هایتان، کوه‌هایشان
-                            label += 'si'   # نگاه‌هاست، کوه‌هاست
-                            label += 'sl'   # نگاهی، کوهی
-                            if kam_dandane:
-                                label += 'sd'   # نگاهها، کوهها
-                                                # نگاههای، کوههای
-                                                # نگاههایی، کوههایی
-                                label += 'se'   # نگاههایم، نگاههایت، نگاههایش، نگاههایمان، نگاههایتان، نگاههایشان
-                                label += 'sf'   # کوههاست
-
-                        elif  ends_with_vowel:
-                            label += 'sc'   # خانه‌ام، خانه‌ات، خانه‌اش، خانه‌مان، خانه‌تان، خانه‌شان
-                            label += 'sp'   # خانه‌ام، خانه‌ای، خانه‌ایم، خانه‌اید، خانه‌اند
-                            label += 'sg'   # خانه‌ها
-                                            # خانه‌های
-                                            # خانه‌هایی
-                            label += 'sh'   # خانه‌هایم، خانه‌هایت، خانه‌هایش، خانه‌هایمان، خانه‌هایتان، خانه‌هایشان
-                            label += 'si'   # خانه‌هاست
-                            label += 'sm'   # خانه‌ای
-                            label += 'sk'   # خانه‌ی، خانهٔ
-                        else:
-                            label += 'sc'   # روبه‌ام، روبه‌ات، روبه‌اش، روبه‌مان، روبه‌تان، روبه‌شان
-                            label += 'sp'   # روبه‌ام، روبه‌ای، روبه‌ایم، روبه‌اید، روبه‌اند
-                            label += 'sg'   # روبه‌ها
-                                            # روبه‌های
-                                            # روبه‌هایی
-                            label += 'sh'   # روبه‌هایم، روبه‌هایت، روبه‌هایش، روبه‌هایمان، روبه‌هایتان، روبه‌هایشان
-                            label += 'si'   # روبه‌هاست
-                            label += 'sl'   # روبهی
-
-                    elif word.endswith(PERSIAN_WAW):
-                        if ends_with_vowel:
-                            label += 'sb'   # عمویم، عمویت، عمویش، عمویمان، عمویتان، عمویشان
-                            label += 'sa'   # عموم، عموت، عموش، عمومان، عموتان، عموشان
-                            label += 'sq'   # عمویم، عمویی، عموست، عموییم، عمویید، عمویند
-                            label += 'sd'   # عموها
-                                            # عموهای
-                                            # عموهایی
-                            label += 'se'   # عموهایم، عموهایت، عموهایش، عموهایمان، عموهایتان، عموهایشان
-                            label += 'sf'   # عموهاست
-                            label += 'sv'   # عموی
-                            label += 'sn'   # عمویی
-                        else:
-                            label += 'sa'   # آرشیوم، آرشیوت، آرشیوش، آرشیومان، آرشیوتان، آرشیوشان
-                            label += 'sr'   # آرشیوم، آرشیوی، آرشیویم، آرشیوید، آرشیوند
-                            label += 'sd'   # آرشیوها
-                                            # آرشیوهای
-                                            # آرشیوهایی
-                            label += 'se'   # آرشیوهایم، آرشیوهایت، آرشیوهایش، آرشیوهایمان، آرشیوهایتان، آرشیوهایشان
-                            label += 'sf'   # آرشیوهاست
-                            label += 'sl'   # آرشیوی
-
-                    elif word.endswith(PERSIAN_YE):
-                        label += 'sc'   # کشتی‌ام، کشتی‌ات، کشتی‌اش، کشتی‌مان، کشتی‌تان، کشتی‌شان
-                        label += 'sp'   # کشتی‌ام، کشتی‌ای، کشتی‌ایم، کشتی‌اید، کشتی‌اند
-                        label += 'sg'   # کشتی‌ها
-                                        # کشتی‌های
-                                        # کشتی‌هایی
-                        label += 'sh'   # کشتی‌هایم، کشتی‌هایت، کشتی‌هایش، کشتی‌هایمان، کشتی‌هایتان، کشتی‌هایشان
-                        label += 'si'   # کشتی‌هاست
-                        label += 'sm'   # کشتی‌ای
-                        label += 'sj'   # شکارچیان، شکارچیانی
-                        if kam_dandane:
-                            label += 'sd'   # بازیها
-                                            # بازیهای
-                                            # بازیهایی
-                            label += 'se'   # بازیهایم، بازیهایت، بازیهایش، بازیهایمان، بازیهایتان، بازیهایشان
-                            label += 'sf'   # بازیهاست
-
-                    elif word.endswith(PERSIAN_ALEF):
-                        label += 'sb'   # پایم، پایت، پایش، پایمان، پایتان، پایشان
-                        label += 'sq'   # پایم، پایی، پاست، پاییم، پایید، پایند
-                        label += 'sd'   # پاها
-                                        # پاهای
-                                        # پاهایی
-                        label += 'se'   # پاهایم، پاهایت، پاهایش، پاهایمان، پاهایتان، پاهایشان
-                        label += 'sf'   # پاهاست
-                        label += 'sv'   # پای
-                        label += 'sn'   # پایی
-
-                    elif word.endswith(PERSIAN_DETACHED):
-                        label += 'sa'   # برادرم، برادرت، برادرش، برادرمان، برادرتان، برادرشان
-                        label += 'so'   # برادرم، برادری، برادرست، برادریم، برادرید، برادرند
-                        label += 'sd'   # برادرها
-                                        # برادرهای
-                                        # برادرهایی
-                        label += 'se'   # برادرهایم، برادرهایت، برادرهایش، برادرهایمان، برادرهایتان، برادرهایشان
-                        label += 'sf'   # برادرهاست
-                        label += 'sl'   # برادری
-                        label += 'sj'   # برادران، برادرانی
-
-                    elif word.endswith(PERSIAN_TA) or \
-                         word.endswith(PERSIAN_ZA):
-                        label += 'sa'   # خطم، خطت، خطش، خطمان، خطتان، خطشان
-                        label += 'so'   # خطم، خطی، خطست، خطیم، خطید، خطند
-                        label += 'sg'   # خط‌ها
-                                        # خط‌های
-                                        # خط‌هایی
-                        label += 'sh'   # خط‌هایم، خط‌هایت، خط‌هایش، خط‌هایمان، خط‌هایتان، خط‌هایشان
-                        label += 'si'   # خط‌هاست
-                        label += 'sl'   # خطی
-                        label += 'sj'   # خیاطان، خیاطانی
-
-                    else:
-                        label += 'sa'   # کتابم، کتابت، کتابش، کتابمان، کتابتان، کتابشان
-                        label += 'so'   # کتابم، کتابی، کتابست، کتابیم، کتابید، کتابند
-                        label += 'sg'   # کتاب‌ها
-                                        # کتاب‌های
-                                        # کتاب‌هایی
-                        label += 'sh'   # کتاب‌هایم، کتاب‌هایت، کتاب‌هایش، کتاب‌هایمان، کتاب‌هایتان، کتاب‌هایشان
-                        label += 'si'   # کتاب‌هاست
-                        label += 'sl'   # کتابی
-                        label += 'sj'   # صاحبان، صاحبانی
-                        if kam_dandane:
-                            label += 'sd'   # کتابها
-                                            # کتابهای
-                                            # کتابهایی
-                            label += 'se'   # کتابهایم، کتابهایت، کتابهایش، کتابهایمان، کتابهایتان، کتابهایشان
-                            label += 'sf'   # کتابهاست
-
-                elif pos == 'noun_plural':
-                    if word.endswith(PERSIAN_HE):
-                        if ends_with_aah_uh:
-                            label += ''     # وجوه
-                        elif  ends_with_vowel:
-                            label += 'sc'   # فلاسفه‌ام، فلاسفه‌ات، فلاسفه‌اش، فلاسفه‌مان، فلاسفه‌تان، فلاسفه‌شان
-                            label += 'sp'   # فلاسفه‌ام، فلاسفه‌ای، فلاسفه‌ایم، فلاسفه‌اید، فلاسفه‌اند
-                            label += 'sk'   # فلاسفه‌ی، فلاسفهٔ
-                            label += 'sm'   # فلاسفه‌ای
-                        else:
-                            label += ''     # اشربه
-
-                    elif word.endswith(PERSIAN_YE):
-                        label += 'sc'   # فتاوی‌ام، فتاوی‌ات، فتاوی‌اش، فتاوی‌مان، فتاوی‌تان، فتاوی‌شان
-                        label += 'sp'   # فتاوی‌ام، فتاوی‌ای، فتاوی‌ایم، فتاوی‌اید، فتاوی‌اند
-                        label += 'sm'   # فتاوی‌ای
-
-                    elif word.endswith(PERSIAN_WAW):
-                        debug('unpredicted case for: ' + word + ':' + pos)
-                        label += ''
-
-                    elif word.endswith(PERSIAN_ALEF):
-                        label += 'sb'   # هدایایم، هدایایت، هدایایش، هدایایمان، هدایایتان، هدایایشان
-                        label += 'sq'   # هدایایم، هدایایی، هدایاست، هدایاییم، هدایایید، هدایایند
-                        label += 'sv'   # هدایای
-                        label += 'sn'   # هدایایی
-
-                    elif word.endswith(PERSIAN_TA) or \
-                         word.endswith(PERSIAN_ZA):
-                        label += 'sa'   # اقساطم، اقساطت، اقساطش، اقساطمان، اقساطتان، اقساطشان
-                        label += 'so'   # اقساطم، اقساطی، اقساطست، اقساطیم، اقساطید، اقساطند
-                        label += 'sl'   # اقساطی
-
-                    elif word.endswith(PERSIAN_DETACHED):
-                        label += 'sa'   # آثارم، آثارت، آثارش، آثارمان، آثارتان، آثارشان
-                        label += 'so'   # آثارم، آثاری، آثارست، آثاریم، آثارید، آثارند
-                        label += 'sl'   # آثاری
-
-                    else:
-                        label += 'sa'   # احزابم، احزابت، احزابش، احزابمان، احزابتان، احزابشان
-                        label += 'so'   # احزابم، احزابی، احزابست، احزابیم، احزابید، احزابند
-                        label += 'sl'   # احزابی
-
-        ### Adjective ########################################################################################
-                elif pos == 'adjective':
-                    if word.endswith(PERSIAN_HE):
-                        if ends_with_aah_uh:
-                            label += 'sa'   # کوتاهم، کوتاهت، کوتاهش، کوتاهمان، کوتاهتان، کوتاهشان
-                                            # باشکوهم، باشکوهت، باشکوهش، باشکوهمان، باشکوهتان، باشکوهشان
-                            label += 'sr'   # کوتاهم، کوتاهی، کوتاهیم، کوتاهید، کوتاهند
-                                            # باشکوهم، باشکوهی، باشکوهیم، باشکوهید، باشکوهند
-                            label += 'sl'   # کوتاهی، باشکوهی
-                            label += 'sg'   # کوتاه‌ها، باشکوه‌ها
-                                            # کوتاه‌های، باشکوه‌های
-                                            # کوتاه‌هایی، باشکوه‌هایی
-                            label += 'si'   # کوتاه‌هاست، باشکوه‌هاست
-                            label += 'st'   # کوتاهترین
-                            label += 'su'   # کوتاه‌تر، کوتاه‌ترین
-                                            # باشکوه‌تر، باشکوه‌ترین
-                                            # کوتاه‌تری، باشکوه‌تری
-                                            # کوتاه‌ترها، کوتاه‌ترهای
-                                            # باشکوه‌ترها، باشکوه‌ترهای
-                                            # کوتاه‌ترین‌ها، کوتاه‌ترین‌های
-                                            # باشکوه‌ترین‌ها، باشکوه‌ترین‌های
-                        elif ends_with_vowel:
-                            label += 'sc'   # شایسته‌ام، شایسته‌ات، شایسته‌اش، شایسته‌مان، شایسته‌تان، شایسته‌شان
-                            label += 'sp'   # شایسته‌ام، شایسته‌ای، شایسته‌ایم، شایسته‌اید، شایسته‌اند
-                            label += 'sk'   # شایسته‌ی، شایستهٔ
-                            label += 'sg'   # شایسته‌ها
-                                            # شایسته‌های
-                                            # شایسته‌هایی
-                            label += 'si'   # شایسته‌هاست
-                            label += 'su'   # شایسته‌تر، شایسته‌ترین
-                                            # شایسته‌تری
-                                            # شایسته‌ترها، شایسته‌ترهای
-                                            # شایسته‌ترین‌ها، شایسته‌ترین‌های
-                        else:
-                            label += 'sc'   # کوتاه‌ام، کوتاه‌ات، کوتاه‌اش، کوتاه‌مان، کوتاه‌تان، کوتاه‌شان
-                            label += 'sp'   # کوتاه‌ام، کوتاه‌ای، کوتاه‌ایم، کوتاه‌اید، کوتاه‌اند
-                            label += 'sl'   # کوتاهی
-                            label += 'sg'   # کوتاه‌ها
-                                            # کوتاه‌های
-                                            # کوتاه‌هایی
-                            label += 'si'   # کوتاه‌هاست
-                            label += 'su'   # کوتاه‌تر، کوتاه‌ترین
-                                            # کوتاه‌تری
-                                            # کوتاه‌ترها، کوتاه‌ترهای
-                                            # کوتاه‌ترین‌ها، کوتاه‌ترین‌های
-
-                    elif word.endswith(PERSIAN_WAW):
-                        if ends_with_vowel:
-                            label += 'sb'   # پررویم، پررویت، پررویش، پررویمان، پررویتان، پررویشان
-                            label += 'sq'   # پررویم، پررویی، پرروست، پرروییم، پررویید، پررویند
-                            label += 'sv'   # پرروی
-                            label += 'sn'   # پررویی
-                            label += 'sd'   # پرروها
-                                            # پرروهای
-                                            # پرروهایی
-                            label += 'sf'   # پرروهاست
-                            label += 'st'   # پرروتر، پرروترین
-                                            # پرروتری
-                                            # پرروترها، پرروترهای
-                                            # پرروترین‌ها، پرروترین‌های
-                        else:
-                            label += 'sa'   # کنجکاوم، کنجکاوت، کنجکاوش، کنجکاومان، کنجکاوتان، کنجکاوشان
-                            label += 'sr'   # کنجکاوم، کنجکاوی، کنجکاویم، کنجکاوید، کنجکاوند
-                            label += 'sl'   # کنجکاوی
-                            label += 'sd'   # کنجکاوها
-                                            # کنجکاوهای
-                                            # کنجکاوهایی
-                            label += 'sf'   # کنجکاوهاست
-                            label += 'st'   # کنجکاوتر، کنجکاوترین
-                                            # کنجکاوتری
-                                            # کنجکاوترها، کنجکاوترهای
-                                            # کنجکاوترین‌ها، کنجکاوترین‌های
-                            label += 'sj'   # کنجکاوان، کنجکاوانی
-
-                    elif word.endswith(PERSIAN_YE):
-                        label += 'sc'   # عالی‌ام، عالی‌ات، عالی‌اش، عالی‌مان، عالی‌تان، عالی‌شان
-                        label += 'sp'   # عالی‌ام، عالی‌ای، عالی‌ایم، عالی‌اید، عالی‌اند
-                        label += 'sm'   # عالی‌ای
-                        label += 'sg'   # عالی‌ها
-                                        # عالی‌های
-                                        # عالی‌هایی
-                        label += 'si'   # عالی‌هاست
-                        label += 'su'   # عالی‌تر، عالی‌ترین
-                                        # عالی‌تری
-                                        # عالی‌ترها، عالی‌ترهای
-                                        # عالی‌ترین‌ها، عالی‌ترین‌های
-                        if kam_dandane:
-                            label += 'sd'   # فلسطینیها
-                                            # فلسطینیهای
-                                            # فلسطینیهایی
-                            label += 'sf'   # فلسطینیهاست
-
-                    elif word.endswith(PERSIAN_ALEF):
-                        label += 'sb'   # اعلایم، اعلایت، اعلایش، اعلایمان، اعلایتان، اعلایشان
-                        label += 'sq'   # اعلایم، اعلایی، اعلاست، اعلاییم، اعلایید، اعلایند
-                        label += 'sv'   # اعلای
-                        label += 'sn'   # اعلایی
-                        label += 'sd'   # اعلاها
-                                        # اعلاهای
-                                        # اعلاهایی
-                        label += 'sf'   # اعلاهاست
-                        label += 'st'   # اعلاتر، اعلاترین
-                                        # اعلاتری
-                                        # اعلاترها، اعلاترهای
-                                        # اعلاترین‌ها، اعلاترین‌های
-
-                    elif word.endswith(PERSIAN_DETACHED):
-                        label += 'sa'   # آبادم، آبادت، آبادش، آبادمان، آبادتان، آبادشان
-                        label += 'so'   # آبادم، آبادی، آبادست، آبادیم، آبادید، آبادند
-                        label += 'sl'   # آبادی
-                        label += 'sd'   # آبادها
-                                        # آبادهای
-                                        # آبادهایی
-                        label += 'sf'   # آبادهاست
-                        label += 'st'   # آبادتر، آبادترین
-                                        # آبادتری
-                                        # آبادترها، آبادترهای
-                                        # آبادترین‌ها، آبادترین‌های
-                        label += 'sj'   # تنومندان، تنومندانی
-
-                    elif word.endswith(PERSIAN_TA) or \
-                         word.endswith(PERSIAN_ZA):
-                        label += 'sa'   # بانشاطم، بانشاطت، بانشاطش، بانشاطمان، بانشاطتان، بانشاطشان
-                        label += 'so'   # بانشاطم، بانشاطی، بانشاطست، بانشاطیم، بانشاطید، بانشاطند
-                        label += 'sl'   # بانشاطی
-                        label += 'sg'   # بانشاط‌ها
-                                        # بانشاط‌های
-                                        # بانشاط‌هایی
-                        label += 'si'   # بانشاط‌هاست
-                        label += 'st'   # بانشاطتر، بانشاطترین
-                                        # بانشاطتری
-                                        # بانشاطترها، بانشاطترهای
-                                        # بانشاطترین‌ها، بانشاطترین‌های
-                        label += 'su'   # بانشاط‌تر، بانشاط‌ترین
-                                        # بانشاط‌تری
-                                        # بانشاط‌ترها، بانشاط‌ترهای
-                                        # بانشاط‌ترین‌ها، بانشاط‌ترین‌های
-                        label += 'sj'   # بانشاطان، بانشاطانی
-
-                    else:
-                        label += 'sa'   # مرتبم، مرتبت، مرتبش، مرتبمان، مرتبتان، مرتبشان
-                        label += 'so'   # مرتبم، مرتبی، مرتبست، مرتبیم، مرتبید، مرتبند
-                        label += 'sl'   # مرتبی
-                        label += 'sg'   # مرتب‌ها
-                                        # مرتب‌های
-                                        # مرتب‌هایی
-                        label += 'si'   # مرتب‌هاست
-                        label += 'su'   # مرتب‌تر، مرتب‌ترین
-                                        # مرتب‌تری
-                                        # مرتب‌ترها، مرتب‌ترهای
-                                        # مرتب‌ترین‌ها، مرتب‌ترین‌های
-                        label += 'sj'   # خوبان، خوبانی
-                        if kam_dandane:
-                            label += 'sd'   # مرتبها
-                                            # مرتبهای
-                                            # مرتبهایی
-                            label += 'sf'   # مرتبهاست
-                            label += 'st'   # مرتبتر، مرتبترین
-                                            # مرتبتری
-                                            # مرتبترها، مرتبترهای
-                                            # مرتبترین‌ها، مرتبترین‌های
-
-                elif pos == 'adjective_comparative':
-                    if word.endswith(PERSIAN_HE):
-                        debug('unpredicted case for: ' + word + ':' + pos)
-                        label += ''
-
-                    elif word.endswith(PERSIAN_WAW):
-                        debug('unpredicted case for: ' + word + ':' + pos)
-                        label += ''
-
-                    elif word.endswith(PERSIAN_YE):
-                        label += '' # بارزتری، جوانتری
-
-                    elif word.endswith(PERSIAN_DETACHED):
-                        label += 'sa'   # ارشدم، ارشدت، ارشدش، ارشدمان، ارشدتان، ارشدشان
-                        label += 'so'   # ارشدم، ارشدی، ارشدست، ارشدیم، ارشدید، ارشدند
-                        label += 'sl'   # ارشدی
-                        label += 'sd'   # ارشدها
-                                        # ارشدهای
-                                        # ارشدهایی
-                        label += 'sf'   # ارشدهاست
-
-                    elif word.endswith(PERSIAN_TA) or \
-                         word.endswith(PERSIAN_ZA):
-                        debug('unpredicted case for: ' + word + ':' + pos)
-
-                    else:
-                        label += 'sa'   # افزونم، افزونت، افزونش، افزونمان، افزونتان، افزونشان
-                        label += 'so'   # افزونم، افزونی، افزونست، افزونیم، افزونید، افزونند
-                        label += 'sl'   # افزونی
-                        label += 'sg'   # افزون‌ها
-                                        # افزون‌های
-                                        # افزون‌هایی
-                        ## label += 'si'   # [???] افزون‌هاست
-
-
-                elif pos == 'adjective_superlative':
-                    if word.endswith(PERSIAN_HE):
-                        debug('unpredicted case for: ' + word + ':' + pos)
-                        label += ''
-
-                    elif word.endswith(PERSIAN_WAW):
-                        debug('unpredicted case for: ' + word + ':' + pos)
-                        label += ''
-
-                    elif word.endswith(PERSIAN_YE):
-                        debug('unpredicted case for: ' + word + ':' + pos)
-                        label += ''
-
-                    elif word.endswith(PERSIAN_DETACHED):
-                        label += 'sa'   # اولی‌ترم، اولی‌ترت، اولی‌ترش، اولی‌ترمان، اولی‌ترتان، اولی‌ترشان
-                        label += 'so'   # اولی‌ترم، اولی‌تری، اولی‌ترست، اولی‌تریم، اولی‌ترید، اولی‌ترند
-                        label += 'sl'   # اولی‌تری
-                        label += 'sd'   # اولی‌ترها
-                                        # اولی‌ترهای
-                                        # اولی‌ترهایی
-                        label += 'sf'   # اولی‌ترهاست
-
-                    elif word.endswith(PERSIAN_TA) or \
-                         word.endswith(PERSIAN_ZA):
-                        debug('unpredicted case for: ' + word + ':' + pos)
-
-                    else:
-                        label += 'sa'   # بهترینم، بهترینت، بهترینش، بهترینمان، بهترینتان، بهترینشان
-                        label += 'so'   # بهترینم، بهترینی، بهترینست، بهترینیم، بهترینید، بهترینند
-                        label += 'sl'   # بهترینی
-                        label += 'sg'   # بهترین‌ها
-                                        # بهترین‌های
-                                        # بهترین‌هایی
-                        label += 'si'   # بهترین‌هاست
-                        if kam_dandane:
-                            label += 'sd'   # بهترینها
-                                            # بهترینهای
-                                            # بهترینهایی
-                            label += 'se'   # بهترینهایم، بهترینهایت، بهترینهایش، بهترینهایمان، بهترینهایتان، بهترینهایشان
-                            label += 'sf'   # بهترینهاست
-
-        ### Adverb ########################################################################################
-                elif pos == 'adverb':
-                    label += ''
-
-        ### Pronoun ########################################################################################
-                elif pos == 'pronoun':
-                    label += ''
-
-        ### Number ########################################################################################
-                elif pos == 'numeral':
-                    label += ''
-        ### Neda ########################################################################################
-                elif pos == 'interjection':
-                    label += ''
-
-        ### Preposition ########################################################################################
-                elif pos == 'adposition':
-                    label += ''
-
-        ### Conjunction ########################################################################################
-                elif pos == 'conjunction':
-                    label += ''
-
-        ### classifier ########################################################################################
-                elif pos == 'classifier':
-                    label += ''
-
-        ### Foreign ########################################################################################
-                elif pos == 'foreign':
-                    if word.endswith(PERSIAN_HE):
-                        label += ''
-
-                    else:
-                        label += 'sl'   # طرفة‌العینی
+        for name, written in build_extensions(dic_filename, aff_filename, outdir, VERSIAN).items():
+            if not written:
+                debug('{0} is up to date'.format(name))
 
-                else:
-                    debug('{0} {1}: unknown tag'.format(word, pos))
 
+    @stage
+    def patch_dictionary(self, filename):
+        debug('patch dictionary')
 
-                # offensive word
-                if offensive:
-                    label += '!!'
+        # the old dictionary is sorted: keep its lines that are still
+        # generated and merge the new ones in
+        with open(filename, 'r', encoding='utf-8') as f:
+            f.readline()  # number of words
+            old = [line.rstrip('\n') for line in f]
 
-                if label:
-                    word += '/'+label
+        added = sorted(self.words.difference(old))
+        kept = (word for word in old if word in self.words)
 
-                if len(attrs) > 4:
-                    word += attrs[4]
+        tmp = filename + '.tmp'
+        with open(tmp, 'w', encoding='utf-8', newline='') as f:
+            f.write('{0}\n'.format(len(self.words)))
+            for word in heapq.merge(kept, added):
+                f.write(word + '\n')
 
-                self.words.add(word)
+        os.replace(tmp, filename)
+
+
+    def fingerprint(self):
+        # everything, other than the input files, that changes the output
+        rules = repr((self.rules.rules, sorted(self.rules.base.items())))
+        data = '{0}|{1}|{2}'.format(VERSIAN, self.mode, rules)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+    @stage
+    def pars_main_dic_cached(self, cache):
+        debug('pars main dic (cached)')
+
+        rows = {}
+        for word, entries in self.dictionary.items():
+            for attrs in entries:
+                key = row_key(word, attrs)
+                line = cache.line(key)
+                if line is None:
+                    line = self.dic_entry(word, attrs)
+
+                rows[key] = line
+                self.words.add(line)
+
+        return rows
+
+
+    def build_cached(self, cache_filename, lexicon, user_dic, aff_filename, dic_filename, verbs=None):
+        # incremental build: unchanged inputs are a no-op, otherwise only the
+        # changed lexicon rows are labelled and the sorted dictionary is patched
+        cache = BuildCache(cache_filename, self.fingerprint())
+        cache.load()
+
+        inputs = {
+            'lexicon': file_digest(lexicon),
+            'user_dic': file_digest(user_dic),
+            'affixes': file_digest('./data/affixes') if aff_filename else None,
+            'verbs': file_digest(verbs),
+        }
+
+        if cache.up_to_date(inputs):
+            debug('dictionary is up to date')
+            return
+
+        self.read_lexicon(lexicon)
+        if verbs:
+            self.pars_verbs(verbs)
+        rows = self.pars_main_dic_cached(cache)
+        self.metrics.count('cache', 'hits', cache.hits)
+        self.metrics.count('cache', 'misses', cache.misses)
+
+        if user_dic:
+            self.pars_user_dic(user_dic)
+
+        if aff_filename:
+            self.dump_affixes(aff_filename)
+
+        previous = cache.outputs.get(dic_filename)
+        if previous is not None and previous == file_digest(dic_filename):
+            self.patch_dictionary(dic_filename)
+        else:
+            self.dump_dictionary(dic_filename)
+
+        outputs = {name: file_digest(name) for name in (aff_filename, dic_filename) if name}
+        cache.save(rows, inputs, outputs)
+
+
+    def checker(self, filename='./data/affixes'):
+        return Checker(self.words, Affixes.load(filename))
+
+
+    def analyzer(self, filename='./data/affixes'):
+        # stems of the dictionary with their part-of-speech
+        analyzer = Analyzer(Affixes.load(filename))
+        affixes = analyzer.affixes
+
+        lines = set(self.words)
+        for word, entries in self.dictionary.items():
+            for attrs in entries:
+                line = self.dic_entry(word, attrs)
+                lines.discard(line)
+                analyzer.add(line, attrs.pos)
+
+        # verb stems and user words
+        for line in lines:
+            flags = affixes.split_flags(line.partition('/')[2])
+            analyzer.add(line, 'verb' if set(flags) & set(VERB_CLASSES) else '')
+
+        return analyzer
+
+
+    @stage
+    def dump_wordlist(self, filename, affix_filename='./data/affixes'):
+        debug('dump wordlist')
+
+        # all the surface forms, sorted and front-coded
+        remove_file(filename)
+        write_wordlist(filename, self.checker(affix_filename).iter_forms())
+
+
+    @stage
+    def dump_suggest_index(self, filename, wordlist_filename, max_distance=MAX_DISTANCE):
+        debug('dump suggestion index')
+
+        remove_file(filename)
+        write_index(filename, WordList(wordlist_filename), max_distance)
+
+
+    def label(self, word, attrs):
+        # affix flags of a lexicon entry
+        found, rule = self.rules.match(attrs.pos, word, attrs.ends_with_vowel, attrs.ends_with_aah_uh)
+
+        if not found:
+            self.metrics.count('unknown_tag', attrs.pos)
+            log.debug('%s %s: unknown tag', word, attrs.pos)
+            return ''
+
+        if rule is None or rule.unpredicted:
+            self.metrics.count('unpredicted', word[-1])
+            log.debug('unpredicted case for: %s:%s', word, attrs.pos)
+            return ''
+
+        if self.metrics.detailed:
+            self.metrics.count('rule', rule.rule)
+
+        label = rule.flags
+        if rule.kam_dandane and self.is_kam_dandane(word):
+            label += rule.kam_dandane
+
+        return label
+
+
+    def entry_flags(self, word, attrs):
+        label = self.label(word, attrs)
+
+        # offensive word
+        if attrs.offensive:
+            label += '!!'
+
+        return label
+
+
+    def dic_entry(self, word, attrs):
+        # dictionary line of a lexicon entry: word/flags
+        label = self.entry_flags(word, attrs)
+
+        if label:
+            word += '/'+label
+
+        if attrs.extra:
+            word += attrs.extra
+
+        return word
+
+
+    @stage
+    def pars_main_dic(self, jobs=1):
+        debug('pars main dic')
+
+        if jobs > 1:
+            self.pars_main_dic_parallel(jobs)
+            return
+
+        for word, entries in self.dictionary.items():
+            for attrs in entries:
+                self.words.add(self.dic_entry(word, attrs))
+
+
+    def pars_main_dic_parallel(self, jobs):
+        # entries are independent: label the shards in a process pool and
+        # merge the words and the letter frequencies
+        items = list(self.dictionary.items())
+        size = max(1, len(items) // (jobs * 4) + 1)
+        shards = [items[i:i + size] for i in range(0, len(items), size)]
+
+        # the words already there, like the verb stems
+        letters = letter_frequency(self.words)
+        with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(self.mode, self.rules, self.metrics.detailed)) as pool:
+            for words, frequency, counters in pool.imap(pars_shard, shards):
+                # the words of a lexicon word are in a single shard,
+                # so the shards never share a word
+                self.words.update(words)
+                letters.update(frequency)
+                self.metrics.merge(counters)
+
+        self.letters = letters
 
 
 
@@ -732,20 +719,105 @@ if __name__ == '__main__':
     parser.add_argument("-m", "--mode", help="Run mode")
     parser.add_argument("-i", "--input", help="input lexicon file")
     parser.add_argument("-o", "--output", help="input dictionary file")
+    parser.add_argument("-f", "--format", default="dic", choices=("dic",) + FORMATS, help="output format of the tihu mode")
+    parser.add_argument("--shard", action="store_true", help="one output file per first letter, for jsonl and tsv")
+    parser.add_argument("-w", "--wordlist", help="output word list file (all surface forms)")
+    parser.add_argument("-s", "--suggest", help="output suggestion index file, needs --wordlist")
+    parser.add_argument("-d", "--distance", type=int, default=MAX_DISTANCE, help="maximum edit distance of the suggestion index")
+    parser.add_argument("-r", "--rules", help="additional morphology rules file")
+    parser.add_argument("-c", "--cache", help="build cache file for incremental builds")
+    parser.add_argument("-z", "--optimize", action="store_true", help="compress the flags with AF aliases and drop unused affixes")
+    parser.add_argument("-e", "--extensions", action="store_true", help="package the firefox (xpi), libreoffice (oxt) and chromium (bdic) dictionaries")
+    parser.add_argument("-l", "--learn", action="store_true", help="infer the affix flags of the user dictionary words")
+    parser.add_argument("--corpus", help="raw text, more forms for --learn")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of parallel build processes")
+    parser.add_argument("--log-level", default="info", choices=["debug", "info", "warning", "error"], help="debug shows a message for each entry")
+    parser.add_argument("--report", help="write the build metrics (JSON) to this file, instead of the log")
+    parser.add_argument("--profile", help="write cProfile stats of the build to this file")
     parser.add_argument('-v', '--version', action='version', version=VERSIAN)
     args = parser.parse_args()
 
+    if args.optimize and args.cache:
+        # incremental builds patch the previous dictionary, line by line
+        parser.error('--optimize can not be used with --cache')
+
+    if args.suggest and not args.wordlist:
+        parser.error('--suggest needs --wordlist')
+
+    if args.learn and args.cache:
+        parser.error('--learn can not be used with --cache')
+
+    if args.extensions and args.mode == 'tihu':
+        parser.error('--extensions can not be used with the tihu mode')
+
+    if args.format != 'dic' and (args.mode != 'tihu' or args.cache):
+        parser.error('--format {0} is for the tihu mode, without --cache'.format(args.format))
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(message)s')
+
+    profile = None
+    if args.profile:
+        profile = cProfile.Profile()
+        profile.enable()
+
+    rules = Rules()
+    if args.rules:
+        rules.load(args.rules)
+
+    # the counters of each entry are only for the report and the profile
+    detailed = bool(args.report or args.profile)
+
     if args.mode == 'tihu':
-        lilak = Lilak(args.mode)
-        lilak.read_lexicon(args.input)
-        lilak.pars_main_dic()
-        lilak.dump_dictionary(args.output)
+        lilak = Lilak(args.mode, rules, detailed)
+        if args.format != 'dic':
+            # entries are written while the lexicon is read
+            with lilak.metrics.timer('export'):
+                export(lilak.iter_entries(args.input), args.output, args.format, args.shard)
+        elif args.cache:
+            lilak.build_cached(args.cache, args.input, None, None, args.output)
+        else:
+            lilak.read_lexicon(args.input)
+            lilak.pars_main_dic(args.jobs)
+            lilak.dump_dictionary(args.output)
+    elif args.cache:
+        lilak = Lilak(rules=rules, detailed=detailed)
+        lilak.build_cached(args.cache, './data/lexicon', './data/dic_users',
+                           '../build/fa-IR.aff', '../build/fa-IR.dic', './data/verbs.htm')
+        if args.extensions:
+            lilak.dump_extensions('../build/fa-IR.dic', '../build/fa-IR.aff', '../build')
+        if args.wordlist:
+            lilak.dump_wordlist(args.wordlist)
+        if args.suggest:
+            lilak.dump_suggest_index(args.suggest, args.wordlist, args.distance)
     else:
-        lilak = Lilak()
+        lilak = Lilak(rules=rules, detailed=detailed)
         lilak.read_lexicon('./data/lexicon')
-        lilak.pars_main_dic()
-        lilak.pars_user_dic('./data/dic_users')
+        lilak.pars_verbs('./data/verbs.htm')
+        lilak.pars_main_dic(args.jobs)
+        if args.learn:
+            lilak.learn_user_dic('./data/dic_users', args.corpus)
+        else:
+            lilak.pars_user_dic('./data/dic_users')
         lilak.dump_affixes('../build/fa-IR.aff')
         lilak.dump_dictionary('../build/fa-IR.dic')
+        if args.optimize:
+            debug('optimize')
+            with lilak.metrics.timer('optimize'):
+                optimize('../build/fa-IR.aff', '../build/fa-IR.dic')
+        if args.extensions:
+            lilak.dump_extensions('../build/fa-IR.dic', '../build/fa-IR.aff', '../build')
+        if args.wordlist:
+            lilak.dump_wordlist(args.wordlist)
+        if args.suggest:
+            lilak.dump_suggest_index(args.suggest, args.wordlist, args.distance)
+
+    if profile:
+        profile.disable()
+        profile.dump_stats(args.profile)
+
+    if args.report:
+        lilak.metrics.write(args.report)
+    else:
+        debug(json.dumps(lilak.metrics.report(), ensure_ascii=False, indent=2))
 
     debug('done!')
@@ -0,0 +1,552 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Spell checking language server (LSP) for editors.
+#
+# The documents are synced incrementally: each change replaces a range of
+# lines, only these lines are tokenized and checked again and the results of
+# the other lines are kept (moved up or down with the edit). Diagnostics are
+# published after the pending messages are handled, so a burst of keystrokes
+# is published once. The JSON of the diagnostics is kept in blocks of lines
+# (see `Block`), so a publish only builds the changed blocks and renumbers
+# the moved ones:
+#   spelling  a word not in the dictionary, suggestions as quick fixes
+#   zwnj      a missing or extra half-space, like میخواهم or کتاب ها, with
+#             the fixed text as quick fix (see `zwnj.py`)
+# The dictionary is opened from the prebuilt word list (and suggestion index)
+# of the build. The ZWNJ index is built in the background after startup.
+#
+# Run it from `src` folder, after `python3 lilak.py -w ../build/fa-IR.words`:
+#   python3 lsp.py                (standard input and output)
+#   python3 lsp.py --port 2087    (tcp)
+
+import os
+import re
+import sys
+import json
+import asyncio
+import logging
+import argparse
+
+from checker import Checker
+from tokenizer import TOKEN, normalize
+from zwnj import ZwnjFixer
+
+
+SOURCE = 'lilak'
+SPELLING = 'spelling'
+ZWNJ_FIX = 'zwnj'
+MAX_ACTIONS = 8
+BLOCK_LINES = 256  # most lines of a block of published diagnostics
+CACHE_SIZE = 1 << 16
+
+# LSP constants
+SYNC_INCREMENTAL = 2
+SEVERITY_WARNING = 2
+SEVERITY_INFORMATION = 3
+METHOD_NOT_FOUND = -32601
+INVALID_REQUEST = -32600
+
+# characters taking two UTF-16 code units
+ASTRAL = re.compile('[\U00010000-\U0010FFFF]')
+
+log = logging.getLogger('lilak')
+
+
+def to_utf16(line, index):
+    # LSP positions count UTF-16 code units
+    if not ASTRAL.search(line, 0, index):
+        return index
+
+    return len(line[:index].encode('utf-16-le')) // 2
+
+
+def from_utf16(line, units):
+    if not ASTRAL.search(line):
+        return min(units, len(line))
+
+    count = 0
+    for index, c in enumerate(line):
+        if count >= units:
+            return index
+        count += 2 if c > '\uffff' else 1
+
+    return len(line)
+
+
+class Block:
+    # A run of lines whose diagnostics are published together. Blocks move
+    # with their lines: an edit builds again only the blocks it changes, the
+    # next ones only get new line numbers.
+
+    def __init__(self, size):
+        self.size = size
+        self.template = None  # UTF-8 JSON, with %d for the line numbers
+        self.offsets = None  # line of each %d, from the start of the block
+        self.first = None  # first line of the data
+        self.data = None
+
+
+class Document:
+    def __init__(self, uri, text, version):
+        self.uri = uri
+        self.version = version
+        self.reset(text)
+
+
+    def reset(self, text):
+        self.lines = text.split('\n')
+        # results of each line, None when the line is not checked yet, and
+        # their JSON, built when published, with %d for the line numbers
+        self.results = [None] * len(self.lines)
+        self.templates = [None] * len(self.lines)
+        self.blocks = self.new_blocks(len(self.lines))
+
+
+    def new_blocks(self, size):
+        return [Block(min(BLOCK_LINES, size - i)) for i in range(0, size, BLOCK_LINES)]
+
+
+    def find(self, line):
+        # (index of the block of a line, first line of the block)
+        first = 0
+        for i, block in enumerate(self.blocks):
+            if line < first + block.size:
+                return i, first
+            first += block.size
+
+        return len(self.blocks) - 1, first - self.blocks[-1].size
+
+
+    def invalidate(self, first, last):
+        # the results of the lines from first to last (excluded) are changed
+        i, start = self.find(first)
+        while i < len(self.blocks) and start < last:
+            self.blocks[i].template = None
+            start += self.blocks[i].size
+            i += 1
+
+
+    def apply(self, change):
+        # applies a change, returns the range of the changed lines
+        text = change['text']
+        if 'range' not in change:
+            self.reset(text)
+            return 0, len(self.lines)
+
+        start, end = change['range']['start'], change['range']['end']
+        first, last = start['line'], end['line']
+        if first >= len(self.lines):
+            first = last = len(self.lines) - 1
+            head = self.lines[first]
+            tail = ''
+        else:
+            last = min(last, len(self.lines) - 1)
+            head = self.lines[first][:from_utf16(self.lines[first], start['character'])]
+            tail = self.lines[last][from_utf16(self.lines[last], end['character']):]
+
+        lines = (head + text + tail).split('\n')
+        self.lines[first:last + 1] = lines
+        self.results[first:last + 1] = [None] * len(lines)
+        self.templates[first:last + 1] = [None] * len(lines)
+
+        # new blocks for the blocks of the changed lines
+        i, start = self.find(first)
+        j, end = self.find(last)
+        size = end + self.blocks[j].size - start + len(lines) - (last + 1 - first)
+        # small blocks are merged with their neighbours
+        if i > 0 and size + self.blocks[i - 1].size <= BLOCK_LINES:
+            i -= 1
+            size += self.blocks[i].size
+        if j + 1 < len(self.blocks) and size + self.blocks[j + 1].size <= BLOCK_LINES:
+            j += 1
+            size += self.blocks[j].size
+        self.blocks[i:j + 1] = self.new_blocks(size)
+        return first, first + len(lines)
+
+
+    def text(self, line, start, end):
+        # text of a range of one line, in UTF-16 positions
+        text = self.lines[line] if line < len(self.lines) else ''
+        return text[from_utf16(text, start):from_utf16(text, end)]
+
+
+class Server:
+    def __init__(self, checker):
+        self.checker = checker
+        self.fixer = None
+        self.documents = {}
+        self.spelled = {}
+        self.pending = set()
+        self.writer = None
+        self.running = True
+        self.handlers = {
+            'initialize': self.initialize,
+            'shutdown': self.shutdown,
+            'exit': self.exit,
+            'textDocument/didOpen': self.did_open,
+            'textDocument/didChange': self.did_change,
+            'textDocument/didClose': self.did_close,
+            'textDocument/codeAction': self.code_action,
+        }
+
+
+    def spell(self, word):
+        valid = self.spelled.get(word)
+        if valid is None:
+            if len(self.spelled) >= CACHE_SIZE:
+                self.spelled.clear()
+            valid = self.spelled[word] = self.checker.spell(word)
+
+        return valid
+
+
+    def check_line(self, text):
+        # (start, end, code, replacement) of a line, in code points
+        results = []
+        fixed = []
+        if self.fixer is not None:
+            for start, end, replacement in self.fixer.fixes(text):
+                results.append((start, end, ZWNJ_FIX, replacement))
+                fixed.append((start, end))
+
+        for m in TOKEN.finditer(text):
+            word = normalize(m.group())
+            if not word or self.spell(word):
+                continue
+
+            if any(start <= m.start() and m.end() <= end for start, end in fixed):
+                continue
+
+            results.append((m.start(), m.end(), SPELLING, None))
+
+        return results
+
+
+    def check(self, document, first, last):
+        lines = document.lines
+        for i in range(first, last):
+            document.results[i] = self.check_line(lines[i])
+            document.templates[i] = None
+        document.invalidate(first, last)
+
+
+    def template(self, line, results):
+        # JSON of the diagnostics of a line, its number is a placeholder so
+        # the lines moved by an edit are not encoded again; two per result
+        items = []
+        for start, end, code, replacement in results:
+            word = line[start:end]
+            if code == SPELLING:
+                severity, message = SEVERITY_WARNING, '{0}: not in the dictionary'.format(word)
+            else:
+                severity, message = SEVERITY_INFORMATION, '{0} -> {1}'.format(word, replacement)
+
+            items.append({
+                'range': {'start': {'line': -1, 'character': to_utf16(line, start)},
+                          'end': {'line': -1, 'character': to_utf16(line, end)}},
+                'severity': severity,
+                'source': SOURCE,
+                'code': code,
+                'message': message,
+                'data': {'replacement': replacement},
+            })
+
+        text = json.dumps(items, ensure_ascii=False)[1:-1]
+        return text.replace('%', '%%').replace('"line": -1', '"line": %d')
+
+
+    def build_block(self, document, block, first):
+        parts = []
+        offsets = []
+        lines = document.lines
+        templates = document.templates
+        for i in range(first, first + block.size):
+            results = document.results[i]
+            if not results:
+                continue
+
+            template = templates[i]
+            if template is None:
+                template = templates[i] = self.template(lines[i], results)
+            parts.append(template)
+            offsets.extend((i - first,) * (2 * len(results)))
+
+        block.template = ','.join(parts).encode('utf-8')
+        block.offsets = offsets
+        block.data = None
+
+
+    def diagnostics(self, document):
+        # UTF-8 JSON array of the diagnostics of a document; the changed
+        # blocks are built again and the moved ones formatted again
+        parts = []
+        first = 0
+        for block in document.blocks:
+            if block.template is None:
+                self.build_block(document, block, first)
+
+            if block.data is None or block.first != first:
+                # one format call for the line numbers of the block
+                block.first = first
+                block.data = block.template % tuple([first + offset for offset in block.offsets])
+
+            if block.data:
+                parts.append(block.data)
+            first += block.size
+
+        return b'[' + b','.join(parts) + b']'
+
+
+    def schedule(self, uri):
+        # published after the messages already received
+        if not self.pending:
+            asyncio.get_running_loop().call_soon(self.publish)
+        self.pending.add(uri)
+
+
+    def publish(self):
+        pending, self.pending = self.pending, set()
+        for uri in pending:
+            document = self.documents.get(uri)
+            # the diagnostics are already JSON
+            params = json.dumps({'uri': uri, 'version': document.version if document else None},
+                                ensure_ascii=False)
+            head = '{{"jsonrpc": "2.0", "method": "textDocument/publishDiagnostics", "params": {0}, ' \
+                   '"diagnostics": '.format(params[:-1])
+            diagnostics = self.diagnostics(document) if document else b'[]'
+            self.write(head.encode('utf-8'), diagnostics, b'}}')
+
+
+    def send(self, message):
+        self.write(json.dumps(message, ensure_ascii=False).encode('utf-8'))
+
+
+    def write(self, *parts):
+        # a message made of UTF-8 parts
+        size = sum(len(part) for part in parts)
+        self.writer.write('Content-Length: {0}\r\n\r\n'.format(size).encode('ascii'))
+        for part in parts:
+            self.writer.write(part)
+
+
+    def notify(self, method, params):
+        self.send({'jsonrpc': '2.0', 'method': method, 'params': params})
+
+
+    def initialize(self, params):
+        return {
+            'capabilities': {
+                'textDocumentSync': {'openClose': True, 'change': SYNC_INCREMENTAL},
+                'codeActionProvider': {'codeActionKinds': ['quickfix']},
+            },
+            'serverInfo': {'name': 'lilak'},
+        }
+
+
+    def shutdown(self, params):
+        return None
+
+
+    def exit(self, params):
+        self.running = False
+
+
+    def did_open(self, params):
+        item = params['textDocument']
+        document = Document(item['uri'], item['text'], item.get('version'))
+        self.documents[document.uri] = document
+        self.check(document, 0, len(document.lines))
+        self.schedule(document.uri)
+
+
+    def did_change(self, params):
+        document = self.documents.get(params['textDocument']['uri'])
+        if document is None:
+            return
+
+        document.version = params['textDocument'].get('version')
+        for change in params['contentChanges']:
+            first, last = document.apply(change)
+            self.check(document, first, last)
+        self.schedule(document.uri)
+
+
+    def did_close(self, params):
+        uri = params['textDocument']['uri']
+        self.documents.pop(uri, None)
+        self.schedule(uri)
+
+
+    def code_action(self, params):
+        uri = params['textDocument']['uri']
+        document = self.documents.get(uri)
+        actions = []
+        for diagnostic in params.get('context', {}).get('diagnostics', ()):
+            if diagnostic.get('source') != SOURCE or document is None:
+                continue
+
+            start, end = diagnostic['range']['start'], diagnostic['range']['end']
+            if start['line'] != end['line']:
+                continue
+
+            replacements = []
+            replacement = (diagnostic.get('data') or {}).get('replacement')
+            if replacement:
+                replacements.append(replacement)
+
+            word = normalize(document.text(start['line'], start['character'], end['character']))
+            if diagnostic.get('code') == SPELLING or ' ' not in word:
+                for suggestion in self.checker.suggest(word):
+                    if suggestion not in replacements:
+                        replacements.append(suggestion)
+
+            for text in replacements[:MAX_ACTIONS]:
+                actions.append({
+                    'title': text,
+                    'kind': 'quickfix',
+                    'diagnostics': [diagnostic],
+                    'isPreferred': text == replacement,
+                    'edit': {'changes': {uri: [{'range': diagnostic['range'], 'newText': text}]}},
+                })
+
+        return actions
+
+
+    def handle(self, message):
+        method = message.get('method')
+        handler = self.handlers.get(method)
+        if 'id' not in message:
+            # notifications have no reply
+            if handler:
+                handler(message.get('params') or {})
+            return
+
+        if handler is None:
+            error = METHOD_NOT_FOUND if method else INVALID_REQUEST
+            self.send({'jsonrpc': '2.0', 'id': message['id'],
+                       'error': {'code': error, 'message': 'unsupported: {0}'.format(method)}})
+            return
+
+        self.send({'jsonrpc': '2.0', 'id': message['id'], 'result': handler(message.get('params') or {})})
+
+
+    async def build_fixer(self):
+        # the ZWNJ index takes a few seconds, the spelling works meanwhile
+        loop = asyncio.get_running_loop()
+        self.fixer = await loop.run_in_executor(None, ZwnjFixer, self.checker)
+        log.info('zwnj index is ready')
+
+        for document in self.documents.values():
+            self.check(document, 0, len(document.lines))
+            self.schedule(document.uri)
+
+
+    async def serve(self, reader, writer, zwnj=True):
+        self.writer = writer
+        fixer = asyncio.ensure_future(self.build_fixer()) if zwnj else None
+        try:
+            while self.running:
+                message = await read_message(reader)
+                if message is None:
+                    break
+
+                try:
+                    self.handle(message)
+                except Exception:
+                    log.exception('failed: %s', message.get('method'))
+                await writer.drain()
+        finally:
+            if fixer is not None:
+                fixer.cancel()
+
+
+async def read_message(reader):
+    # a JSON-RPC message with its Content-Length header, None at the end
+    length = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            return None
+
+        line = line.strip()
+        if not line:
+            break
+
+        name, _, value = line.decode('ascii').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+
+    if length is None:
+        return None
+
+    return json.loads((await reader.readexactly(length)).decode('utf-8'))
+
+
+async def stdio():
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=1 << 24)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin.buffer)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout.buffer)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    return reader, writer
+
+
+async def main(checker, port=None, zwnj=True):
+    if port is None:
+        reader, writer = await stdio()
+        await Server(checker).serve(reader, writer, zwnj)
+        return
+
+    async def client(reader, writer):
+        await Server(checker).serve(reader, writer, zwnj)
+        writer.close()
+
+    server = await asyncio.start_server(client, '127.0.0.1', port, limit=1 << 24)
+    log.info('listening on 127.0.0.1:%d', port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-w', '--wordlist', default='../build/fa-IR.words', help='prebuilt word list')
+    parser.add_argument('-a', '--aff', default='../build/fa-IR.aff', help='hunspell affix file')
+    parser.add_argument('-s', '--suggest', default='../build/fa-IR.sug', help='prebuilt suggestion index')
+    parser.add_argument('-d', '--dic', default='../build/fa-IR.dic', help='hunspell dictionary, without a word list')
+    parser.add_argument('-p', '--port', type=int, help='listen on a tcp port instead of the standard input')
+    parser.add_argument('--no-zwnj', action='store_true', help='no half-space diagnostics')
+    args = parser.parse_args()
+
+    # the standard output is the channel of the protocol
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stderr)
+
+    if os.path.isfile(args.wordlist):
+        index = args.suggest if os.path.isfile(args.suggest) else None
+        checker = Checker.open(args.wordlist, args.aff, index)
+    else:
+        log.warning('no word list, expanding %s', args.dic)
+        checker = Checker.load(args.dic, args.aff)
+
+    try:
+        asyncio.run(main(checker, args.port, not args.no_zwnj))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,106 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Build metrics.
+#
+# Counters (entries per part-of-speech, per rule branch, unpredicted cases
+# per final letter, ...) and the time of each build stage are collected while
+# building and written once as a JSON report:
+#   {"stages": {"read_lexicon": 0.93, ...},
+#    "counters": {"pos": {"noun_singular": 31000, ...}, ...}}
+#
+# The messages of each entry are logged at DEBUG level, so they are not even
+# formatted unless they are asked for. The counters of each entry (like the
+# part-of-speech and the rule branch) are only counted when `detailed`, for
+# a report or a profile; keys can be objects, named only in the report.
+
+import json
+import time
+import logging
+import functools
+import contextlib
+import collections
+
+
+log = logging.getLogger('lilak')
+
+
+class Metrics:
+    def __init__(self, detailed=False):
+        self.detailed = detailed  # count each entry too
+        self.counters = collections.defaultdict(collections.Counter)
+        self.stages = collections.OrderedDict()
+        self.names = {}  # counter name -> name of its keys in the report
+
+
+    def count(self, name, key, n=1):
+        self.counters[name][key] += n
+
+
+    def merge(self, counters):
+        # counters of a worker process
+        for name, counter in counters.items():
+            self.counters[name].update(counter)
+
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0) + time.perf_counter() - start
+
+
+    def named(self, name, counter):
+        key = self.names.get(name)
+        if key is None:
+            return counter
+
+        named = collections.Counter()
+        for k, n in counter.items():
+            named[key(k)] += n
+
+        return named
+
+
+    def report(self):
+        return {
+            'stages': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            'counters': {name: dict(self.named(name, counter).most_common())
+                         for name, counter in sorted(self.counters.items())},
+        }
+
+
+    def write(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+            f.write('\n')
+
+
+def stage(func):
+    # times a method of an object with a `metrics` attribute
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self.metrics.timer(func.__name__):
+            return func(self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,251 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Out-of-vocabulary (OOV) miner: the missing words of a corpus, most frequent
+# first, to grow the lexicon in order of real-world impact.
+#
+# The text files are memory mapped and cut in chunks on line boundaries. The
+# chunks are tokenized and checked by a pool of processes, each one returns
+# the counts of its Persian words that are not accepted by the dictionary.
+# Then the OOV words are grouped by stem with the learner (see `learner.py`):
+#   کووید، کوویدها، کووید‌ها -> کووید/sgsd...
+# and the parts-of-speech whose rules (see `rules.py`) give these classes to
+# the stem are the POS guesses. A form of a dictionary word, missing a class,
+# is reported with the stem and the missing class.
+#
+# Run it from `src` folder, after the build:
+#   python3 miner.py corpus1.txt corpus2.txt -o ../build/oov.tsv
+
+import os
+import re
+import sys
+import mmap
+import argparse
+import collections
+import multiprocessing
+
+from checker import Checker
+from learner import Learner, MIN_STEM
+from rules import Rules
+from tokenizer import tokenize
+from verbs import VERB_CLASSES
+
+
+CHUNK_SIZE = 16 << 20
+MIN_COUNT = 2
+MAX_POS = 3
+
+# Persian letters, hamza and ZWNJ: Latin words, numbers and mixed tokens are
+# not reported
+PERSIAN_WORD = re.compile('^[\u0621-\u063A\u0641-\u064A\u0654\u067E\u0686\u0698\u06A9\u06AF\u06C0\u06CC\u200C]+$')
+
+# word is the entry to add (or the dictionary word to add flags to)
+Candidate = collections.namedtuple('Candidate', 'word count flags pos known forms')
+
+# the checker of a worker process, inherited when processes are forked
+CHECKER = None
+
+
+def load_checker(dic_filename, aff_filename, wordlist_filename=None):
+    global CHECKER
+    if CHECKER is None:
+        if wordlist_filename:
+            CHECKER = Checker.open(wordlist_filename, aff_filename)
+        else:
+            CHECKER = Checker.load(dic_filename, aff_filename)
+
+    return CHECKER
+
+
+def chunks(filename, size=CHUNK_SIZE):
+    # (filename, start, end) of the chunks of a file, cut after a newline
+    # so a line (and an UTF-8 character) is never split
+    file_size = os.path.getsize(filename)
+    if not file_size:
+        return []
+
+    result = []
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        start = 0
+        while start < file_size:
+            end = m.find(b'\n', min(start + size, file_size) - 1)
+            end = file_size if end < 0 else end + 1
+            result.append((filename, start, end))
+            start = end
+
+    return result
+
+
+def count_chunk(chunk):
+    # (number of tokens, Counter of the OOV words) of a chunk
+    filename, start, end = chunk
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        text = m[start:end].decode('utf-8', errors='replace')
+
+    counts = collections.Counter(token for token, _ in tokenize(text.splitlines(True)))
+    spell = CHECKER.spell
+    oov = collections.Counter({word: n for word, n in counts.items()
+                               if PERSIAN_WORD.match(word) and not spell(word)})
+
+    return sum(counts.values()), oov
+
+
+def mine(filenames, checker_args, jobs=None, chunk_size=CHUNK_SIZE):
+    # (number of tokens, Counter of the OOV words) of the files
+    tasks = [chunk for filename in filenames for chunk in chunks(filename, chunk_size)]
+    jobs = jobs or os.cpu_count() or 1
+
+    # loaded before the pool, so forked workers share it
+    load_checker(*checker_args)
+
+    total = 0
+    oov = collections.Counter()
+    if jobs == 1 or len(tasks) < 2:
+        results = map(count_chunk, tasks)
+        for tokens, counter in results:
+            total += tokens
+            oov.update(counter)
+        return total, oov
+
+    with multiprocessing.Pool(jobs, initializer=load_checker, initargs=checker_args) as pool:
+        for tokens, counter in pool.imap_unordered(count_chunk, tasks):
+            total += tokens
+            oov.update(counter)
+
+    return total, oov
+
+
+def guess_pos(rules, stem, flags, split_flags):
+    # parts-of-speech whose rules give all the flags to the stem, the ones
+    # with the fewest other flags first
+    if not flags:
+        return ()
+
+    flags = set(flags)
+    scores = {}
+    for pos in sorted(set(r.pos for r in rules.rules)):
+        table = rules.lookup(pos)
+        for label in table.get(stem[-1], table[None]):
+            if label is None:
+                continue
+
+            available = set(split_flags(label.flags + label.kam_dandane))
+            if flags <= available:
+                score = len(available - flags)
+                scores[pos] = min(score, scores.get(pos, score))
+
+    return tuple(sorted(scores, key=lambda pos: (scores[pos], pos))[:MAX_POS])
+
+
+def candidates(oov, checker, rules, known):
+    # the OOV words grouped by stem, as Candidates, most frequent first
+    # known: flags of the dictionary words, {word: set(flags)}
+    affixes = checker.affixes
+    learner = Learner(affixes, known, skip=VERB_CLASSES)
+    learner.add_words(oov)
+    stems, covered = learner.learn()
+
+    groups = {}
+    for stem, flags in stems.items():
+        forms = set(form for flag in flags for form in learner.forms(stem, flag)) & covered
+        groups[stem] = (flags, False, forms | {stem})
+
+    # forms of dictionary words with a missing class, like کتاب + ی
+    missing = collections.defaultdict(lambda: (set(), set()))
+    for word in oov:
+        if word in covered or word in stems:
+            continue
+
+        for stem, flag in learner.candidates(word):
+            if len(stem) >= MIN_STEM and stem in known and flag not in known[stem] and \
+               word in learner.forms(stem, flag):
+                missing[stem][0].add(flag)
+                missing[stem][1].add(word)
+                break
+        else:
+            groups[word] = ((), False, {word})
+
+    for stem, (flags, forms) in missing.items():
+        groups[stem] = (sorted(flags, key=learner.order.index), True, forms)
+
+    result = []
+    for word, (flags, is_known, forms) in groups.items():
+        forms = sorted(forms, key=lambda form: (-oov[form], form))
+        # the part-of-speech of a dictionary word is already known
+        pos = () if is_known else guess_pos(rules, word, flags, affixes.split_flags)
+        result.append(Candidate(word, sum(oov[form] for form in forms), ''.join(flags), pos,
+                                is_known, tuple((form, oov[form]) for form in forms)))
+
+    result.sort(key=lambda c: (-c.count, c.word))
+    return result
+
+
+def read_known(checker, dic_filename):
+    known = collections.defaultdict(set)
+    with open(dic_filename, 'r', encoding='utf-8') as f:
+        f.readline()  # number of entries
+        for line in f:
+            word, flags = checker.affixes.parse_entry(line.rstrip('\n'))
+            known[word].update(flags)
+
+    return known
+
+
+def write_candidates(stream, candidates):
+    stream.write('count\tword\tflags\tpos\tknown\tforms\n')
+    for c in candidates:
+        forms = ' '.join('{0}:{1}'.format(form, n) for form, n in c.forms)
+        stream.write('{0}\t{1}\t{2}\t{3}\t{4}\t{5}\n'.format(
+            c.count, c.word, c.flags, ','.join(c.pos), int(c.known), forms))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('corpus', nargs='+', help='text files')
+    parser.add_argument('-d', '--dic', default='../build/fa-IR.dic', help='hunspell dictionary')
+    parser.add_argument('-a', '--aff', default='../build/fa-IR.aff', help='hunspell affix file')
+    parser.add_argument('-w', '--wordlist', help='prebuilt word list, shared by the processes with mmap')
+    parser.add_argument('-r', '--rules', help='additional morphology rules file')
+    parser.add_argument('-o', '--output', help='output TSV file, standard output by default')
+    parser.add_argument('-j', '--jobs', type=int, help='number of processes, all the cores by default')
+    parser.add_argument('-m', '--min-count', type=int, default=MIN_COUNT, help='minimum frequency of an OOV word')
+    parser.add_argument('-n', '--top', type=int, help='number of candidates to write')
+    args = parser.parse_args()
+
+    rules = Rules()
+    if args.rules:
+        rules.load(args.rules)
+
+    total, oov = mine(args.corpus, (args.dic, args.aff, args.wordlist), args.jobs)
+    oov = collections.Counter({word: n for word, n in oov.items() if n >= args.min_count})
+
+    checker = CHECKER
+    result = candidates(oov, checker, rules, read_known(checker, args.dic))
+    if args.top:
+        result = result[:args.top]
+
+    print('{0} tokens, {1} OOV words, {2} candidates'.format(total, len(oov), len(result)), file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            write_candidates(f, result)
+    else:
+        write_candidates(sys.stdout, result)
@@ -0,0 +1,247 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Compact n-gram model of a corpus, to rank the suggestions by their context:
+#   به خانه رفتم  ->  خانه before خامه for the misspelled خانع
+#
+# The unigrams, bigrams and trigrams of the corpus tokens (see `tokenizer.py`)
+# are counted by hash: the crc32 of their words joined by spaces. Each order
+# is a sorted table of hashes with a table of counts, u32 arrays viewed right
+# in the memory mapped file, so the model is shared between processes and a
+# lookup is a binary search. The rare hash collisions only blur the counts.
+#
+# The size of the model is bounded at build time: the most frequent n-grams
+# are kept, ENTRY_SIZE bytes each, until the budget is used. While counting,
+# the rarest n-grams are dropped when there are PRUNE_FACTOR times more than
+# the model keeps, so big corpora are counted in bounded memory too.
+#
+# Candidates are scored with stupid backoff, on the n-grams they make with
+# the words before and after them:
+#   S(w | a b) = count(a b w) / count(a b), or BACKOFF * S(w | b) if unseen
+#
+# Layout (little endian):
+#
+#   header : magic 'LLKN', version (u16), order (u16), number of tokens
+#            (u64), number of n-grams of each order (3 x u32)
+#   tables : for each order, sorted hashes (u32) and their counts (u32)
+#
+# Run it from `src` folder:
+#   python3 ngram.py corpus1.txt corpus2.txt -o ../build/fa-IR.ngram --size 16M
+
+import os
+import re
+import sys
+import math
+import mmap
+import zlib
+import array
+import heapq
+import struct
+import bisect
+import argparse
+import operator
+
+from tokenizer import tokenize
+
+
+MAGIC = b'LLKN'
+VERSION = 1
+MAX_ORDER = 3
+HEADER = struct.Struct('<4sHHQ3I')
+ENTRY_SIZE = 8  # hash and count
+MAX_SIZE = 16 << 20
+PRUNE_FACTOR = 2
+LOG_BACKOFF = math.log(0.4)
+RANK_COST = 0.5  # log score of each place down in the order of the checker
+
+
+def key_hash(words):
+    return zlib.crc32(' '.join(words).encode('utf-8'))
+
+
+def parse_size(text):
+    # bytes of '16M', '512K' or '1048576'
+    m = re.match(r'^(\d+)([KMG]?)B?$', text.strip().upper())
+    if not m:
+        raise ValueError('bad size: {0}'.format(text))
+
+    return int(m.group(1)) << {'': 0, 'K': 10, 'M': 20, 'G': 30}[m.group(2)]
+
+
+def prune(counts, size):
+    # keeps the `size` most frequent keys
+    if len(counts) > size:
+        kept = heapq.nlargest(size, counts.items(), key=operator.itemgetter(1))
+        counts.clear()
+        counts.update(kept)
+
+
+def count_ngrams(lines, order=MAX_ORDER, max_keys=None):
+    # (number of tokens, {n << 32 | hash: count}) of the n-grams of the
+    # lines; n-grams don't cross lines
+    counts = {}
+    tokens = 0
+    for line in lines:
+        words = [token for token, _ in tokenize(line)]
+        tokens += len(words)
+        for i in range(len(words)):
+            for n in range(1, min(order, i + 1) + 1):
+                key = n << 32 | key_hash(words[i - n + 1:i + 1])
+                counts[key] = counts.get(key, 0) + 1
+
+        if max_keys and len(counts) > max_keys:
+            prune(counts, max_keys // PRUNE_FACTOR)
+
+    return tokens, counts
+
+
+def write_model(filename, tokens, counts, order=MAX_ORDER, size=MAX_SIZE):
+    # the most frequent n-grams that fit in `size` bytes
+    prune(counts, max(0, (size - HEADER.size) // ENTRY_SIZE))
+
+    tables = [[] for _ in range(MAX_ORDER)]
+    for key, count in counts.items():
+        tables[(key >> 32) - 1].append((key & 0xFFFFFFFF, min(count, 0xFFFFFFFF)))
+
+    tmp = filename + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, order, tokens, *(len(table) for table in tables)))
+        for table in tables:
+            table.sort()
+            f.write(array.array('I', (h for h, _ in table)).tobytes())
+            f.write(array.array('I', (count for _, count in table)).tobytes())
+
+    os.replace(tmp, filename)
+
+
+def build_model(filename, corpus, order=MAX_ORDER, size=MAX_SIZE):
+    # counts the n-grams of the text files and writes the model
+    def lines():
+        for name in corpus:
+            with open(name, 'r', encoding='utf-8', errors='replace') as f:
+                yield from f
+
+    max_keys = max(1, (size - HEADER.size) // ENTRY_SIZE) * PRUNE_FACTOR
+    tokens, counts = count_ngrams(lines(), order, max_keys)
+    write_model(filename, tokens, counts, order, size)
+    return tokens, len(counts)
+
+
+class NgramModel:
+    def __init__(self, filename):
+        self.filename = filename
+        self.buf = None
+
+
+    def open(self):
+        if self.buf is not None:
+            return
+
+        with open(self.filename, 'rb') as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.order, self.tokens, *sizes = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('not a lilak n-gram model: {0}'.format(self.filename))
+
+        # (hashes, counts) of each order, u32 arrays viewed in the mapped file
+        view = memoryview(self.buf)
+        pos = HEADER.size
+        self.tables = []
+        for size in sizes:
+            hashes = view[pos:pos + size * 4].cast('I')
+            counts = view[pos + size * 4:pos + size * 8].cast('I')
+            self.tables.append((hashes, counts))
+            pos += size * 8
+
+
+    def close(self):
+        if self.buf is not None:
+            self.tables = None
+            self.buf.close()
+            self.buf = None
+
+
+    def count(self, words):
+        hashes, counts = self.tables[len(words) - 1]
+        h = key_hash(words)
+        i = bisect.bisect_left(hashes, h)
+        if i < len(hashes) and hashes[i] == h:
+            return counts[i]
+
+        return 0
+
+
+    def score(self, words):
+        # log of the stupid backoff score of the last word after the others
+        self.open()
+        words = words[-self.order:]
+        penalty = 0.0
+        while len(words) > 1:
+            count = self.count(words)
+            context = self.count(words[:-1]) if count else 0
+            if context:
+                return penalty + math.log(count / context)
+
+            penalty += LOG_BACKOFF
+            words = words[1:]
+
+        # add one, for the words not in the corpus
+        return penalty + math.log((self.count(words) + 1) / (self.tokens + 1))
+
+
+    def rank(self, suggestions, before=(), after=()):
+        # the suggestions ordered by the n-grams they make with the words
+        # before and after them; the order of the checker is kept for the
+        # unknown contexts, each place down costs RANK_COST
+        self.open()
+        if len(suggestions) < 2:
+            return list(suggestions)
+
+        context = self.order - 1
+        before = list(before)[-context:] if context else []
+        after = list(after[:context])
+
+        scored = []
+        for i, word in enumerate(suggestions):
+            words = before + [word] + after
+            score = -RANK_COST * i
+            for end in range(len(before) + 1, len(words) + 1):
+                score += self.score(words[max(0, end - self.order):end])
+            scored.append((-score, i, word))
+
+        scored.sort()
+        return [word for _, _, word in scored]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('corpus', nargs='+', help='text files')
+    parser.add_argument('-o', '--output', default='../build/fa-IR.ngram', help='output model file')
+    parser.add_argument('-n', '--order', type=int, default=MAX_ORDER, choices=range(1, MAX_ORDER + 1),
+                        help='longest n-grams')
+    parser.add_argument('--size', type=parse_size, default=MAX_SIZE, help='size budget of the model, like 16M')
+    args = parser.parse_args()
+
+    tokens, ngrams = build_model(args.output, args.corpus, args.order, args.size)
+    print('{0} tokens, {1} n-grams, {2} bytes'.format(tokens, ngrams, os.path.getsize(args.output)),
+          file=sys.stderr)
@@ -0,0 +1,147 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Optimizing output stage for the generated .aff/.dic files.
+#
+#  - PFX/SFX classes not used by any entry (directly or as a continuation
+#    class of a used affix) are removed.
+#  - Each distinct combination of flags is written once in an `AF` alias
+#    table and the entries (and affix rules) refer to it by number, like:
+#      AF 2
+#      AF pasasosgshsislsjsdsesf
+#      AF FFWW
+#      آئورت/1
+#
+# The accepted words are the same, only the files are smaller.
+
+import os
+import re
+import collections
+
+from affixes import Affixes
+
+
+SPACES = re.compile(r'(\s+)')
+
+
+def read_dictionary(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        f.readline()  # number of entries
+        return [line.rstrip('\n') for line in f]
+
+
+def used_classes(affixes, flag_sets):
+    # affix classes reachable from the flags of the entries
+    classes = {}
+    classes.update(affixes.prefixes)
+    classes.update(affixes.suffixes)
+
+    used = set()
+    queue = [flag for flags in flag_sets for flag in flags if flag in classes]
+    while queue:
+        flag = queue.pop()
+        if flag in used:
+            continue
+
+        used.add(flag)
+        for rule in classes[flag].rules:
+            queue.extend(f for f in rule.flags if f in classes and f not in used)
+
+    return used
+
+
+def alias_table(flag_strings):
+    # the most frequent combinations get the smallest numbers
+    counts = collections.Counter(flag_strings)
+    ordered = sorted(counts, key=lambda flags: (-counts[flags], flags))
+    return {flags: str(i + 1) for i, flags in enumerate(ordered)}
+
+
+def rule_flags(fields):
+    # fields of an affix rule: kind, flag, strip, append[/flags], condition
+    if len(fields) > 6 and '/' in fields[6]:
+        return fields[6].partition('/')[2]
+    return ''
+
+
+def optimize(aff_filename, dic_filename):
+    with open(aff_filename, 'r', encoding='utf-8') as f:
+        aff_lines = f.read().split('\n')
+
+    affixes = Affixes()
+    affixes.parse(aff_lines)
+
+    if affixes.aliases:
+        return  # already optimized
+
+    entries = [line.partition('/') for line in read_dictionary(dic_filename)]
+    used = used_classes(affixes, (affixes.split_flags(flags) for _, _, flags in entries))
+
+    # drop the unused classes, keeping the comments and blank lines
+    lines = []
+    for line in aff_lines:
+        fields = line.split()
+        if fields and fields[0] in ('PFX', 'SFX') and fields[1] not in used:
+            continue
+        lines.append(line)
+
+    flag_strings = [flags for _, _, flags in entries if flags]
+    for line in lines:
+        fields = SPACES.split(line)
+        if fields[0] in ('PFX', 'SFX'):
+            flags = rule_flags(fields)
+            if flags:
+                flag_strings.append(flags)
+
+    aliases = alias_table(flag_strings)
+
+    out = []
+    for line in lines:
+        fields = SPACES.split(line)
+
+        if fields[0] in ('PFX', 'SFX'):
+            flags = rule_flags(fields)
+            if flags:
+                fields[6] = fields[6].partition('/')[0] + '/' + aliases[flags]
+                line = ''.join(fields)
+
+        out.append(line)
+
+        # the alias table must come before the affixes
+        if fields[0] == 'FLAG':
+            out.append('')
+            out.append('AF {0}'.format(len(aliases)))
+            for flags in sorted(aliases, key=lambda flags: int(aliases[flags])):
+                out.append('AF {0}'.format(flags))
+
+    with open(aff_filename + '.tmp', 'w', encoding='utf-8', newline='') as f:
+        f.write('\n'.join(out))
+
+    with open(dic_filename + '.tmp', 'w', encoding='utf-8', newline='') as f:
+        f.write('{0}\n'.format(len(entries)))
+        for word, slash, flags in entries:
+            if flags:
+                f.write(word + '/' + aliases[flags] + '\n')
+            else:
+                f.write(word + slash + '\n')
+
+    os.replace(aff_filename + '.tmp', aff_filename)
+    os.replace(dic_filename + '.tmp', dic_filename)
@@ -0,0 +1,152 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Firefox (.xpi) and LibreOffice (.oxt) extensions, and the chromium
+# dictionary (.bdic, see `bdic.py`).
+#
+# The dictionary is streamed right into the archives, the version is filled
+# in the manifests in memory and both archives are written at the same time.
+# The archives are deterministic: the members are sorted and have a fixed
+# timestamp. The digest of the inputs is kept as the archive comment, so an
+# archive with the same inputs is not written again.
+#
+# Run it from `src` folder, after the build:
+#   python3 package.py
+
+import os
+import hashlib
+import zipfile
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from bdic import write_bdic
+
+
+DATE_TIME = (1980, 1, 1, 0, 0, 0)
+CHUNK_SIZE = 1 << 20
+
+# archive name -> file, or (template file,) for the files with %VER%
+XPI = {
+    'fa-IR.dic': '{dic}',
+    'fa-IR.aff': '{aff}',
+    'LICENSE': '../LICENSE',
+    'icon.png': '../icon.png',
+    'README_fa_IR.txt': './data/README_fa_IR.txt',
+    'manifest.json': ('./data/manifest.json',),
+}
+
+OXT = {
+    'fa-IR.dic': '{dic}',
+    'fa-IR.aff': '{aff}',
+    'LICENSE': '../LICENSE',
+    'icon.png': '../icon.png',
+    'META-INF/manifest.xml': './data/META-INF/manifest.xml',
+    'README_fa_IR.txt': './data/README_fa_IR.txt',
+    'dictionaries.xcu': './data/dictionaries.xcu',
+    'description.xml': ('./data/description.xml',),
+}
+
+
+def members(layout, dic, aff):
+    # sorted (name, filename, is template)
+    result = []
+    for name in sorted(layout):
+        source = layout[name]
+        template = isinstance(source, tuple)
+        if template:
+            source = source[0]
+        result.append((name, source.format(dic=dic, aff=aff), template))
+
+    return result
+
+
+def inputs_digest(files, version):
+    h = hashlib.sha1(version.encode('utf-8'))
+    for name, filename, _ in files:
+        h.update(name.encode('utf-8'))
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                h.update(chunk)
+
+    return h.hexdigest().encode('ascii')
+
+
+def zip_info(name):
+    info = zipfile.ZipInfo(name, DATE_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def write_archive(filename, files, version):
+    # returns False if the archive is already up to date
+    digest = inputs_digest(files, version)
+    if os.path.isfile(filename):
+        with zipfile.ZipFile(filename) as zf:
+            if zf.comment == digest:
+                return False
+
+    tmp = filename + '.tmp'
+    with zipfile.ZipFile(tmp, 'w') as zf:
+        zf.comment = digest
+        for name, source, template in files:
+            if template:
+                with open(source, 'r', encoding='utf-8') as f:
+                    text = f.read().replace('%VER%', version)
+                zf.writestr(zip_info(name), text.encode('utf-8'))
+                continue
+
+            with open(source, 'rb') as f, zf.open(zip_info(name), 'w') as out:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    out.write(chunk)
+
+    os.replace(tmp, filename)
+    return True
+
+
+def build_extensions(dic, aff, outdir, version):
+    # returns {file: written}
+    archives = {
+        os.path.join(outdir, 'fa-IR-dictionary.xpi'): members(XPI, dic, aff),
+        os.path.join(outdir, 'fa-IR-dictionary.oxt'): members(OXT, dic, aff),
+    }
+
+    # zlib releases the GIL, the archives are compressed in parallel
+    with ThreadPoolExecutor(len(archives) + 1) as executor:
+        futures = {name: executor.submit(write_archive, name, files, version)
+                   for name, files in archives.items()}
+        bdic = os.path.join(outdir, 'fa-IR.bdic')
+        futures[bdic] = executor.submit(write_bdic, bdic, dic, aff)
+
+    return {name: future.result() for name, future in futures.items()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d', '--dic', default='../build/fa-IR.dic', help='hunspell dictionary')
+    parser.add_argument('-a', '--aff', default='../build/fa-IR.aff', help='hunspell affix file')
+    parser.add_argument('-o', '--outdir', default='../build', help='output folder')
+    args = parser.parse_args()
+
+    from lilak import VERSIAN
+
+    for name, written in build_extensions(args.dic, args.aff, args.outdir, VERSIAN).items():
+        print('{0}: {1}'.format(name, 'written' if written else 'up to date'))
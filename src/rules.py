@@ -0,0 +1,595 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Morphology rules: which affix classes a lexicon entry gets.
+#
+# A rule is selected by part-of-speech, the final letter of the word and
+# the `ends_with_vowel`/`ends_with_aah_uh` attributes of the entry. The first
+# matching rule wins. `kam_dandane` flags are added only when the word has
+# few teeth (see `Lilak.is_kam_dandane`).
+
+import os
+import collections
+
+from letters import *
+
+
+Rule = collections.namedtuple('Rule', 'pos letter ends_with_vowel ends_with_aah_uh flags kam_dandane unpredicted')
+
+# compiled form of a rule
+Label = collections.namedtuple('Label', 'flags kam_dandane unpredicted rule')
+
+
+def rule(pos, letter, flags='', kam_dandane='', ends_with_vowel=None, ends_with_aah_uh=None, unpredicted=False):
+    return Rule(pos, letter, ends_with_vowel, ends_with_aah_uh, flags, kam_dandane, unpredicted)
+
+
+# final letter classes, in the order they are checked
+LETTERS = collections.OrderedDict([
+    ('he',       (PERSIAN_HE,)),
+    ('waw',      (PERSIAN_WAW,)),
+    ('ye',       (PERSIAN_YE,)),
+    ('alef',     (PERSIAN_ALEF,)),
+    ('detached', PERSIAN_DETACHED),
+    ('ta_za',    (PERSIAN_TA, PERSIAN_ZA)),
+    ('other',    ()),  # any other letter
+])
+
+# all the parts-of-speech starting with these prefixes share their rules
+POS_PREFIXES = ('verb',)
+
+# flags added to every entry of a part-of-speech
+BASE = {
+    'noun_singular': 'pa',  # بی‌انگیزه، بی‌حوصله، بی‌خانه
+}
+
+
+RULES = [
+
+### Verb ########################################################################################
+    rule('verb', 'other'),
+
+
+### Noun ########################################################################################
+    rule('noun_singular', 'he', ends_with_aah_uh=True, flags=
+         'sa'   # نگاهم، نگاهت، نگاهش، نگاهمان، نگاهتان، نگاهشان
+                # کوهم، کوهت، کوهش، کوهمان، کوهتان، کوهشان
+         'sr'   # نگاهم، نگاهی، نگاهیم، نگاهید، نگاهند
+                # کوهم، کوهی، کوهیم، کوهید، کوهند
+         'sg'   # نگاه‌ها، کوه‌ها
+                # نگاه‌های، کوه‌های
+                # نگاه‌هایی، کوه‌هایی
+         'sh'   # نگاه‌هایم، نگاه‌هایت، نگاه‌هایش، نگاه‌هایمان، نگاه‌هایتان، نگاه‌هایشان
+                # کوه‌هایم، کوه‌هایت، کوه‌هایش، کوه‌هایمان، کوه‌هایتان، کوه‌هایشان
+         'si'   # نگاه‌هاست، کوه‌هاست
+         'sl',  # نگاهی، کوهی
+         kam_dandane=
+         'sd'   # نگاهها، کوهها
+                # نگاههای، کوههای
+                # نگاههایی، کوههایی
+         'se'   # نگاههایم، نگاههایت، نگاههایش، نگاههایمان، نگاههایتان، نگاههایشان
+         'sf'), # کوههاست
+
+    rule('noun_singular', 'he', ends_with_vowel=True, flags=
+         'sc'   # خانه‌ام، خانه‌ات، خانه‌اش، خانه‌مان، خانه‌تان، خانه‌شان
+         'sp'   # خانه‌ام، خانه‌ای، خانه‌ایم، خانه‌اید، خانه‌اند
+         'sg'   # خانه‌ها
+                # خانه‌های
+                # خانه‌هایی
+         'sh'   # خانه‌هایم، خانه‌هایت، خانه‌هایش، خانه‌هایمان، خانه‌هایتان، خانه‌هایشان
+         'si'   # خانه‌هاست
+         'sm'   # خانه‌ای
+         'sk'), # خانه‌ی، خانهٔ
+
+    rule('noun_singular', 'he', flags=
+         'sc'   # روبه‌ام، روبه‌ات، روبه‌اش، روبه‌مان، روبه‌تان، روبه‌شان
+         'sp'   # روبه‌ام، روبه‌ای، روبه‌ایم، روبه‌اید، روبه‌اند
+         'sg'   # روبه‌ها
+                # روبه‌های
+                # روبه‌هایی
+         'sh'   # روبه‌هایم، روبه‌هایت، روبه‌هایش، روبه‌هایمان، روبه‌هایتان، روبه‌هایشان
+         'si'   # روبه‌هاست
+         'sl'), # روبهی
+
+    rule('noun_singular', 'waw', ends_with_vowel=True, flags=
+         'sb'   # عمویم، عمویت، عمویش، عمویمان، عمویتان، عمویشان
+         'sa'   # عموم، عموت، عموش، عمومان، عموتان، عموشان
+         'sq'   # عمویم، عمویی، عموست، عموییم، عمویید، عمویند
+         'sd'   # عموها
+                # عموهای
+                # عموهایی
+         'se'   # عموهایم، عموهایت، عموهایش، عموهایمان، عموهایتان، عموهایشان
+         'sf'   # عموهاست
+         'sv'   # عموی
+         'sn'), # عمویی
+
+    rule('noun_singular', 'waw', flags=
+         'sa'   # آرشیوم، آرشیوت، آرشیوش، آرشیومان، آرشیوتان، آرشیوشان
+         'sr'   # آرشیوم، آرشیوی، آرشیویم، آرشیوید، آرشیوند
+         'sd'   # آرشیوها
+                # آرشیوهای
+                # آرشیوهایی
+         'se'   # آرشیوهایم، آرشیوهایت، آرشیوهایش، آرشیوهایمان، آرشیوهایتان، آرشیوهایشان
+         'sf'   # آرشیوهاست
+         'sl'), # آرشیوی
+
+    rule('noun_singular', 'ye', flags=
+         'sc'   # کشتی‌ام، کشتی‌ات، کشتی‌اش، کشتی‌مان، کشتی‌تان، کشتی‌شان
+         'sp'   # کشتی‌ام، کشتی‌ای، کشتی‌ایم، کشتی‌اید، کشتی‌اند
+         'sg'   # کشتی‌ها
+                # کشتی‌های
+                # کشتی‌هایی
+         'sh'   # کشتی‌هایم، کشتی‌هایت، کشتی‌هایش، کشتی‌هایمان، کشتی‌هایتان، کشتی‌هایشان
+         'si'   # کشتی‌هاست
+         'sm'   # کشتی‌ای
+         'sj',  # شکارچیان، شکارچیانی
+         kam_dandane=
+         'sd'   # بازیها
+                # بازیهای
+                # بازیهایی
+         'se'   # بازیهایم، بازیهایت، بازیهایش، بازیهایمان، بازیهایتان، بازیهایشان
+         'sf'), # بازیهاست
+
+    rule('noun_singular', 'alef', flags=
+         'sb'   # پایم، پایت، پایش، پایمان، پایتان، پایشان
+         'sq'   # پایم، پایی، پاست، پاییم، پایید، پایند
+         'sd'   # پاها
+                # پاهای
+                # پاهایی
+         'se'   # پاهایم، پاهایت، پاهایش، پاهایمان، پاهایتان، پاهایشان
+         'sf'   # پاهاست
+         'sv'   # پای
+         'sn'), # پایی
+
+    rule('noun_singular', 'detached', flags=
+         'sa'   # برادرم، برادرت، برادرش، برادرمان، برادرتان، برادرشان
+         'so'   # برادرم، برادری، برادرست، برادریم، برادرید، برادرند
+         'sd'   # برادرها
+                # برادرهای
+                # برادرهایی
+         'se'   # برادرهایم، برادرهایت، برادرهایش، برادرهایمان، برادرهایتان، برادرهایشان
+         'sf'   # برادرهاست
+         'sl'   # برادری
+         'sj'), # برادران، برادرانی
+
+    rule('noun_singular', 'ta_za', flags=
+         'sa'   # خطم، خطت، خطش، خطمان، خطتان، خطشان
+         'so'   # خطم، خطی، خطست، خطیم، خطید، خطند
+         'sg'   # خط‌ها
+                # خط‌های
+                # خط‌هایی
+         'sh'   # خط‌هایم، خط‌هایت، خط‌هایش، خط‌هایمان، خط‌هایتان، خط‌هایشان
+         'si'   # خط‌هاست
+         'sl'   # خطی
+         'sj'), # خیاطان، خیاطانی
+
+    rule('noun_singular', 'other', flags=
+         'sa'   # کتابم، کتابت، کتابش، کتابمان، کتابتان، کتابشان
+         'so'   # کتابم، کتابی، کتابست، کتابیم، کتابید، کتابند
+         'sg'   # کتاب‌ها
+                # کتاب‌های
+                # کتاب‌هایی
+         'sh'   # کتاب‌هایم، کتاب‌هایت، کتاب‌هایش، کتاب‌هایمان، کتاب‌هایتان، کتاب‌هایشان
+         'si'   # کتاب‌هاست
+         'sl'   # کتابی
+         'sj',  # صاحبان، صاحبانی
+         kam_dandane=
+         'sd'   # کتابها
+                # کتابهای
+                # کتابهایی
+         'se'   # کتابهایم، کتابهایت، کتابهایش، کتابهایمان، کتابهایتان، کتابهایشان
+         'sf'), # کتابهاست
+
+    rule('noun_plural', 'he', ends_with_aah_uh=True),  # وجوه
+
+    rule('noun_plural', 'he', ends_with_vowel=True, flags=
+         'sc'   # فلاسفه‌ام، فلاسفه‌ات، فلاسفه‌اش، فلاسفه‌مان، فلاسفه‌تان، فلاسفه‌شان
+         'sp'   # فلاسفه‌ام، فلاسفه‌ای، فلاسفه‌ایم، فلاسفه‌اید، فلاسفه‌اند
+         'sk'   # فلاسفه‌ی، فلاسفهٔ
+         'sm'), # فلاسفه‌ای
+
+    rule('noun_plural', 'he'),  # اشربه
+
+    rule('noun_plural', 'ye', flags=
+         'sc'   # فتاوی‌ام، فتاوی‌ات، فتاوی‌اش، فتاوی‌مان، فتاوی‌تان، فتاوی‌شان
+         'sp'   # فتاوی‌ام، فتاوی‌ای، فتاوی‌ایم، فتاوی‌اید، فتاوی‌اند
+         'sm'), # فتاوی‌ای
+
+    rule('noun_plural', 'waw', unpredicted=True),
+
+    rule('noun_plural', 'alef', flags=
+         'sb'   # هدایایم، هدایایت، هدایایش، هدایایمان، هدایایتان، هدایایشان
+         'sq'   # هدایایم، هدایایی، هدایاست، هدایاییم، هدایایید، هدایایند
+         'sv'   # هدایای
+         'sn'), # هدایایی
+
+    rule('noun_plural', 'ta_za', flags=
+         'sa'   # اقساطم، اقساطت، اقساطش، اقساطمان، اقساطتان، اقساطشان
+         'so'   # اقساطم، اقساطی، اقساطست، اقساطیم، اقساطید، اقساطند
+         'sl'), # اقساطی
+
+    rule('noun_plural', 'detached', flags=
+         'sa'   # آثارم، آثارت، آثارش، آثارمان، آثارتان، آثارشان
+         'so'   # آثارم، آثاری، آثارست، آثاریم، آثارید، آثارند
+         'sl'), # آثاری
+
+    rule('noun_plural', 'other', flags=
+         'sa'   # احزابم، احزابت، احزابش، احزابمان، احزابتان، احزابشان
+         'so'   # احزابم، احزابی، احزابست، احزابیم، احزابید، احزابند
+         'sl'), # احزابی
+
+
+### Adjective ########################################################################################
+    rule('adjective', 'he', ends_with_aah_uh=True, flags=
+         'sa'   # کوتاهم، کوتاهت، کوتاهش، کوتاهمان، کوتاهتان، کوتاهشان
+                # باشکوهم، باشکوهت، باشکوهش، باشکوهمان، باشکوهتان، باشکوهشان
+         'sr'   # کوتاهم، کوتاهی، کوتاهیم، کوتاهید، کوتاهند
+                # باشکوهم، باشکوهی، باشکوهیم، باشکوهید، باشکوهند
+         'sl'   # کوتاهی، باشکوهی
+         'sg'   # کوتاه‌ها، باشکوه‌ها
+                # کوتاه‌های، باشکوه‌های
+                # کوتاه‌هایی، باشکوه‌هایی
+         'si'   # کوتاه‌هاست، باشکوه‌هاست
+         'st'   # کوتاهترین
+         'su'), # کوتاه‌تر، کوتاه‌ترین
+                # باشکوه‌تر، باشکوه‌ترین
+                # کوتاه‌تری، باشکوه‌تری
+                # کوتاه‌ترها، کوتاه‌ترهای
+                # باشکوه‌ترها، باشکوه‌ترهای
+                # کوتاه‌ترین‌ها، کوتاه‌ترین‌های
+                # باشکوه‌ترین‌ها، باشکوه‌ترین‌های
+
+    rule('adjective', 'he', ends_with_vowel=True, flags=
+         'sc'   # شایسته‌ام، شایسته‌ات، شایسته‌اش، شایسته‌مان، شایسته‌تان، شایسته‌شان
+         'sp'   # شایسته‌ام، شایسته‌ای، شایسته‌ایم، شایسته‌اید، شایسته‌اند
+         'sk'   # شایسته‌ی، شایستهٔ
+         'sg'   # شایسته‌ها
+                # شایسته‌های
+                # شایسته‌هایی
+         'si'   # شایسته‌هاست
+         'su'), # شایسته‌تر، شایسته‌ترین
+                # شایسته‌تری
+                # شایسته‌ترها، شایسته‌ترهای
+                # شایسته‌ترین‌ها، شایسته‌ترین‌های
+
+    rule('adjective', 'he', flags=
+         'sc'   # کوتاه‌ام، کوتاه‌ات، کوتاه‌اش، کوتاه‌مان، کوتاه‌تان، کوتاه‌شان
+         'sp'   # کوتاه‌ام، کوتاه‌ای، کوتاه‌ایم، کوتاه‌اید، کوتاه‌اند
+         'sl'   # کوتاهی
+         'sg'   # کوتاه‌ها
+                # کوتاه‌های
+                # کوتاه‌هایی
+         'si'   # کوتاه‌هاست
+         'su'), # کوتاه‌تر، کوتاه‌ترین
+                # کوتاه‌تری
+                # کوتاه‌ترها، کوتاه‌ترهای
+                # کوتاه‌ترین‌ها، کوتاه‌ترین‌های
+
+    rule('adjective', 'waw', ends_with_vowel=True, flags=
+         'sb'   # پررویم، پررویت، پررویش، پررویمان، پررویتان، پررویشان
+         'sq'   # پررویم، پررویی، پرروست، پرروییم، پررویید، پررویند
+         'sv'   # پرروی
+         'sn'   # پررویی
+         'sd'   # پرروها
+                # پرروهای
+                # پرروهایی
+         'sf'   # پرروهاست
+         'st'), # پرروتر، پرروترین
+                # پرروتری
+                # پرروترها، پرروترهای
+                # پرروترین‌ها، پرروترین‌های
+
+    rule('adjective', 'waw', flags=
+         'sa'   # کنجکاوم، کنجکاوت، کنجکاوش، کنجکاومان، کنجکاوتان، کنجکاوشان
+         'sr'   # کنجکاوم، کنجکاوی، کنجکاویم، کنجکاوید، کنجکاوند
+         'sl'   # کنجکاوی
+         'sd'   # کنجکاوها
+                # کنجکاوهای
+                # کنجکاوهایی
+         'sf'   # کنجکاوهاست
+         'st'   # کنجکاوتر، کنجکاوترین
+                # کنجکاوتری
+                # کنجکاوترها، کنجکاوترهای
+                # کنجکاوترین‌ها، کنجکاوترین‌های
+         'sj'), # کنجکاوان، کنجکاوانی
+
+    rule('adjective', 'ye', flags=
+         'sc'   # عالی‌ام، عالی‌ات، عالی‌اش، عالی‌مان، عالی‌تان، عالی‌شان
+         'sp'   # عالی‌ام، عالی‌ای، عالی‌ایم، عالی‌اید، عالی‌اند
+         'sm'   # عالی‌ای
+         'sg'   # عالی‌ها
+                # عالی‌های
+                # عالی‌هایی
+         'si'   # عالی‌هاست
+         'su',  # عالی‌تر، عالی‌ترین
+                # عالی‌تری
+                # عالی‌ترها، عالی‌ترهای
+                # عالی‌ترین‌ها، عالی‌ترین‌های
+         kam_dandane=
+         'sd'   # فلسطینیها
+                # فلسطینیهای
+                # فلسطینیهایی
+         'sf'), # فلسطینیهاست
+
+    rule('adjective', 'alef', flags=
+         'sb'   # اعلایم، اعلایت، اعلایش، اعلایمان، اعلایتان، اعلایشان
+         'sq'   # اعلایم، اعلایی، اعلاست، اعلاییم، اعلایید، اعلایند
+         'sv'   # اعلای
+         'sn'   # اعلایی
+         'sd'   # اعلاها
+                # اعلاهای
+                # اعلاهایی
+         'sf'   # اعلاهاست
+         'st'), # اعلاتر، اعلاترین
+                # اعلاتری
+                # اعلاترها، اعلاترهای
+                # اعلاترین‌ها، اعلاترین‌های
+
+    rule('adjective', 'detached', flags=
+         'sa'   # آبادم، آبادت، آبادش، آبادمان، آبادتان، آبادشان
+         'so'   # آبادم، آبادی، آبادست، آبادیم، آبادید، آبادند
+         'sl'   # آبادی
+         'sd'   # آبادها
+                # آبادهای
+                # آبادهایی
+         'sf'   # آبادهاست
+         'st'   # آبادتر، آبادترین
+                # آبادتری
+                # آبادترها، آبادترهای
+                # آبادترین‌ها، آبادترین‌های
+         'sj'), # تنومندان، تنومندانی
+
+    rule('adjective', 'ta_za', flags=
+         'sa'   # بانشاطم، بانشاطت، بانشاطش، بانشاطمان، بانشاطتان، بانشاطشان
+         'so'   # بانشاطم، بانشاطی، بانشاطست، بانشاطیم، بانشاطید، بانشاطند
+         'sl'   # بانشاطی
+         'sg'   # بانشاط‌ها
+                # بانشاط‌های
+                # بانشاط‌هایی
+         'si'   # بانشاط‌هاست
+         'st'   # بانشاطتر، بانشاطترین
+                # بانشاطتری
+                # بانشاطترها، بانشاطترهای
+                # بانشاطترین‌ها، بانشاطترین‌های
+         'su'   # بانشاط‌تر، بانشاط‌ترین
+                # بانشاط‌تری
+                # بانشاط‌ترها، بانشاط‌ترهای
+                # بانشاط‌ترین‌ها، بانشاط‌ترین‌های
+         'sj'), # بانشاطان، بانشاطانی
+
+    rule('adjective', 'other', flags=
+         'sa'   # مرتبم، مرتبت، مرتبش، مرتبمان، مرتبتان، مرتبشان
+         'so'   # مرتبم، مرتبی، مرتبست، مرتبیم، مرتبید، مرتبند
+         'sl'   # مرتبی
+         'sg'   # مرتب‌ها
+                # مرتب‌های
+                # مرتب‌هایی
+         'si'   # مرتب‌هاست
+         'su'   # مرتب‌تر، مرتب‌ترین
+                # مرتب‌تری
+                # مرتب‌ترها، مرتب‌ترهای
+                # مرتب‌ترین‌ها، مرتب‌ترین‌های
+         'sj',  # خوبان، خوبانی
+         kam_dandane=
+         'sd'   # مرتبها
+                # مرتبهای
+                # مرتبهایی
+         'sf'   # مرتبهاست
+         'st'), # مرتبتر، مرتبترین
+                # مرتبتری
+                # مرتبترها، مرتبترهای
+                # مرتبترین‌ها، مرتبترین‌های
+
+    rule('adjective_comparative', 'he', unpredicted=True),
+    rule('adjective_comparative', 'waw', unpredicted=True),
+    rule('adjective_comparative', 'ye'),  # بارزتری، جوانتری
+
+    rule('adjective_comparative', 'detached', flags=
+         'sa'   # ارشدم، ارشدت، ارشدش، ارشدمان، ارشدتان، ارشدشان
+         'so'   # ارشدم، ارشدی، ارشدست، ارشدیم، ارشدید، ارشدند
+         'sl'   # ارشدی
+         'sd'   # ارشدها
+                # ارشدهای
+                # ارشدهایی
+         'sf'), # ارشدهاست
+
+    rule('adjective_comparative', 'ta_za', unpredicted=True),
+
+    rule('adjective_comparative', 'other', flags=
+         'sa'   # افزونم، افزونت، افزونش، افزونمان، افزونتان، افزونشان
+         'so'   # افزونم، افزونی، افزونست، افزونیم، افزونید، افزونند
+         'sl'   # افزونی
+         'sg'), # افزون‌ها
+                # افزون‌های
+                # افزون‌هایی
+         ## 'si'   # [???] افزون‌هاست
+
+    rule('adjective_superlative', 'he', unpredicted=True),
+    rule('adjective_superlative', 'waw', unpredicted=True),
+    rule('adjective_superlative', 'ye', unpredicted=True),
+
+    rule('adjective_superlative', 'detached', flags=
+         'sa'   # اولی‌ترم، اولی‌ترت، اولی‌ترش، اولی‌ترمان، اولی‌ترتان، اولی‌ترشان
+         'so'   # اولی‌ترم، اولی‌تری، اولی‌ترست، اولی‌تریم، اولی‌ترید، اولی‌ترند
+         'sl'   # اولی‌تری
+         'sd'   # اولی‌ترها
+                # اولی‌ترهای
+                # اولی‌ترهایی
+         'sf'), # اولی‌ترهاست
+
+    rule('adjective_superlative', 'ta_za', unpredicted=True),
+
+    rule('adjective_superlative', 'other', flags=
+         'sa'   # بهترینم، بهترینت، بهترینش، بهترینمان، بهترینتان، بهترینشان
+         'so'   # بهترینم، بهترینی، بهترینست، بهترینیم، بهترینید، بهترینند
+         'sl'   # بهترینی
+         'sg'   # بهترین‌ها
+                # بهترین‌های
+                # بهترین‌هایی
+         'si',  # بهترین‌هاست
+         kam_dandane=
+         'sd'   # بهترینها
+                # بهترینهای
+                # بهترینهایی
+         'se'   # بهترینهایم، بهترینهایت، بهترینهایش، بهترینهایمان، بهترینهایتان، بهترینهایشان
+         'sf'), # بهترینهاست
+
+
+### Adverb ########################################################################################
+    rule('adverb', 'other'),
+
+### Pronoun ########################################################################################
+    rule('pronoun', 'other'),
+
+### Number ########################################################################################
+    rule('numeral', 'other'),
+
+### Neda ########################################################################################
+    rule('interjection', 'other'),
+
+### Preposition ########################################################################################
+    rule('adposition', 'other'),
+
+### Conjunction ########################################################################################
+    rule('conjunction', 'other'),
+
+### classifier ########################################################################################
+    rule('classifier', 'other'),
+
+### Foreign ########################################################################################
+    rule('foreign', 'he'),
+    rule('foreign', 'other', flags=
+         'sl'), # طرفة‌العینی
+]
+
+
+def parse_bool(value):
+    # '' matches anything, '1' and '0' match set and unset attributes
+    value = value.strip()
+    if not value:
+        return None
+
+    return value not in ('0', 'false', 'False')
+
+
+class Rules:
+    def __init__(self, rules=None, base=None):
+        self.rules = list(RULES if rules is None else rules)
+        self.base = dict(BASE if base is None else base)
+        self.dispatch = None
+
+
+    def add(self, pos, letter, flags='', kam_dandane='', ends_with_vowel=None, ends_with_aah_uh=None, unpredicted=False):
+        # added rules take priority over the existing ones
+        if letter not in LETTERS:
+            raise ValueError('unknown letter class: {0}'.format(letter))
+
+        self.rules.insert(0, rule(pos, letter, flags, kam_dandane, ends_with_vowel, ends_with_aah_uh, unpredicted))
+        self.dispatch = None
+
+
+    def load(self, filename):
+        # rules file: pos,letter,ends_with_vowel,ends_with_aah_uh,flags,kam_dandane
+        # the later rows take priority over the former ones.
+        # `pos,base,,,flags` sets the flags added to every entry of a pos.
+        if not os.path.isfile(filename):
+            raise IOError('file does not exist: %s' % filename)
+
+        with open(filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('#') or not line.strip():
+                    continue
+
+                tags = [tag.strip() for tag in line.rstrip('\n').split(',')]
+                tags += [''] * (6 - len(tags))
+                pos, letter, vowel, aah_uh, flags, kam_dandane = tags[:6]
+
+                if letter == 'base':
+                    self.base[pos] = flags
+                    self.dispatch = None
+                    continue
+
+                self.add(pos, letter, flags, kam_dandane, parse_bool(vowel), parse_bool(aah_uh))
+
+
+    def compile(self):
+        # dispatch[pos][final letter] is a tuple of four labels indexed by
+        # (ends_with_vowel, ends_with_aah_uh)
+        by_pos = collections.OrderedDict()
+        for r in self.rules:
+            by_pos.setdefault(r.pos, []).append(r)
+
+        self.dispatch = {}
+        for pos, rules in by_pos.items():
+            base = self.base.get(pos, '')
+            classes = [name for name in LETTERS if any(r.letter == name for r in rules)]
+
+            def labels(name):
+                variants = []
+                for vowel in (False, True):
+                    for aah_uh in (False, True):
+                        label = None
+                        for r in rules:
+                            if r.letter != name:
+                                continue
+                            if r.ends_with_vowel is not None and r.ends_with_vowel != vowel:
+                                continue
+                            if r.ends_with_aah_uh is not None and r.ends_with_aah_uh != aah_uh:
+                                continue
+                            label = Label(base + r.flags, r.kam_dandane, r.unpredicted, r)
+                            break
+                        variants.append(label)
+                return tuple(variants)
+
+            table = {}
+            # letters are checked in order, the first class containing the letter wins
+            for name in reversed(classes):
+                for letter in LETTERS[name]:
+                    table[letter] = labels(name)
+
+            table[None] = labels('other') if 'other' in classes else (None,) * 4
+            self.dispatch[pos] = table
+
+
+    def lookup(self, pos):
+        # the dispatch table of a part-of-speech, None for unknown tags
+        if self.dispatch is None:
+            self.compile()
+
+        table = self.dispatch.get(pos)
+        if table is None:
+            for prefix in POS_PREFIXES:
+                if pos.startswith(prefix) and prefix in self.dispatch:
+                    table = self.dispatch[prefix]
+                    self.dispatch[pos] = table
+                    break
+
+        return table
+
+
+    def match(self, pos, word, ends_with_vowel, ends_with_aah_uh):
+        # returns (found, label); label is None when no rule matches
+        table = self.lookup(pos)
+        if table is None:
+            return False, None
+
+        variants = table.get(word[-1], table[None])
+        return True, variants[(2 if ends_with_vowel else 0) + (1 if ends_with_aah_uh else 0)]
@@ -0,0 +1,287 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Batch spell checking service.
+#
+# One dictionary is loaded and shared by all the requests. Tokens are
+# deduplicated in each batch and the spell and suggest results are kept in
+# an LRU cache, so frequent words are checked once. With an n-gram model
+# (see `ngram.py`) the suggestions of each misspelling are ranked by the
+# words around it.
+#
+#   POST /check  {"documents": ["...", ...]}
+#     -> {"results": [[{"word": w, "offset": n, "suggestions": [...]}, ...], ...]}
+#     -> 400 {"error": ...} if documents is not a list of strings
+#   GET  /stats
+#
+# Run it from `src` folder: python3 service.py --port 8080
+
+import os
+import sys
+import json
+import argparse
+import threading
+import traceback
+import collections
+import socketserver
+import http.server
+from concurrent.futures import ThreadPoolExecutor
+
+from checker import Checker
+from ngram import NgramModel, MAX_ORDER
+from tokenizer import tokenize
+
+
+CACHE_SIZE = 100000
+THREADS = 4
+
+
+class LRUCache:
+    def __init__(self, size):
+        self.size = size
+        self.items = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+
+    def get(self, key):
+        with self.lock:
+            value = self.items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+
+            self.items.move_to_end(key)
+            self.hits += 1
+            return value
+
+
+    def put(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            if len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+
+    def stats(self):
+        with self.lock:
+            return {'size': len(self.items), 'capacity': self.size,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+class BatchChecker:
+    def __init__(self, checker, cache_size=CACHE_SIZE, model=None):
+        self.checker = checker
+        self.cache = LRUCache(cache_size)
+        self.model = model
+
+
+    def result(self, word):
+        # None for correct words, the list of suggestions for misspellings
+        cached = self.cache.get(word)
+        if cached is not None:
+            return cached[0]
+
+        if self.checker.spell(word):
+            suggestions = None
+        else:
+            suggestions = self.checker.suggest(word)
+
+        self.cache.put(word, (suggestions,))
+        return suggestions
+
+
+    def check_documents(self, documents):
+        tokens = [list(tokenize(text)) for text in documents]
+
+        # each word is checked once in the batch
+        results = {}
+        for document in tokens:
+            for word, _ in document:
+                if word not in results:
+                    results[word] = self.result(word)
+
+        misspellings = []
+        for document in tokens:
+            misspellings.append([
+                {'word': word, 'offset': offset, 'suggestions': self.rank(document, i, results[word])}
+                for i, (word, offset) in enumerate(document) if results[word] is not None])
+
+        return misspellings
+
+
+    def rank(self, document, i, suggestions):
+        # suggestions of the i-th token, ranked by its context
+        if self.model is None or len(suggestions) < 2:
+            return suggestions
+
+        context = MAX_ORDER - 1
+        before = [word for word, _ in document[max(0, i - context):i]]
+        after = [word for word, _ in document[i + 1:i + 1 + context]]
+        return self.model.rank(suggestions, before, after)
+
+
+class ThreadPoolMixIn:
+    # like socketserver.ThreadingMixIn, but with a bounded number of threads
+
+    def __init__(self, *args, threads=THREADS, **kwargs):
+        self.executor = ThreadPoolExecutor(threads)
+        super().__init__(*args, **kwargs)
+
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path != '/stats':
+            return self.reply(404, {'error': 'not found'})
+
+        self.reply(200, self.server.batch.cache.stats())
+
+
+    def do_POST(self):
+        if self.path != '/check':
+            return self.reply(404, {'error': 'not found'})
+
+        try:
+            size = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(size).decode('utf-8'))
+            documents = request['documents']
+            if isinstance(documents, str):
+                documents = [documents]
+            if not isinstance(documents, list) or not all(isinstance(text, str) for text in documents):
+                raise TypeError('documents must be a list of strings')
+        except (ValueError, KeyError, TypeError):
+            return self.reply(400, {'error': 'bad request'})
+
+        try:
+            results = self.server.batch.check_documents(documents)
+        except Exception:
+            self.log_error('check failed:\n%s', traceback.format_exc())
+            return self.reply(500, {'error': 'internal error'})
+
+        self.reply(200, {'results': results})
+
+
+    def reply(self, code, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def log_message(self, format, *args):
+        debug(format % args)
+
+
+    def log_error(self, format, *args):
+        # errors are logged without --debug
+        print(format % args, file=sys.stderr)
+
+
+    def address_string(self):
+        # unix sockets have no client address
+        return self.client_address[0] if self.client_address else 'unix'
+
+
+class HTTPServer(ThreadPoolMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+class UnixHTTPServer(ThreadPoolMixIn, socketserver.UnixStreamServer):
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        socketserver.UnixStreamServer.server_bind(self)
+        # fields used by BaseHTTPRequestHandler
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+def debug(msg):
+    if DEBUG:
+        print(msg, file=sys.stderr)
+
+
+DEBUG = 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d', '--dic', default='../build/fa-IR.dic', help='hunspell dictionary')
+    parser.add_argument('-a', '--aff', default='../build/fa-IR.aff', help='hunspell affix file')
+    parser.add_argument('-w', '--wordlist', help='prebuilt word list, instead of the dictionary')
+    parser.add_argument('-i', '--index', help='prebuilt suggestion index, needs --wordlist')
+    parser.add_argument('-n', '--ngram', help='n-gram model, to rank the suggestions by context')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('-p', '--port', type=int, default=8080)
+    parser.add_argument('-s', '--socket', help='listen on a unix socket instead of tcp')
+    parser.add_argument('-t', '--threads', type=int, default=THREADS)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE)
+    parser.add_argument('--debug', action='store_true')
+    args = parser.parse_args()
+
+    DEBUG = args.debug
+
+    if args.wordlist:
+        checker = Checker.open(args.wordlist, args.aff, args.index)
+    else:
+        checker = Checker.load(args.dic, args.aff)
+
+    if args.socket:
+        server = UnixHTTPServer(args.socket, Handler, threads=args.threads)
+        print('listening on {0}'.format(args.socket))
+    else:
+        server = HTTPServer((args.host, args.port), Handler, threads=args.threads)
+        print('listening on {0}:{1}'.format(args.host, args.port))
+
+    model = NgramModel(args.ngram) if args.ngram else None
+    if model:
+        model.open()  # before the threads
+    server.batch = BatchChecker(checker, args.cache_size, model)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
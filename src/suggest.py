@@ -0,0 +1,291 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Precomputed suggestion index (symmetric delete, like SymSpell).
+#
+# For each word of the word list all the strings made by deleting up to
+# `max_distance` characters are hashed (crc32) and kept in a sorted table
+# with the rank of the word. A lookup deletes characters of the misspelled
+# word the same way, finds the ranks in the table and verifies the words
+# with the edit distance. Nosuggest words are never suggested.
+#
+# Like SymSpell, only the first `prefix_length` characters can be indexed to
+# make the index smaller (the words sharing a prefix are contiguous in the
+# word list). By default the whole word is indexed, which keeps the lookups
+# under a millisecond.
+#
+# Candidates are ranked by a weighted distance: replacing a character with a
+# neighbour key (KEY) or a similar letter (MAP) costs less than other edits.
+#
+# Layout (little endian):
+#
+#   header   : magic 'LLKS', version (u16), max distance (u16), prefix
+#              length (u16), reserved (u16), number of prefixes (u32),
+#              number of deletes (u32)
+#   ranks    : rank of the first word of each prefix (u32), plus the count
+#   hashes   : sorted hashes of the deletes (u32)
+#   prefixes : prefix index of each hash (u32)
+
+import os
+import mmap
+import zlib
+import array
+import struct
+import bisect
+
+from wordlist import NOSUGGEST
+
+
+MAGIC = b'LLKS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHHHII')
+MAX_DISTANCE = 1
+PREFIX_LENGTH = 32  # longer than any word
+BUCKETS = 256
+MAX_SUGGESTIONS = 15
+NEAR_COST = 0.5  # substitution of a neighbour key or a similar letter
+
+
+def deletes(word, distance):
+    # the word and all the strings with up to `distance` characters deleted
+    result = {word}
+    edges = {word}
+    for _ in range(distance):
+        edges = set(w[:i] + w[i + 1:] for w in edges if w for i in range(len(w)))
+        result |= edges
+    return result
+
+
+def key_hash(s):
+    return zlib.crc32(s.encode('utf-8'))
+
+
+def within_one(a, b):
+    # 0 or 1 if the distance of the words is at most one, otherwise None
+    if a == b:
+        return 0
+
+    i = 0
+    size = min(len(a), len(b))
+    while i < size and a[i] == b[i]:
+        i += 1
+
+    if len(a) == len(b):
+        if a[i + 1:] == b[i + 1:]:
+            return 1
+        # swapped characters
+        if a[i + 1:i + 2] == b[i:i + 1] and a[i:i + 1] == b[i + 1:i + 2] and a[i + 2:] == b[i + 2:]:
+            return 1
+        return None
+
+    if len(a) == len(b) + 1:
+        return 1 if a[i + 1:] == b[i:] else None
+
+    if len(b) == len(a) + 1:
+        return 1 if a[i:] == b[i + 1:] else None
+
+    return None
+
+
+def distance(a, b, limit):
+    # Damerau-Levenshtein (optimal string alignment), None above `limit`
+    if abs(len(a) - len(b)) > limit:
+        return None
+
+    if limit == 1:
+        return within_one(a, b)
+
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        current = [i] + [0] * len(b)
+        best = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            d = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == b[j - 1]:
+                d = min(d, prev2[j - 2] + 1)
+            current[j] = d
+            if d < best:
+                best = d
+
+        if best > limit:
+            return None
+
+        prev2, prev = prev, current
+
+    return prev[-1] if prev[-1] <= limit else None
+
+
+def near_pairs(affixes):
+    # neighbour keys of the keyboard and letters in the same MAP group
+    near = set()
+    for row in affixes.key:
+        for a, b in zip(row, row[1:]):
+            near.add((a, b))
+            near.add((b, a))
+
+    for group in affixes.map:
+        for a in group:
+            for b in group:
+                if a != b:
+                    near.add((a, b))
+
+    return near
+
+
+def weighted_distance(a, b, near):
+    # same as `distance`, but cheaper for near substitutions
+    prev2 = None
+    prev = [float(j) for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        current = [float(i)] + [0.0] * len(b)
+        for j in range(1, len(b) + 1):
+            cb = b[j - 1]
+            if ca == cb:
+                cost = 0.0
+            elif (ca, cb) in near:
+                cost = NEAR_COST
+            else:
+                cost = 1.0
+            d = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                d = min(d, prev2[j - 2] + 1)
+            current[j] = d
+        prev2, prev = prev, current
+
+    return prev[-1]
+
+
+def write_index(filename, wordlist, max_distance=MAX_DISTANCE, prefix_length=PREFIX_LENGTH):
+    # the rank of the first word of each prefix, the deletes of the prefixes
+    # are bucketed by the high bits of their hash to sort them in pieces
+    ranks = array.array('I')
+    buckets = [array.array('Q') for _ in range(BUCKETS)]
+    shift = 32 - (BUCKETS - 1).bit_length()
+
+    last = None
+    for rank, word in enumerate(wordlist):
+        prefix = word[:prefix_length]
+        if prefix == last:
+            continue
+
+        i = len(ranks)
+        ranks.append(rank)
+        last = prefix
+        for d in deletes(prefix, max_distance):
+            h = key_hash(d)
+            buckets[h >> shift].append(h << 32 | i)
+
+    ranks.append(len(wordlist))
+
+    hashes = array.array('I')
+    ids = array.array('I')
+    for i, bucket in enumerate(buckets):
+        for pair in sorted(bucket):
+            hashes.append(pair >> 32)
+            ids.append(pair & 0xFFFFFFFF)
+        buckets[i] = None
+
+    tmp = filename + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, max_distance, prefix_length, 0, len(ranks) - 1, len(hashes)))
+        for table in (ranks, hashes, ids):
+            f.write(table.tobytes())
+
+    os.replace(tmp, filename)
+
+
+class SuggestIndex:
+    def __init__(self, filename, wordlist, affixes):
+        self.filename = filename
+        self.wordlist = wordlist
+        self.affixes = affixes
+        self.near = near_pairs(affixes)
+        self.buf = None
+
+
+    def open(self):
+        if self.buf is not None:
+            return
+
+        with open(self.filename, 'rb') as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.max_distance, self.prefix_length, _, count, deletes = \
+            HEADER.unpack_from(self.buf, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('not a lilak suggestion index: {0}'.format(self.filename))
+
+        # the tables are u32 arrays viewed right in the mapped file
+        view = memoryview(self.buf)
+        pos = HEADER.size
+        tables = []
+        for size in (count + 1, deletes, deletes):
+            tables.append(view[pos:pos + size * 4].cast('I'))
+            pos += size * 4
+        self.ranks, self.hashes, self.ids = tables
+
+
+    def close(self):
+        if self.buf is not None:
+            self.ranks = self.hashes = self.ids = None
+            self.buf.close()
+            self.buf = None
+
+
+    def candidates(self, word, max_distance):
+        # prefixes sharing a delete with the prefix of the word
+        hashes = self.hashes
+        found = set()
+        for d in deletes(word[:self.prefix_length], max_distance):
+            h = key_hash(d)
+            i = bisect.bisect_left(hashes, h)
+            while i < len(hashes) and hashes[i] == h:
+                found.add(self.ids[i])
+                i += 1
+        return found
+
+
+    def suggest(self, word, max_distance=None, limit=MAX_SUGGESTIONS):
+        self.open()
+        word = self.affixes.clean(word)
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+
+        ranks = self.ranks
+        ranges = [(ranks[i], ranks[i + 1]) for i in sorted(self.candidates(word, max_distance))]
+
+        scored = []
+        for form, flags in self.wordlist.ranges(ranges):
+            if flags & NOSUGGEST or form == word:
+                continue
+
+            d = distance(word, form, max_distance)
+            if d is not None:
+                scored.append((weighted_distance(word, form, self.near), d, form))
+
+        scored.sort()
+        return [form for _, _, form in scored[:limit]]
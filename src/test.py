@@ -19,67 +19,265 @@
 
 # -*- coding: utf-8 -*-
 
-import hunspell
-hobj = hunspell.HunSpell('../build/fa-IR.dic', '../build/fa-IR.aff')
-result = open('../test/result.log', 'w', encoding='utf-8')
+# Accuracy test of the dictionary on the texts of the `test` folder.
+#
+# The words of each text are checked and the misspelled ones are listed with
+# their suggestions. The reference engine is hunspell (pyhunspell), which the
+# dictionary is built for; without it the python checker (`checker.py`) is
+# used. The texts are checked in parallel, by worker processes sharing one
+# loaded checker. The result of each text is cached with the digests of the
+# dictionary, of the checking code and of the text, so after a change only
+# the texts checked by another dictionary or code are checked again.
+#
+# Outputs:
+#   ../test/result.log  the misspelled words and their suggestions, and the
+#                       total accuracy
+#   ../build/test.json  accuracy, time and misspelled words of each text, and
+#                       the words gained and lost since the previous run
+#
+# Run it from `src` folder, after the build:
+#   python3 test.py
+#   python3 test.py --native   (with the python checker, even if pyhunspell is installed)
 
-detected = 0
-not_detected = 0
+import os
+import re
+import json
+import time
+import hashlib
+import argparse
+import importlib.util
+import multiprocessing
 
-def run_test(filename):
-    global detected
-    global not_detected
+from cache import file_digest
+from checker import Checker
+from tokenizer import tokenize
 
-    print('processing \'{0}\' ...'.format(filename))
-    result.write(filename + '\n')
 
-    f = open(filename, 'r', encoding='utf-8')
-    lines = f.readlines()
-    for line in lines:
+TEST_FOLDER = '../test'
 
-        if line.startswith('#'): # ignore comment lines
-            continue
+# the code of the checkers, part of the cache key
+SOURCES = ('test.py', 'tokenizer.py', 'checker.py', 'affixes.py', 'wordlist.py', 'suggest.py')
+
+# the checker of a worker process, inherited when processes are forked
+CHECKER = None
+
+
+class HunspellChecker:
+    def __init__(self, dic_filename, aff_filename):
+        import hunspell
+        self.hobj = hunspell.HunSpell(dic_filename, aff_filename)
+
+
+    def spell(self, word):
+        return self.hobj.spell(word)
+
+
+    def suggest(self, word):
+        return self.hobj.suggest(word)
+
+
+def hunspell_available():
+    return importlib.util.find_spec('hunspell') is not None
+
+
+def load_checker(dic_filename, aff_filename, wordlist=None, index=None, use_hunspell=False):
+    global CHECKER
+    if CHECKER is None:
+        if use_hunspell:
+            CHECKER = HunspellChecker(dic_filename, aff_filename)
+        elif wordlist:
+            CHECKER = Checker.open(wordlist, aff_filename, index)
+        else:
+            CHECKER = Checker.load(dic_filename, aff_filename)
 
-        tokens = line[:-1].split(' ')
-        for token in tokens:
-            word = token.strip((' ?.!؟»«،:؛()[]-"/\\\t\'…'))
-
-            # ignore commented words
-            if word.startswith('#'):
-                continue
-
-            if not hobj.spell(word):
-                not_detected = not_detected + 1
-                suggests = ''
-                for s in hobj.suggest(word):
-                    suggests += s
-                    suggests += ', '
-                result.write('*{0}: {1}\n'.format(word, suggests[:-2]))
+    return CHECKER
+
+
+def discover(folder=TEST_FOLDER):
+    # the texts of the folder, text2 before text10
+    def key(name):
+        return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+    names = [name for name in os.listdir(folder)
+             if not name.startswith(('.', 'result')) and os.path.isfile(os.path.join(folder, name))]
+    return [os.path.join(folder, name) for name in sorted(names, key=key)]
+
+
+def accuracy(detected, not_detected):
+    words = detected + not_detected
+    return (detected * 100.0) / words if words else 100.0
+
+
+def check_file(filename):
+    # the result of a text: counts, time and the misspelled words with
+    # their suggestions, in the order of the text
+    start = time.perf_counter()
+    detected = 0
+    misses = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        for word, _ in tokenize(f, comments=True):
+            if CHECKER.spell(word):
+                detected += 1
             else:
-                detected = detected + 1
-            ##     stems = ''
-            ##     for s in hobj.analyze(word):
-            ##         stems += s.decode('utf-8')
-            ##         stems += ', '
-            ##     result.write('{0} -> {1}\n'.format(word, stems[:-2]))
+                misses.append([word, list(CHECKER.suggest(word))])
+
+    return {
+        'file': filename,
+        'detected': detected,
+        'not_detected': len(misses),
+        'accuracy': accuracy(detected, len(misses)),
+        'seconds': round(time.perf_counter() - start, 4),
+        'misses': misses,
+    }
+
+
+def dictionary_digest(files, checker_kind):
+    # digest of the dictionary files and of the code checking the texts
+    h = hashlib.sha1(checker_kind.encode('utf-8'))
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for filename in list(files) + [os.path.join(folder, name) for name in SOURCES]:
+        h.update((file_digest(filename) or '').encode('ascii'))
+
+    return h.hexdigest()
+
+
+def read_json(filename):
+    if not filename or not os.path.isfile(filename):
+        return {}
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        try:
+            return json.load(f)
+        except ValueError:
+            return {}
+
+
+def write_json(filename, data):
+    tmp = filename + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+        f.write('\n')
+
+    os.replace(tmp, filename)
+
+
+def run(files, checker_args, dictionary, cache, jobs=None):
+    # results of the files, in order; `cache` is updated
+    results = {}
+    todo = []
+    for filename in files:
+        key = '{0}:{1}'.format(dictionary, file_digest(filename))
+        result = cache.get(key)
+        if result is not None:
+            results[filename] = dict(result, file=filename, cached=True)
+        else:
+            todo.append((filename, key))
+
+    if todo:
+        # loaded before the pool, so forked workers share it
+        load_checker(*checker_args)
+
+        jobs = min(jobs or os.cpu_count() or 1, len(todo))
+        names = [filename for filename, _ in todo]
+        if jobs == 1:
+            checked = map(check_file, names)
+            for (filename, key), result in zip(todo, checked):
+                results[filename] = cache[key] = result
+        else:
+            with multiprocessing.Pool(jobs, initializer=load_checker, initargs=checker_args) as pool:
+                for (filename, key), result in zip(todo, pool.imap(check_file, names)):
+                    results[filename] = cache[key] = result
+
+    return [results[filename] for filename in files]
+
+
+def diff(previous, results):
+    # {file: {'gained': [...], 'lost': [...]}} for the files with changes;
+    # gained words are accepted now, lost words are not accepted anymore
+    old = {r['file']: set(word for word, _ in r['misses']) for r in previous.get('files', ())}
+    changes = {}
+    for result in results:
+        if result['file'] not in old:
+            continue
+
+        misses = set(word for word, _ in result['misses'])
+        gained = sorted(old[result['file']] - misses)
+        lost = sorted(misses - old[result['file']])
+        if gained or lost:
+            changes[result['file']] = {'gained': gained, 'lost': lost}
+
+    return changes
+
+
+def write_log(filename, results):
+    detected = sum(r['detected'] for r in results)
+    not_detected = sum(r['not_detected'] for r in results)
+
+    with open(filename, 'w', encoding='utf-8') as result:
+        for r in results:
+            result.write(r['file'] + '\n')
+            for word, suggests in r['misses']:
+                result.write('*{0}: {1}\n'.format(word, ', '.join(suggests)))
+
+        result.write('detected: {0}, not_detected {1}, accuracy {2}\n'.format(
+            detected, not_detected, accuracy(detected, not_detected)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('files', nargs='*', help='texts to check, all the texts of the test folder by default')
+    parser.add_argument('-d', '--dic', default='../build/fa-IR.dic', help='hunspell dictionary')
+    parser.add_argument('-a', '--aff', default='../build/fa-IR.aff', help='hunspell affix file')
+    parser.add_argument('-w', '--wordlist', help='prebuilt word list, instead of the dictionary')
+    parser.add_argument('-s', '--suggest', help='suggestion index of the word list')
+    parser.add_argument('--native', action='store_true', help='check with the python checker, not pyhunspell')
+    parser.add_argument('-j', '--jobs', type=int, help='number of processes, all the cores by default')
+    parser.add_argument('-c', '--cache', default='../build/test-cache.json', help='cache of the results')
+    parser.add_argument('--no-cache', action='store_true', help='check all the texts again')
+    parser.add_argument('-o', '--output', default='../build/test.json', help='JSON results')
+    parser.add_argument('-l', '--log', default='../test/result.log', help='text results')
+    args = parser.parse_args()
+
+    files = args.files or discover()
+    start = time.perf_counter()
+
+    use_hunspell = not args.native and hunspell_available()
+    checker_kind = 'hunspell' if use_hunspell else 'lilak'
+    print('checking with {0}'.format('pyhunspell' if use_hunspell else 'the python checker'))
+    inputs = [args.dic, args.aff] if use_hunspell or not args.wordlist else [args.wordlist, args.aff, args.suggest]
+    dictionary = dictionary_digest(inputs, checker_kind)
 
+    cache = {} if args.no_cache else read_json(args.cache)
+    checker_args = (args.dic, args.aff, args.wordlist, args.suggest, use_hunspell)
+    results = run(files, checker_args, dictionary, cache, args.jobs)
 
+    if not args.no_cache:
+        # only the results of the current dictionary are kept
+        write_json(args.cache, {key: value for key, value in cache.items() if key.startswith(dictionary)})
 
-run_test('../test/text1')
-run_test('../test/text2')
-run_test('../test/text3')
-run_test('../test/text4')
-run_test('../test/text5')
-run_test('../test/text6')
-run_test('../test/text7')
-run_test('../test/text8')
-run_test('../test/text9')
-run_test('../test/text10')
-run_test('../test/text11')
-run_test('../test/verbs')
+    for r in results:
+        print('{0}: {1:.2f}% ({2} not detected, {3:.3f}s{4})'.format(
+            r['file'], r['accuracy'], r['not_detected'], r['seconds'], ', cached' if r.pop('cached', False) else ''))
 
-percentage = ((detected * 100.0) / (detected + not_detected))
-result.write('detected: {0}, not_detected {1}, accuracy {2}\n'.format(detected, not_detected, percentage))
+    detected = sum(r['detected'] for r in results)
+    not_detected = sum(r['not_detected'] for r in results)
+    report = {
+        'dictionary': dictionary,
+        'checker': checker_kind,
+        'detected': detected,
+        'not_detected': not_detected,
+        'accuracy': accuracy(detected, not_detected),
+        'seconds': round(time.perf_counter() - start, 4),
+        'files': results,
+        'diff': diff(read_json(args.output), results),
+    }
 
-result.close()
+    for filename, change in report['diff'].items():
+        for word in change['gained']:
+            print('{0}: +{1}'.format(filename, word))
+        for word in change['lost']:
+            print('{0}: -{1}'.format(filename, word))
 
+    write_json(args.output, report)
+    write_log(args.log, results)
+    print('detected: {0}, not_detected {1}, accuracy {2}'.format(detected, not_detected, report['accuracy']))
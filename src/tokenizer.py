@@ -0,0 +1,106 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Persian tokenizer and normalizer.
+#
+# The same normalization is used for the lexicon at build time and for the
+# text to check, so both sides agree:
+#   - Arabic yeh, alef maksura and kaf are replaced by Persian ones
+#   - diacritics and tatweel (the IGNORE characters of `data/affixes`) and
+#     direction marks are removed
+#   - repeated ZWNJs are merged and ZWNJs at the edges of words are removed
+# The words of the lexicon and the user dictionary only get the letters part,
+# with `normalize_word`.
+
+import re
+
+from letters import ZWNJ, PERSIAN_YE, PERSIAN_KAF
+
+
+ARABIC_YE      = 'ي'
+ARABIC_MAKSURA = 'ى'
+ARABIC_KAF     = 'ك'
+DIACRITICS     = 'ًٌٍَُِّْ'
+TATWEEL        = 'ـ'
+DIRECTION_MARKS = '‎‏'
+
+PUNCTUATIONS = ' ?.!؟»«،:؛()[]-"/\\\t\'…'
+
+REPLACEMENTS = {
+    ARABIC_YE: PERSIAN_YE,
+    ARABIC_MAKSURA: PERSIAN_YE,
+    ARABIC_KAF: PERSIAN_KAF,
+    ' ': ' ',
+}
+REPLACEMENTS.update((c, None) for c in DIACRITICS + TATWEEL + DIRECTION_MARKS)
+NORMALIZE_TABLE = str.maketrans(REPLACEMENTS)
+
+# any character of the table, a quick check before the translation
+NORMALIZED_CHARS = re.compile('[{0}]'.format(re.escape(''.join(REPLACEMENTS))))
+
+ZWNJ_REPEATED = re.compile(ZWNJ + '{2,}')
+ZWNJ_EDGES = re.compile(r'(?:(?<=[\s,])|^){0}+|{0}+(?=[\s,]|$)'.format(ZWNJ), re.M)
+
+# a token starts and ends with a non punctuation character,
+# like `token.strip(PUNCTUATIONS)` on space separated tokens
+EDGE = r'[^\s{0}{1}]'.format(re.escape(PUNCTUATIONS), ZWNJ)
+TOKEN = re.compile(r'{0}(?:\S*{0})?'.format(EDGE))
+
+
+def normalize(text):
+    text = text.translate(NORMALIZE_TABLE)
+
+    if ZWNJ in text:
+        text = ZWNJ_REPEATED.sub(ZWNJ, text)
+        text = ZWNJ_EDGES.sub('', text)
+
+    return text
+
+
+def normalize_word(word):
+    # the letters of a dictionary word; its ZWNJs are kept as they are
+    # written, like the last one of میرقلی‌
+    if NORMALIZED_CHARS.search(word) is None:
+        return word
+
+    return word.translate(NORMALIZE_TABLE)
+
+
+def tokenize(stream, comments=False):
+    # Yields (token, offset) for a string or an iterable of lines. Tokens are
+    # normalized, offsets point to the original text.
+    # With `comments`, lines and tokens starting with '#' are skipped.
+    if isinstance(stream, str):
+        stream = (stream,)
+
+    base = 0
+    for line in stream:
+        if not (comments and line.startswith('#')):
+            for m in TOKEN.finditer(line):
+                token = m.group()
+                if comments and token.startswith('#'):
+                    continue
+
+                token = normalize(token)
+                if token:
+                    yield token, base + m.start()
+
+        base += len(line)
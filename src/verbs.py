@@ -0,0 +1,155 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Verb paradigms.
+#
+# The lexicon has a row for each inflected form of the verbs (گفتم، می‌گفتم،
+# نگفته‌ام، ...). The verbs of `verbs.htm` are turned into a past and a
+# present stem with the verb classes of the affix file instead:
+#   گفت/vave        گفت، گفتم، می‌گفتم، نگفتم، گفته‌ام، ...
+#   گو/vsviAA       گویم، می‌گویم، بگویم، بگو، نگو، ...
+# Prefixed verbs (برگشتن) have their own classes, where می‌ and ن come after
+# the verbal prefix: برمی‌گشتم، برنگشته‌ام.
+#
+# A class is given to a stem only if most of its forms are verb rows of the
+# lexicon, and only the rows generated by the stems are removed. The other
+# rows stay as they are, so the accepted words are never less than before.
+
+import re
+import collections
+
+
+Verb = collections.namedtuple('Verb', 'infinitive past present prefixed offensive')
+
+VERB_ROW = re.compile(r'<tr><td>\d+</td><td bgcolor="#eeeeee">([^<]*)</td>'
+                      r'<td>([^<]*)</td><td>([^<]*)</td><td>([^<]*)</td></tr>')
+
+# verbal prefixes, the same as the prefixed verb classes (xm, xn, ...)
+VERBAL_PREFIXES = ('دربر', 'باز', 'بار', 'فرو', 'فرا', 'بر', 'در', 'وا', 'ور', 'سر')
+
+# classes of the past and present stems
+PAST = ('va', 've')
+PRESENT = ('vs', 'vi')
+PREFIXED_PAST = ('xa', 'xe')
+PREFIXED_PRESENT = ('xs', 'xi')
+
+# all the verb classes, they are not given to other words
+VERB_CLASSES = PAST + PRESENT + PREFIXED_PAST + PREFIXED_PRESENT + \
+    ('vm', 'vn', 'vh', 'vb', 'vo', 'xm', 'xn', 'xh', 'xb', 'xo')
+
+MIN_RATIO = 0.75  # share of the generated forms that must be verb rows
+
+
+def read_verbs(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    verbs = []
+    for infinitive, past, present, note in VERB_ROW.findall(text):
+        note = note.strip()
+        verbs.append(Verb(infinitive.strip(), past.strip(), present.strip(),
+                          note == 'Prefixed', note == 'Offensive'))
+
+    return verbs
+
+
+def verbal_prefix(stem):
+    for prefix in VERBAL_PREFIXES:
+        if stem.startswith(prefix) and len(stem) > len(prefix):
+            return prefix
+
+    return None
+
+
+class Paradigms:
+    def __init__(self, affixes, rows):
+        # rows: {word: offensive} of the verb rows of the lexicon
+        self.affixes = affixes
+        self.rows = rows
+        self.need_affix = affixes.need_affix
+
+
+    def forms(self, stem, flag):
+        return set(form for form, _ in self.affixes.expand(stem, frozenset((flag, self.need_affix))))
+
+
+    def stem(self, stem, flags):
+        # (flags, forms) of the classes that fit the rows, or None
+        rows = self.rows
+        found = []
+        forms = set()
+        for flag in flags:
+            generated = self.forms(stem, flag)
+            matched = set(form for form in generated if form in rows)
+            if generated and len(matched) >= MIN_RATIO * len(generated):
+                found.append(flag)
+                forms |= matched
+
+        if not found:
+            return None
+
+        # the offensive rows and the others are not mixed
+        if len(set(rows[form] for form in forms)) > 1:
+            return None
+
+        return found, forms
+
+
+    def paradigm(self, verb):
+        # yields (dictionary line, covered rows) for the stems of the verb
+        if verb.prefixed:
+            if not verbal_prefix(verb.past):
+                return
+            stems = ((verb.past, PREFIXED_PAST), (verb.present, PREFIXED_PRESENT))
+        else:
+            stems = ((verb.past, PAST), (verb.present, PRESENT))
+
+        for stem, flags in stems:
+            if not stem:
+                continue
+
+            found = self.stem(stem, flags)
+            if found is None:
+                continue
+
+            flags, forms = found
+            label = ''.join(flags)
+
+            # the bare present stem is not a verb, like گو
+            if stem not in self.rows and stem not in forms:
+                label += self.need_affix
+
+            if self.rows[next(iter(forms))]:
+                label += '!!'
+
+            yield stem + '/' + label, forms
+
+
+    def build(self, verbs):
+        # returns the dictionary lines of the stems and the covered rows
+        lines = set()
+        covered = set()
+        for verb in verbs:
+            for line, forms in self.paradigm(verb):
+                lines.add(line)
+                covered |= forms
+
+        return lines, covered
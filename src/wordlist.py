@@ -0,0 +1,299 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# Compact word list of all surface forms.
+#
+# The file is sorted by utf-8 bytes and front-coded in blocks, so it can be
+# memory mapped and shared between processes. Layout (little endian):
+#
+#   header : magic 'LLKW', version (u16), block size (u16), number of
+#            words (u32), number of blocks (u32), union of word flags (u32)
+#   index  : offset of each block (u32) relative to the data section
+#   data   : blocks; the first word of a block is stored in full, the rest
+#            as (shared prefix length, suffix). Each word ends with a flag byte.
+
+import os
+import mmap
+import struct
+
+
+MAGIC = b'LLKW'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIII')
+OFFSET = struct.Struct('<I')
+BLOCK_SIZE = 16
+
+# word flags
+NOSUGGEST = 0x01
+COMPOUND_BEGIN = 0x02
+COMPOUND_END = 0x04
+
+
+def encode_varint(n):
+    if n < 0x80:
+        return bytes((n,))
+
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def decode_varint(buf, pos):
+    n = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def shared_prefix(a, b):
+    # binary search on slices, much faster than comparing byte by byte
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def write_wordlist(filename, forms, block_size=BLOCK_SIZE):
+    # forms: iterable of (word, flags); duplicated words merge their flags
+    merged = {}
+    for word, flags in forms:
+        key = word.encode('utf-8')
+        merged[key] = merged.get(key, 0) | flags
+
+    keys = sorted(merged)
+
+    data = bytearray()
+    offsets = []
+    union = 0
+    prev = b''
+    for i, key in enumerate(keys):
+        flags = merged[key]
+        union |= flags
+        size = len(key)
+
+        if i % block_size == 0:
+            offsets.append(len(data))
+            data += encode_varint(size) + key
+        else:
+            shared = shared_prefix(prev, key)
+            if size < 0x80:
+                data += bytes((shared, size - shared))
+            else:
+                data += encode_varint(shared) + encode_varint(size - shared)
+            data += key[shared:]
+
+        data.append(flags)
+        prev = key
+
+    tmp = filename + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, block_size, len(keys), len(offsets), union))
+        for offset in offsets:
+            f.write(OFFSET.pack(offset))
+        f.write(data)
+
+    os.replace(tmp, filename)
+
+
+class WordList:
+    # The file is opened on first use, lookups read only the blocks they need.
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.buf = None
+
+
+    def open(self):
+        if self.buf is not None:
+            return
+
+        with open(self.filename, 'rb') as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.block_size, self.count, self.blocks, self.union = \
+            HEADER.unpack_from(self.buf, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('not a lilak word list: {0}'.format(self.filename))
+
+        self.index = HEADER.size
+        self.data = self.index + self.blocks * OFFSET.size
+
+
+    def close(self):
+        if self.buf is not None:
+            self.buf.close()
+            self.buf = None
+
+
+    def __enter__(self):
+        self.open()
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def __len__(self):
+        self.open()
+        return self.count
+
+
+    def __contains__(self, word):
+        return self.flags(word) is not None
+
+
+    def block_start(self, block):
+        return self.data + OFFSET.unpack_from(self.buf, self.index + block * OFFSET.size)[0]
+
+
+    def first_word(self, block):
+        pos = self.block_start(block)
+        size, pos = decode_varint(self.buf, pos)
+        return self.buf[pos:pos + size]
+
+
+    def flags(self, word):
+        # flags of the word, None if the word is not in the list
+        self.open()
+        key = word.encode('utf-8')
+
+        # last block whose first word is <= key
+        lo, hi = 0, self.blocks
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.first_word(mid) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo == 0:
+            return None
+
+        for current, flags in self.iter_block(lo - 1):
+            if current == key:
+                return flags
+            if current > key:
+                return None
+
+        return None
+
+
+    def iter_block(self, block):
+        buf = self.buf
+        pos = self.block_start(block)
+        remaining = min(self.block_size, self.count - block * self.block_size)
+
+        size, pos = decode_varint(buf, pos)
+        current = buf[pos:pos + size]
+        pos += size
+        yield current, buf[pos]
+        pos += 1
+
+        for _ in range(remaining - 1):
+            shared, pos = decode_varint(buf, pos)
+            size, pos = decode_varint(buf, pos)
+            current = current[:shared] + buf[pos:pos + size]
+            pos += size
+            yield current, buf[pos]
+            pos += 1
+
+
+    def slice(self, start, stop):
+        # (word, flags) of the words ranked from `start` to `stop`
+        self.open()
+        stop = min(stop, self.count)
+        block = start // self.block_size
+        rank = block * self.block_size
+
+        while rank < stop:
+            for key, flags in self.iter_block(block):
+                if rank >= stop:
+                    return
+                if rank >= start:
+                    yield key.decode('utf-8'), flags
+                rank += 1
+            block += 1
+
+
+    def ranges(self, ranges):
+        # (word, flags) of sorted (start, stop) ranges of ranks; the blocks
+        # shared by the ranges are decoded once
+        self.open()
+        cached = None
+        for start, stop in ranges:
+            rank = start
+            while rank < min(stop, self.count):
+                block = rank // self.block_size
+                if cached is None or cached[0] != block:
+                    cached = block, list(self.iter_block(block))
+
+                key, flags = cached[1][rank - block * self.block_size]
+                yield key.decode('utf-8'), flags
+                rank += 1
+
+
+    def items(self):
+        self.open()
+        for block in range(self.blocks):
+            for key, flags in self.iter_block(block):
+                yield key.decode('utf-8'), flags
+
+
+    def __iter__(self):
+        for word, _ in self.items():
+            yield word
+
+
+    def subset(self, mask):
+        return WordSubset(self, mask)
+
+
+class WordSubset:
+    # Words of a word list having any of the `mask` flags
+
+    def __init__(self, wordlist, mask):
+        self.wordlist = wordlist
+        self.mask = mask
+
+
+    def __bool__(self):
+        self.wordlist.open()
+        return bool(self.wordlist.union & self.mask)
+
+
+    def __contains__(self, word):
+        flags = self.wordlist.flags(word)
+        return flags is not None and bool(flags & self.mask)
@@ -0,0 +1,306 @@
+##
+## Lilak, Persian Spell Checking Dictionary
+##
+## Copyright 2015 Mostafa Sedaghat Joo
+##
+## Licensed under the Apache License, Version 2.0 (the "License");
+## you may not use this file except in compliance with the License.
+## You may obtain a copy of the License at
+##
+##     http://www.apache.org/licenses/LICENSE-2.0
+##
+## Unless required by applicable law or agreed to in writing, software
+## distributed under the License is distributed on an "AS IS" BASIS,
+## WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+## See the License for the specific language governing permissions and
+## limitations under the License.
+##
+##
+
+# -*- coding: utf-8 -*-
+
+# ZWNJ (half-space) repair.
+#
+# The surface forms of the dictionary are indexed by their letters without
+# ZWNJ, so a word with a missing or an extra ZWNJ is found with one lookup:
+#   میخواهم -> می‌خواهم      کتاب‌خانه‌ها -> کتابخانه‌ها
+# Space separated parts are merged when the merged word is in the dictionary
+# and a bound part of an affix class (بی، می، ها، ترین، ام، ...) is on the
+# right side of each space. Suffixes that are words too, like تر (wet), are
+# only merged with invalid words:
+#   بی خانمان -> بی‌خانمان    کتاب ها -> کتاب‌ها    بر می گردم -> برمی‌گردم
+# A bound part only binds toward its word, so ها in ما ها را stays apart.
+# The parts of a line are segmented with dynamic programming: invalid words
+# first, then the number of words is minimized, where a merge without a bound
+# part costs as much as the words it merges; ties go to the segmentation that
+# merges more bound parts:
+#   کتاب ها را دیدم -> کتاب‌ها را دیدم, not کتاب هارا دیدم
+#
+# Run it from `src` folder:
+#   python3 zwnj.py input.txt > output.txt
+#   python3 zwnj.py --check    (fixes of CHECKS, on the built dictionary)
+
+import re
+import sys
+import argparse
+
+from letters import ZWNJ
+from checker import Checker
+from tokenizer import TOKEN, normalize
+from wordlist import NOSUGGEST
+
+
+MAX_PARTS = 3  # words merged together at most
+CACHE_SIZE = 1 << 18
+
+# only spaces and ZWNJs between the parts of a word
+GAP = re.compile(r'[ {0}]+$'.format(ZWNJ))
+
+# text, fixed text; the regressions of the segmentation
+CHECKS = [
+    ('میخواهم', 'می‌خواهم'),
+    ('بی خانمان', 'بی‌خانمان'),
+    ('بر می گردم', 'برمی‌گردم'),
+    ('کتاب ها را دیدم', 'کتاب‌ها را دیدم'),
+    ('خانه ها را', 'خانه‌ها را'),
+    ('درخت ها را', 'درخت‌ها را'),
+    ('ما ها را', 'ما ها را'),
+    ('کتاب ها و درخت ها', 'کتاب‌ها و درخت‌ها'),
+    # دفتر has ها without ZWNJ in the lexicon
+    ('کتاب ها و دفتر ها', 'کتاب‌ها و دفترها'),
+]
+
+
+def bound_parts(affixes):
+    # the parts of the affixes written after (or before) a ZWNJ, like ها
+    # in ‌ها or بی in بی‌
+    prefixes = set()
+    suffixes = set()
+    for affix in affixes.prefixes.values():
+        for rule in affix.rules:
+            if ZWNJ in rule.append:
+                prefixes.update(part for part in rule.append.split(ZWNJ) if part)
+
+    for affix in affixes.suffixes.values():
+        for rule in affix.rules:
+            if ZWNJ in rule.append:
+                suffixes.update(part for part in rule.append.split(ZWNJ)[1:] if part)
+
+    return prefixes, suffixes
+
+
+def zwnj_positions(word):
+    # positions of the ZWNJs in the letters of the word, like {4} for خانه‌ای
+    positions = set()
+    skipped = 0
+    for i, c in enumerate(word):
+        if c == ZWNJ:
+            positions.add(i - skipped)
+            skipped += 1
+
+    return positions
+
+
+class ZwnjFixer:
+    def __init__(self, checker):
+        self.checker = checker
+        self.prefixes, self.suffixes = bound_parts(checker.affixes)
+        self.cache = {}
+        # suffixes that are words too, like تر (wet)
+        self.words = set(part for part in self.suffixes if checker.spell(part))
+
+        # form without ZWNJ -> form, or a tuple of forms for the few
+        # ambiguous ones, like خانه‌ای and خان‌های
+        forms = checker.forms
+        items = forms.items() if hasattr(forms, 'items') else checker.iter_forms()
+        index = {}
+        for form, flags in items:
+            if ZWNJ not in form or flags & NOSUGGEST:
+                continue
+
+            key = form.replace(ZWNJ, '')
+            old = index.get(key)
+            if old is None:
+                index[key] = form
+            elif isinstance(old, tuple):
+                index[key] = old + (form,)
+            else:
+                index[key] = (old, form)
+
+        self.index = index
+
+
+    def lookup(self, key, breaks=frozenset()):
+        # the dictionary form of the letters of `key`, or None. The forms
+        # with a ZWNJ where the text has a break (a space or a ZWNJ) win
+        form = self.index.get(key)
+        if isinstance(form, tuple):
+            return max(form, key=lambda f: (len(breaks & zwnj_positions(f)), f.count(ZWNJ), f))
+
+        if form is not None:
+            return form
+
+        if key in self.checker.forms and key not in self.checker.nosuggest:
+            return key
+
+        return None
+
+
+    def fix_word(self, word):
+        # (fixed word, is valid)
+        result = self.cache.get(word)
+        if result is not None:
+            return result
+
+        if self.checker.spell(word):
+            result = (word, True)
+        else:
+            form = self.lookup(word.replace(ZWNJ, ''), zwnj_positions(word))
+            result = (form, True) if form is not None else (word, False)
+
+        if len(self.cache) >= CACHE_SIZE:
+            self.cache.clear()
+        self.cache[word] = result
+        return result
+
+
+    def boundaries(self, words):
+        # for each space: is a bound part on its side (a prefix before it,
+        # like بی خانمان، بر می گردم, or a suffix after it, like کتاب ها),
+        # can it be merged as the last space of a word, and in the middle of
+        # a word. A space is merged with a bound part on its side or an
+        # invalid word on one side; a bound part only binds toward its word,
+        # so ها in ما ها را isn't merged with را
+        bound = []
+        last = []
+        inner = []
+        for left, right in zip(words, words[1:]):
+            tied = left in self.prefixes or (right in self.suffixes and right not in self.words)
+            loose = left not in self.suffixes and right not in self.prefixes and \
+                (not self.fix_word(left)[1] or not self.fix_word(right)[1])
+            bound.append(tied)
+            last.append(tied or loose)
+            inner.append(tied or loose or right in self.prefixes)
+
+        return bound, last, inner
+
+
+    def segment(self, words):
+        # returns [(start, stop, fixed)] covering the words, the segmentation
+        # with the fewest invalid words, then the fewest words, where merging
+        # a space without a bound part costs a word too; ties go to the most
+        # bound parts merged, so کتاب ها را is کتاب‌ها را and not کتاب هارا
+        size = len(words)
+        best = [(0, 0, 0)] + [None] * size
+        back = [None] * (size + 1)
+        bound, last, inner = self.boundaries(words)
+
+        for stop in range(1, size + 1):
+            for start in range(max(0, stop - MAX_PARTS), stop):
+                if best[start] is None:
+                    continue
+
+                tied = 0
+                if stop - start == 1:
+                    fixed, valid = self.fix_word(words[start])
+                else:
+                    if not last[stop - 2] or not all(inner[start:stop - 2]):
+                        continue
+                    joined = ZWNJ.join(words[start:stop])
+                    fixed = self.lookup(joined.replace(ZWNJ, ''), zwnj_positions(joined))
+                    if fixed is None:
+                        continue
+                    valid = True
+                    tied = sum(bound[start:stop - 1])
+
+                invalid, count, merged = best[start]
+                cost = (invalid + (not valid), count + stop - start - tied, merged - tied)
+                if best[stop] is None or cost < best[stop]:
+                    best[stop] = cost
+                    back[stop] = (start, fixed)
+
+        groups = []
+        stop = size
+        while stop:
+            start, fixed = back[stop]
+            groups.append((start, stop, fixed))
+            stop = start
+
+        groups.reverse()
+        return groups
+
+
+    def fixes(self, line):
+        # yields (start, end, replacement) for the spans of the line to fix
+        run = []
+        last_end = None
+        for m in TOKEN.finditer(line):
+            if run and not GAP.match(line, last_end, m.start()):
+                yield from self.fix_run(run)
+                run = []
+
+            run.append((normalize(m.group()), m.start(), m.end()))
+            last_end = m.end()
+
+        if run:
+            yield from self.fix_run(run)
+
+
+    def fix_run(self, run):
+        words = [word for word, _, _ in run]
+        for start, stop, fixed in self.segment(words):
+            if stop - start == 1 and fixed == words[start]:
+                continue
+
+            yield run[start][1], run[stop - 1][2], fixed
+
+
+    def fix(self, text):
+        out = []
+        for line in text.splitlines(True):
+            pos = 0
+            for start, end, replacement in self.fixes(line):
+                out.append(line[pos:start])
+                out.append(replacement)
+                pos = end
+            out.append(line[pos:])
+
+        return ''.join(out)
+
+
+    def fix_stream(self, lines):
+        # fixed lines of a file, for big documents
+        for line in lines:
+            yield self.fix(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('input', nargs='?', help='text file, standard input by default')
+    parser.add_argument('-d', '--dic', default='../build/fa-IR.dic', help='hunspell dictionary')
+    parser.add_argument('-a', '--aff', default='../build/fa-IR.aff', help='hunspell affix file')
+    parser.add_argument('-w', '--wordlist', help='prebuilt word list, instead of the dictionary')
+    parser.add_argument('--check', action='store_true', help='check the fixes of CHECKS and exit')
+    args = parser.parse_args()
+
+    if args.wordlist:
+        checker = Checker.open(args.wordlist, args.aff)
+    else:
+        checker = Checker.load(args.dic, args.aff)
+
+    fixer = ZwnjFixer(checker)
+
+    if args.check:
+        failed = 0
+        for text, expected in CHECKS:
+            fixed = fixer.fix(text)
+            if fixed != expected:
+                failed += 1
+                print('{0} -> {1}, expected {2}'.format(text, fixed, expected), file=sys.stderr)
+
+        print('{0} of {1} checks failed'.format(failed, len(CHECKS)), file=sys.stderr)
+        sys.exit(1 if failed else 0)
+
+    stream = open(args.input, 'r', encoding='utf-8') if args.input else sys.stdin
+    with stream:
+        sys.stdout.writelines(fixer.fix_stream(stream))